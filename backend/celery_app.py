@@ -7,6 +7,8 @@ from celery import Celery
 load_dotenv()
 
 CELERY_BROKER_URL = os.getenv("CELERY_BROKER_URL")
+# Dedicated queue for code evaluation (see src/CodingAssessment/Utils/code_run_service.py)
+CODE_EVAL_QUEUE = os.getenv("CODE_EVAL_QUEUE", "code_eval")
 
 # Do NOT print here — runs for every worker process
 # print("Broker URL :", CELERY_BROKER_URL)
@@ -30,6 +32,7 @@ celery.conf.update(
     enable_utc=True,
     task_track_started=True,
     task_time_limit=30 * 60,
+    task_routes={"evaluate_code_run_task": {"queue": CODE_EVAL_QUEUE}},
 )
 
 # Import tasks (NO prints here)
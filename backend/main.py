@@ -6,6 +6,7 @@ from src.Routes.resume_routes import resume_bp
 from src.Routes.user_routes import auth_bp
 from src.Routes.drive_routes import drive_bp
 from src.Routes.chatbot_routes import chatbot_bp
+from src.Routes.llm_routes import llm_bp
 from src.Routes.InterviewFeedback_routes import feedback_bp
 from src.Routes.livekit_routes import livekit_bp
 from src.Config.auth_config import AuthConfig
@@ -16,6 +17,8 @@ from src.Routes.settings_routes import settings_routes
 from src.CodingAssessment.Routes.problem_routes import problem_bp
 from src.CodingAssessment.Routes.submission_routes import submission_bp
 
+from src.SarthiRag.embeddings.embedding_service import warm_up_if_configured
+
 
 # Import the database to initialize connection
 from src.Utils.Database import db
@@ -68,6 +71,7 @@ app.register_blueprint(resume_bp, url_prefix="/api/resume")
 app.register_blueprint(auth_bp, url_prefix="/api/auth")
 app.register_blueprint(drive_bp, url_prefix = "/api/drive")
 app.register_blueprint(chatbot_bp, url_prefix="/api/chatbot")
+app.register_blueprint(llm_bp, url_prefix="/api/llm")
 app.register_blueprint(livekit_bp, url_prefix="/api/livekit")
 app.register_blueprint(companyinfo_bp, url_prefix="/api/companyinfo")
 # for coding-assessment
@@ -78,6 +82,9 @@ app.register_blueprint(submission_bp, url_prefix="/api/coding-assessment/submiss
 app.register_blueprint(feedback_bp, url_prefix="/api/interview-feedback")
 app.register_blueprint(settings_routes, url_prefix="/api/settings")
 
+# Load the Sarthi embedding model now instead of on the first chat query (SARTHI_EMBED_WARMUP=true)
+warm_up_if_configured()
+
 
 if __name__ == "__main__":
     import os
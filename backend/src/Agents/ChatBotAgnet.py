@@ -1,24 +1,50 @@
 from src.LLM.Groq import GroqLLM
 from src.Prompts.PromptBuilder import PromptBuilder
 from src.SarthiRag.rag import SarthiRAG
+from src.SarthiRag.embeddings.sentence_transformer import EmbeddingUnavailableError, SentenceTransformerEmbeddings
+from src.SarthiRag.answer_cache import SemanticAnswerCache, answer_cache_enabled
 
 class ChatBotAgent:
     def __init__(self, fallback=False):
         self.prompt_builder = PromptBuilder()
-        self.llm = GroqLLM().get_model()
+        self.llm = GroqLLM().get_cached_model("ChatBotAgent")
         self.rag = None
         self.fallback = fallback
 
         if not self.fallback:
             self.rag = SarthiRAG()
 
+        # Answers to (semantically) repeated questions, dropped when the knowledge base is re-ingested
+        self.answer_cache = None
+        if answer_cache_enabled(self.fallback):
+            self.answer_cache = SemanticAnswerCache(SentenceTransformerEmbeddings(), self._knowledge_base_version)
+
+    def _knowledge_base_version(self) -> str:
+        # The fallback prompt is fixed, so its answers never go stale
+        return self.rag.knowledge_base_version() if self.rag else "fallback"
+
     def get_reply(self, user_message: str) -> str:
+        lookup = None
+        if self.answer_cache:
+            try:
+                lookup = self.answer_cache.lookup(user_message)
+            except EmbeddingUnavailableError as e:
+                print(f"Sarthi answer cache unavailable: {e}")
+            if lookup is not None and lookup.reply is not None:
+                return lookup.reply
+
+        system_prompt = None
 
         if not self.fallback:
             # Build RAG context
-            system_prompt = self.rag.build_context(user_message)
-
-        else:
+            try:
+                system_prompt = self.rag.build_context(user_message)
+            except EmbeddingUnavailableError as e:
+                # Retrieval is down (degraded mode): answer from the fallback prompt instead
+                print(f"Sarthi RAG unavailable, using fallback prompt: {e}")
+                lookup = None   # do not cache degraded answers
+
+        if system_prompt is None:
             # Build fallback system prompt
             system_prompt = """
             Sarthi — Official Hirekruit Assistant
@@ -145,4 +171,7 @@ class ChatBotAgent:
             # In case Groq client returns OpenAI-like structure
             reply = response.choices[0].message.content.strip()
 
+        if lookup is not None:
+            self.answer_cache.store(lookup, reply)
+
         return reply
\ No newline at end of file
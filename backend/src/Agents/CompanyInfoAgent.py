@@ -29,7 +29,7 @@ from src.Prompts.PromptBuilder import PromptBuilder
 class CompanyInfoAgent:
     def __init__(self):
         self.prompt_builder = PromptBuilder()
-        self.llm = GroqLLM().get_model()
+        self.llm = GroqLLM().get_cached_model("CompanyInfoAgent")
         self.retriever = Tavily().get_model()
 
     def retrieve_company_info(self, company_name: str) -> str:
@@ -2,9 +2,13 @@ import os
 from bson import ObjectId
 from src.Utils.EmailService import EmailService
 from src.Utils.Database import db
+from src.Utils.DriveStats import record_transition
+from src.Utils.DriveContext import resolve_drive_context
 from src.MailTemplate.EmailTemplate import EmailTemplate
 from src.Utils.AsyncEmailService import AsyncEmailService
 from src.Utils.BrevoEmailService import BrevoEmailService
+from src.Model.EmailOutbox import create_outbox_message
+from src.Utils.EmailOutboxService import enqueue_emails, kick_outbox_dispatch
 
 
 class EmailingAgent:  
@@ -26,71 +30,15 @@ class EmailingAgent:
         print(f"\n=== Starting email process for drive: {drive_id} ===")
 
         # -----------------------------
-        # Defaults
+        # 1. Resolve Company & HR
         # -----------------------------
-        company_name = "HiRekruit"
-        hr_name = "HR Team"
-        hr_email = "hirekruit@gmail.com"
-        company_id = None
-        company_doc = None
+        context = resolve_drive_context(drive_id)
+        company_name = context.company_name
+        hr_name = context.hr_name
+        hr_email = context.hr_email
 
         # -----------------------------
-        # 1. Resolve Drive + Company
-        # -----------------------------
-        try:
-            drive = db.drives.find_one(
-                {"_id": ObjectId(drive_id)},
-                {"company_id": 1}
-            )
-
-            if drive:
-                company_id = drive.get("company_id")
-
-                if company_id:
-                    try:
-                        company_doc = db.companies.find_one({"_id": ObjectId(company_id)})
-                    except Exception:
-                        company_doc = (
-                            db.companies.find_one({"_id": company_id}) or
-                            db.companies.find_one({"company_id": company_id})
-                        )
-
-                    if company_doc:
-                        company_name = company_doc.get("name", company_name)
-
-        except Exception:
-            pass
-
-        # -----------------------------
-        # 2. Resolve HR Name & Email
-        # -----------------------------
-        try:
-            if company_id:
-                hr_user = db.users.find_one(
-                    {"company_id": str(company_id)},
-                    {"name": 1, "email": 1}
-                )
-
-                if hr_user:
-                    hr_name = hr_user.get("name", hr_name)
-                    hr_email = hr_user.get("email", hr_email)
-                elif company_doc:
-                    hr_name = (
-                        company_doc.get("hr_name")
-                        or company_doc.get("contact_name")
-                        or hr_name
-                    )
-                    hr_email = (
-                        company_doc.get("hr_email")
-                        or company_doc.get("email")
-                        or hr_email
-                    )
-
-        except Exception as e:
-            print("Error resolving HR info:", e)
-
-        # -----------------------------
-        # 3. Fetch Drive Candidates
+        # 2. Fetch Drive Candidates
         # -----------------------------
         candidates = list(db.drive_candidates.find({"drive_id": drive_id}))
         print(f"Found {len(candidates)} candidates for this drive")
@@ -106,8 +54,9 @@ class EmailingAgent:
             for c in db.candidates.find({"_id": {"$in": candidate_ids}})
         }
 
-        success_count = 0
         error_count = 0
+        messages = []
+        recipients = {}     # template_key -> [(drive candidate, candidate info)]
 
         # -----------------------------
         # 4. Process Each Candidate
@@ -128,31 +77,34 @@ class EmailingAgent:
             # Select Template
             # -----------------------------
             if status == "yes":
-                template = EmailTemplate.get("shortlisted")
+                template_key = "shortlisted"
             elif status == "no":
-                template = EmailTemplate.get("not_shortlisted")
+                template_key = "not_shortlisted"
             else:
                 print(f"✗ Skipping {name} — no shortlist status")
                 continue
 
-            # -----------------------------
-            # Render Email
-            # -----------------------------
-            subject = template["subject"].format(
-                company_name=company_name
-            )
+            recipients.setdefault(template_key, []).append((person, candidate_info))
 
-            body = template["body"].format(
-                name=name,
-                company_name=company_name,
-                hr_name=hr_name,
-                hr_email=hr_email
-            )
-
-            # -----------------------------
-            # Send Email
-            # -----------------------------
+        # -----------------------------
+        # Render Emails (one personalised template per key, so Brevo sends them in batches)
+        # -----------------------------
+        for template_key, people in recipients.items():
             try:
+                emails = EmailTemplate.render_batch(
+                    template_key,
+                    [{"name": candidate_info["name"]} for _, candidate_info in people],
+                    personalize=True,
+                    company_name=company_name,
+                    hr_name=hr_name,
+                    hr_email=hr_email
+                )
+            except Exception as e:
+                print(f"✗ Error rendering {template_key} emails: {e}")
+                error_count += len(people)
+                continue
+
+            for (person, candidate_info), email in zip(people, emails):
                 print(f"Sending email to: {candidate_info['email']}")
 
                 # for EmailService
@@ -162,92 +114,43 @@ class EmailingAgent:
                 #     body
                 # )
 
-                # for AsyncEmailSerive
-                self.email_service.send_email_background(
-                    candidate_info["email"],
-                    subject,
-                    body
-                )
-
-
-                db.drive_candidates.update_one(
-                    {"_id": person["_id"]},
-                    {"$set": {"email_sent": "yes"}}
-                )
-
-                success_count += 1
-                print(f"✓ Email sent to {name}")
+                # Delivered by the outbox dispatcher, which sets email_sent
+                # only once the send is confirmed
+                messages.append(create_outbox_message(
+                    drive_id, person["candidate_id"], template_key,
+                    candidate_info["email"], email["subject"], email["body"],
+                    drive_candidate_id=str(person["_id"]),
+                    on_sent={"email_sent": "yes"},
+                    template_body=email.get("template_body"),
+                    params=email.get("params")
+                ))
 
-            except Exception as e:
-                print(f"✗ Error sending email to {candidate_info.get('email')}: {e}")
-                error_count += 1
+        success_count = enqueue_emails(messages)
+        kick_outbox_dispatch(self.email_service)
 
         # -----------------------------
         # Summary
         # -----------------------------
         print("\n=== Email Process Complete ===")
-        print(f"Success: {success_count}, Errors: {error_count}")
+        print(f"Queued: {success_count}, Already queued/sent: {len(messages) - success_count}, Errors: {error_count}")
 
     def send_final_selection_emails(self, drive_id):
         """Send final selection / rejection emails using EmailTemplate class"""
 
         print(f"\n=== Starting final selection email process for drive: {drive_id} ===")
 
-        # -----------------------------
-        # Defaults
-        # -----------------------------
-        company_name = "HiRekruit"
-        hr_name = "HR Team"
-        hr_email = "hirekruit@gmail.com"
-
-        drive = None
-
         # -----------------------------
         # Resolve Drive + Company + HR
         # -----------------------------
-        try:
-            drive = db.drives.find_one(
-                {"_id": ObjectId(drive_id)},
-                {"role": 1, "company_id": 1}
-            )
-
-            if drive:
-                comp_id = drive.get("company_id")
-
-                if comp_id:
-                    try:
-                        company_doc = db.companies.find_one({"_id": ObjectId(comp_id)})
-                    except Exception:
-                        company_doc = (
-                            db.companies.find_one({"_id": comp_id}) or
-                            db.companies.find_one({"company_id": comp_id})
-                        )
-
-                    if company_doc:
-                        company_name = company_doc.get("name", company_name)
-                        hr_name = company_doc.get("hr_name") or company_doc.get("contact_name") or hr_name
-                        hr_email = company_doc.get("hr_email") or company_doc.get("email") or hr_email
-
-                    # Try HR user
-                    hr_user = db.users.find_one(
-                        {"company_id": str(comp_id)},
-                        {"name": 1, "email": 1}
-                    )
-                    if hr_user:
-                        hr_name = hr_user.get("name", hr_name)
-                        hr_email = hr_user.get("email", hr_email)
-
-        except Exception:
-            pass
-
-        # -----------------------------
-        # Validate Drive
-        # -----------------------------
-        if not drive:
+        context = resolve_drive_context(drive_id)
+        if not context.drive_found:
             print(f"✗ Drive not found: {drive_id}")
             return
 
-        job_role = drive.get("role", "the position")
+        company_name = context.company_name
+        hr_name = context.hr_name
+        hr_email = context.hr_email
+        job_role = context.job_role
 
         # -----------------------------
         # Fetch evaluated candidates
@@ -269,8 +172,9 @@ class EmailingAgent:
             for c in db.candidates.find({"_id": {"$in": candidate_ids}})
         }
 
-        success_count = 0
         error_count = 0
+        messages = []
+        recipients = {}     # template_key -> [(drive candidate, candidate info, decision, final score, feedback)]
 
         # -----------------------------
         # Process Each Candidate
@@ -283,83 +187,88 @@ class EmailingAgent:
                 error_count += 1
                 continue
 
-            try:
-                evaluation = person.get("evaluation_result", {})
-                final_score = evaluation.get("final_round_score", 0)
-                decision = person.get("selected", "FAIL")
-                feedback = person.get("feedback", "No feedback provided.")
-
-                # -----------------------------
-                # Select Template
-                # -----------------------------
-                if decision == "yes":
-                    template = EmailTemplate.get("pass")
-                else:
-                    template = EmailTemplate.get("fail")
-
-                # -----------------------------
-                # Render Email
-                # -----------------------------
-                subject = template["subject"].format(
-                    job_role=job_role,
-                    company_name=company_name
-                )
+            evaluation = person.get("evaluation_result", {})
+            final_score = evaluation.get("final_round_score", 0)
+            decision = person.get("selected", "FAIL")
+            feedback = person.get("feedback", "No feedback provided.")
 
-                body = template["body"].format(
-                    name=candidate_info["name"],
+            # -----------------------------
+            # Select Template
+            # -----------------------------
+            template_key = "pass" if decision == "yes" else "fail"
+            recipients.setdefault(template_key, []).append((person, candidate_info, decision, final_score, feedback))
+
+        for template_key, people in recipients.items():
+            # -----------------------------
+            # Render Emails (one personalised template per key, so Brevo sends them in batches)
+            # -----------------------------
+            try:
+                emails = EmailTemplate.render_batch(
+                    template_key,
+                    [{"name": candidate_info["name"], "feedback": feedback}
+                     for _, candidate_info, _, _, feedback in people],
+                    personalize=True,
                     job_role=job_role,
                     company_name=company_name,
                     hr_name=hr_name,
-                    hr_email=hr_email,
-                    feedback=feedback
+                    hr_email=hr_email
                 )
+            except Exception as e:
+                print(f"✗ Error rendering {template_key} emails: {e}")
+                error_count += len(people)
+                continue
 
-                # -----------------------------
-                # Send Email
-                # -----------------------------
-                print(f"Sending email to: {candidate_info['email']}")
-                #....................................
-                # for EmailService
-                # self.email_service.send_email(
-                #     candidate_info["email"],
-                #     subject,
-                #     body
-                # )
-
-                # for AsyncEmailSerive
-                self.email_service.send_email_background(
-                    candidate_info["email"],
-                    subject,
-                    body
-                )
-                #.......................................
-                # -----------------------------
-                # Update DB
-                # -----------------------------
-                db.drive_candidates.update_one(
-                    {"_id": person["_id"]},
-                    {"$set": {
-                        "selected": decision,
-                        "total_score": final_score,
-                        "final_selection_email_sent": "yes",
-                        "final_email_sent": "yes"
-                    }}
-                )
+            for (person, candidate_info, decision, final_score, _), email in zip(people, emails):
+                try:
+                    # -----------------------------
+                    # Send Email
+                    # -----------------------------
+                    print(f"Sending email to: {candidate_info['email']}")
+                    #....................................
+                    # for EmailService
+                    # self.email_service.send_email(
+                    #     candidate_info["email"],
+                    #     subject,
+                    #     body
+                    # )
+
+                    # Delivered by the outbox dispatcher, which sets the final_email_sent
+                    # flags only once the send is confirmed
+                    messages.append(create_outbox_message(
+                        drive_id, person["candidate_id"], template_key,
+                        candidate_info["email"], email["subject"], email["body"],
+                        drive_candidate_id=str(person["_id"]),
+                        on_sent={"final_selection_email_sent": "yes", "final_email_sent": "yes"},
+                        template_body=email.get("template_body"),
+                        params=email.get("params")
+                    ))
+                    #.......................................
+                    # -----------------------------
+                    # Update DB
+                    # -----------------------------
+                    db.drive_candidates.update_one(
+                        {"_id": person["_id"]},
+                        {"$set": {
+                            "selected": decision,
+                            "total_score": final_score
+                        }}
+                    )
+                    record_transition(drive_id, person, {**person, "selected": decision})
 
-                success_count += 1
-                print(f"✓ Email sent successfully to {candidate_info['name']}")
+                except Exception as e:
+                    print(f"✗ Error sending email to {candidate_info.get('email')}: {e}")
+                    import traceback
+                    traceback.print_exc()
+                    error_count += 1
 
-            except Exception as e:
-                print(f"✗ Error sending email to {candidate_info.get('email')}: {e}")
-                import traceback
-                traceback.print_exc()
-                error_count += 1
+        success_count = enqueue_emails(messages)
+        kick_outbox_dispatch(self.email_service)
 
         # -----------------------------
         # Summary
         # -----------------------------
         print("\n=== Final Selection Email Process Complete ===")
-        print(f"Success: {success_count}, Errors: {error_count}")
+        print(f"Queued: {success_count}, Already queued/sent: {len(messages) - success_count}, Errors: {error_count}")
 
     def send_otp_email(self, recipient_email: str, otp: str, purpose: str = "verification"):
         """Send OTP via email with beautiful HTML template"""
@@ -378,12 +287,13 @@ class EmailingAgent:
             # return self.send_email(recipient_email, subject, body, html=True)
         
             # for AsyncEmailSerive
-            return self.email_service.send_email_background(
+            self.email_service.send_email_background(
                 recipient_email,
                 subject,
                 body,
                 html=True
             )
+            return True
             #.............................................................
         except Exception as e:
             print(f"Error sending OTP email: {str(e)}")
@@ -403,12 +313,13 @@ class EmailingAgent:
             # return self.send_email(recipient_email, subject, body, html=True)
         
             # for AsyncEmailSerive
-            return self.email_service.send_email_background(
+            self.email_service.send_email_background(
                 recipient_email,
                 subject,
                 body,
                 html=True
             )
+            return True
             #................................................
             
         except Exception as e:
@@ -425,12 +336,13 @@ class EmailingAgent:
             
             # return self.send_email(recipient_email, subject, body, html=True)
             
-            return self.email_service.send_email_background(
+            self.email_service.send_email_background(
                 recipient_email,
                 subject,
                 body,
                 html=True
             )
+            return True
         except Exception as e:
             print(f"Error sending password change notification: {str(e)}")
             return False
@@ -1,13 +1,22 @@
+from collections import Counter
+from concurrent.futures import wait
 from datetime import datetime, timedelta
+from pymongo import UpdateOne
 from src.Utils.Database import db
+from src.Utils.DriveStats import candidate_counters, counter_delta, inc_drive_stats
+from src.Utils.DriveContext import resolve_drive_context
 from bson import ObjectId
 from datetime import datetime, timedelta
 from src.MailTemplate.EmailTemplate import EmailTemplate
+from src.Utils.EmailTransport import email_message
+from src.Utils.SlotScheduler import schedule_slots
 import os
 from dotenv import load_dotenv
 load_dotenv()
 forntend_base_url = os.getenv("FRONTEND_BASE_URL")
 
+CODING_ROUND_TYPES = ["coding", "assessment", "coding assessment"]
+
 class InterviewSchedulingAgent:
     def __init__(self, email_service):
         """
@@ -16,10 +25,84 @@ class InterviewSchedulingAgent:
         self.email_service = email_service
 
 
+    def _fetch_shortlisted(self, drive_id):
+        """Shortlisted drive_candidates plus their name/email, fetched with one $in query."""
+        shortlisted_candidates = list(
+            db.drive_candidates.find({
+                "drive_id": drive_id,
+                "resume_shortlisted": "yes"
+            })
+        )
+
+        candidate_ids = [ObjectId(c["candidate_id"]) for c in shortlisted_candidates]
+        candidate_info_map = {
+            str(c["_id"]): c
+            for c in db.candidates.find({"_id": {"$in": candidate_ids}}, {"name": 1, "email": 1})
+        }
+        return shortlisted_candidates, candidate_info_map
+
+
+    def _round_index(self, rounds_status, round_types):
+        """Index of the round to schedule: the first matching round not yet scheduled, else the first match."""
+        matches = [
+            index for index, round_info in enumerate(rounds_status)
+            if str(round_info.get("round_type") or "").lower().strip() in round_types
+        ]
+        for index in matches:
+            if rounds_status[index].get("scheduled") != "yes":
+                return index
+        return matches[0] if matches else None
+
+
+    def _delivered(self, futures):
+        """Wait for send Futures; True per message the transport accepted."""
+        futures = list(futures)
+        wait(futures)
+        return [future.exception() is None for future in futures]
+
+
+    def _mark_rounds_scheduled(self, drive_id, scheduled, round_types, unset=None):
+        """
+        Mark the matching round of every (drive_candidate, scheduled_date, link) as
+        scheduled with a single bulk_write, and apply the drive_stats delta once.
+        """
+        now = datetime.utcnow()
+        updates = []
+        deltas = Counter()
+
+        for candidate, scheduled_date, link in scheduled:
+            rounds_status = candidate.get("rounds_status", [])
+            index = self._round_index(rounds_status, round_types)
+            fields = {"updated_at": now}
+
+            if index is None:
+                print(f"⚠️ Round not found in rounds_status for {candidate['_id']}")
+            else:
+                counters_before = candidate_counters(candidate)
+                rounds_status[index].update(scheduled="yes", scheduled_date=scheduled_date, interview_link=link)
+                deltas.update(counter_delta(counters_before, candidate_counters(candidate)))
+                fields.update({
+                    f"rounds_status.{index}.scheduled": "yes",
+                    f"rounds_status.{index}.scheduled_date": scheduled_date,
+                    f"rounds_status.{index}.interview_link": link
+                })
+
+            update = {"$set": fields}
+            if unset:
+                update["$unset"] = {field: "" for field in unset}
+            updates.append(UpdateOne({"_id": candidate["_id"]}, update))
+
+        if updates:
+            db.drive_candidates.bulk_write(updates, ordered=False)
+            inc_drive_stats(drive_id, dict(deltas))
+
+
     def schedule_interviews(self, drive_id, round_type="hr"):
         """
-        Send interview scheduling emails using EmailTemplate
-        ❗ No updates to drive_candidate or rounds_status.
+        Send interview invitations using EmailTemplate: candidates are spread over
+        capacity-limited slots (SlotScheduler), each gets a mail with their slot,
+        HR gets one panel digest, and the round is marked scheduled in rounds_status
+        with the slot as scheduled_date.
         """
 
         print(
@@ -29,17 +112,6 @@ class InterviewSchedulingAgent:
             round_type
         )
 
-        # -----------------------------
-        # Interview Timing
-        # -----------------------------
-        interview_datetime = datetime.now() + timedelta(days=1)
-        interview_datetime = interview_datetime.replace(
-            hour=10, minute=0, second=0, microsecond=0
-        )
-
-        interview_date = interview_datetime.strftime('%A, %d %B %Y')
-        interview_time = interview_datetime.strftime('%I:%M %p')
-
         # for candidate
         candidate_meeting_base_url = f"{forntend_base_url}/start-interview"
         # for panel (HR)
@@ -47,71 +119,18 @@ class InterviewSchedulingAgent:
 
         normalized_round_type = str(round_type).strip().capitalize()
 
-        # -----------------------------
-        # Defaults
-        # -----------------------------
-        company_name = "HiRekruit"
-        hr_name = "HR Team"
-        hr_email = "hirekruit@gmail.com"
-        company_id = None
-        company_doc = None
-
         # -----------------------------
         # Resolve Company & HR
         # -----------------------------
-        try:
-            drive = db.drives.find_one(
-                {"_id": ObjectId(drive_id)},
-                {"company_id": 1}
-            )
-
-            if drive:
-                company_id = drive.get("company_id")
-
-                if company_id:
-                    try:
-                        company_doc = db.companies.find_one({"_id": ObjectId(company_id)})
-                    except Exception:
-                        company_doc = (
-                            db.companies.find_one({"_id": company_id}) or
-                            db.companies.find_one({"company_id": company_id})
-                        )
-
-                    if company_doc:
-                        company_name = company_doc.get("name", company_name)
-
-                    hr_user = db.users.find_one(
-                        {"company_id": str(company_id)},
-                        {"name": 1, "email": 1}
-                    )
-
-                    if hr_user:
-                        hr_name = hr_user.get("name", hr_name)
-                        hr_email = hr_user.get("email", hr_email)
-                    elif company_doc:
-                        hr_name = (
-                            company_doc.get("hr_name")
-                            or company_doc.get("contact_name")
-                            or hr_name
-                        )
-                        hr_email = (
-                            company_doc.get("hr_email")
-                            or company_doc.get("email")
-                            or hr_email
-                        )
-
-        except Exception as e:
-            print(f"⚠️ Warning: Could not resolve company/HR details: {e}")
+        context = resolve_drive_context(drive_id)
+        company_name = context.company_name
+        hr_name = context.hr_name
+        hr_email = context.hr_email
 
         # -----------------------------
         # Fetch Shortlisted Candidates
         # -----------------------------
-        shortlisted_candidates = list(
-            db.drive_candidates.find({
-                "drive_id": drive_id,
-                "resume_shortlisted": "yes"
-            })
-        )
+        shortlisted_candidates, candidate_info_map = self._fetch_shortlisted(drive_id)
 
         if not shortlisted_candidates:
             print(f"⚠️ No shortlisted candidates found for drive {drive_id}")
@@ -119,100 +138,94 @@ class InterviewSchedulingAgent:
 
         print(f"📊 Found {len(shortlisted_candidates)} shortlisted candidates")
 
-        email_template = EmailTemplate.get("interview")
-        panel_email_template = EmailTemplate.get("panel")
-        email_count = 0
+        invited = [
+            (candidate, candidate_info_map[candidate["candidate_id"]])
+            for candidate in shortlisted_candidates
+            if candidate["candidate_id"] in candidate_info_map
+        ]
+        for candidate in shortlisted_candidates:
+            if candidate["candidate_id"] not in candidate_info_map:
+                print(f"⚠️ Candidate info not found for ID {candidate['candidate_id']}")
+
+        if not invited:
+            return 0
+
+        # -----------------------------
+        # Interview Slots
+        # -----------------------------
+        try:
+            slots = schedule_slots(len(invited), context.company_id, exclude_drive_id=drive_id)
+        except ValueError as e:
+            print(f"❌ Could not allocate interview slots: {e}")
+            return 0
+
+        # -----------------------------
+        # Render Invitations (one pass)
+        # -----------------------------
+        scheduled = []
+        invitations = []
+        panel_rows = []
+        for (candidate, candidate_info), slot in zip(invited, slots):
+            interview_url = f"{candidate_meeting_base_url}/{candidate['_id']}/{round_type.lower()}"
+            interview_date = slot.strftime('%A, %d %B %Y')
+            interview_time = slot.strftime('%I:%M %p')
+
+            scheduled.append((candidate, slot, interview_url))
+            invitations.append({
+                "name": candidate_info["name"],
+                "interview_url": interview_url,
+                "interview_date": interview_date,
+                "interview_time": interview_time
+            })
+            panel_rows.append({
+                "candidate_name": candidate_info["name"],
+                "interview_slot": f"{interview_date}, {interview_time}",
+                "panel_url": f"{panel_meeting_base_url}/{candidate['_id']}/{round_type.lower()}"
+            })
+
+        shared = {
+            "round_type": normalized_round_type,
+            "hr_name": hr_name,
+            "hr_email": hr_email,
+            "company_name": company_name
+        }
+        # personalize: one template + per-candidate params, so Brevo sends them in batches
+        emails = EmailTemplate.render_batch("interview", invitations, personalize=True, **shared)
+
+        panel_template = EmailTemplate.compiled("panel_digest")
+        panel_email = panel_template.render(
+            candidate_count=len(panel_rows),
+            candidate_rows=panel_template.render_rows(panel_rows),
+            interview_date=invitations[0]["interview_date"],
+            interview_time=invitations[0]["interview_time"],
+            **shared
+        )
 
         # -----------------------------
         # Send Emails
         # -----------------------------
-        for candidate in shortlisted_candidates:
-            candidate_id = candidate["candidate_id"]
-            candidate_info = db.candidates.find_one(
-                {"_id": ObjectId(candidate_id)}
-            )
+        print(f"📧 Sending {len(emails)} interview emails and one panel digest to {hr_email}")
+        candidate_futures = self.email_service.send_batch(
+            email_message(candidate_info["email"], email["subject"], email["body"],
+                          template_body=email.get("template_body"), params=email.get("params"))
+            for (_, candidate_info), email in zip(invited, emails)
+        )
+        panel_future = self.email_service.send_email_background(hr_email, panel_email["subject"], panel_email["body"])
+        delivered = self._delivered(candidate_futures)
+        if not self._delivered([panel_future])[0]:
+            print(f"⚠️ Panel digest to {hr_email} could not be sent")
 
-            if not candidate_info:
-                print(f"⚠️ Candidate info not found for ID {candidate_id}")
-                continue
+        # -----------------------------
+        # Update rounds_status (only candidates whose invitation went out)
+        # -----------------------------
+        scheduled = [entry for entry, ok in zip(scheduled, delivered) if ok]
+        self._mark_rounds_scheduled(drive_id, scheduled, [str(round_type).lower().strip()])
 
-            interview_url = f"{candidate_meeting_base_url}/{candidate['_id']}/{round_type.lower()}"
-            panel_interview_url = f"{panel_meeting_base_url}/{candidate['_id']}/{round_type.lower()}"
-
-            # -----------------------------
-            # Candidate Email
-            # -----------------------------
-            subject = email_template["subject"].format(
-                round_type=normalized_round_type,
-                company_name=company_name
-            )
-
-            body = email_template["body"].format(
-                name=candidate_info["name"],
-                round_type=normalized_round_type,
-                interview_date=interview_date,
-                interview_time=interview_time,
-                interview_url=interview_url,
-                hr_name=hr_name,
-                hr_email=hr_email,
-                company_name=company_name
-            )
-
-            # -----------------------------
-            # Panel (HR) Email
-            # -----------------------------
-            panel_subject = panel_email_template["subject"].format(
-                round_type=normalized_round_type,
-                company_name=company_name
-            )
-
-            panel_body = panel_email_template["body"].format(
-                hr_name=hr_name,
-                candidate_name=candidate_info["name"],
-                round_type=normalized_round_type,
-                interview_date=interview_date,
-                interview_time=interview_time,
-                panel_url=panel_interview_url,
-                company_name=company_name
-            )
-
-            try:
-                print(f"📧 Sending interview email to {candidate_info['email']}")
-
-                # for EmailSerive
-                # self.email_service.send_email(
-                #     candidate_info["email"],
-                #     subject,
-                #     body
-                # )
-
-                # for AsyncEmailSerive
-                print("Sending mail to Candidate.")
-                self.email_service.send_email_background(
-                    candidate_info["email"],
-                    subject,
-                    body
-                )
-
-                # Send panel access mail to HR
-                print("Sending mail to Panel.")
-                self.email_service.send_email_background(
-                    hr_email,
-                    panel_subject,
-                    panel_body
-                )
-
-                print("   ✅ Emails sent successfully")
-                email_count += 1
-
-            except Exception as e:
-                print(f"   ❌ Failed to send email: {e}")
-
-        print(f"\n✅ Emails sent: {email_count}/{len(shortlisted_candidates)}")
-        return email_count
-
-
-    def schedule_coding_assessments(self, drive_id, round_type):
+        print(f"\n✅ Emails sent: {len(scheduled)}/{len(shortlisted_candidates)}")
+        return len(scheduled)
+
+
+    def schedule_coding_assessments(self, drive_id, round_type="coding"):
         """
         Schedule coding assessments for shortlisted candidates.
         Uses EmailTemplate and updates ONLY rounds_status.
@@ -224,71 +237,18 @@ class InterviewSchedulingAgent:
         duration_hours = (deadline - datetime.now()).days * 24
         assessment_base_url = f"{forntend_base_url}/assessment"
 
-        # -------------------------
-        # Defaults
-        # -------------------------
-        company_name = "HiRekruit"
-        hr_name = "HR Team"
-        hr_email = "hirekruit@gmail.com"
-        company_id = None
-        company_doc = None
-
         # -------------------------
         # Resolve Company & HR
         # -------------------------
-        try:
-            drive = db.drives.find_one(
-                {"_id": ObjectId(drive_id)},
-                {"company_id": 1}
-            )
-
-            if drive:
-                company_id = drive.get("company_id")
-
-                if company_id:
-                    try:
-                        company_doc = db.companies.find_one({"_id": ObjectId(company_id)})
-                    except Exception:
-                        company_doc = (
-                            db.companies.find_one({"_id": company_id}) or
-                            db.companies.find_one({"company_id": company_id})
-                        )
-
-                    if company_doc:
-                        company_name = company_doc.get("name", company_name)
-
-                    hr_user = db.users.find_one(
-                        {"company_id": str(company_id)},
-                        {"name": 1, "email": 1}
-                    )
-
-                    if hr_user:
-                        hr_name = hr_user.get("name", hr_name)
-                        hr_email = hr_user.get("email", hr_email)
-                    elif company_doc:
-                        hr_name = (
-                            company_doc.get("hr_name")
-                            or company_doc.get("contact_name")
-                            or hr_name
-                        )
-                        hr_email = (
-                            company_doc.get("hr_email")
-                            or company_doc.get("email")
-                            or hr_email
-                        )
-
-        except Exception as e:
-            print(f"⚠️ Warning: Could not resolve company/HR details: {e}")
+        context = resolve_drive_context(drive_id)
+        company_name = context.company_name
+        hr_name = context.hr_name
+        hr_email = context.hr_email
 
         # -------------------------
         # Fetch shortlisted candidates
         # -------------------------
-        shortlisted_candidates = list(
-            db.drive_candidates.find({
-                "drive_id": drive_id,
-                "resume_shortlisted": "yes"
-            })
-        )
+        shortlisted_candidates, candidate_info_map = self._fetch_shortlisted(drive_id)
 
         if not shortlisted_candidates:
             print(f"⚠️ No shortlisted candidates found for drive {drive_id}")
@@ -296,93 +256,57 @@ class InterviewSchedulingAgent:
 
         print(f"📊 Found {len(shortlisted_candidates)} shortlisted candidates")
 
-        template = EmailTemplate.get("coding_assessment")
-        success_count = 0
-
         # -------------------------
-        # Process candidates
+        # Render invitations (one pass)
         # -------------------------
+        invited = []
+        invitations = []
         for candidate in shortlisted_candidates:
             candidate_id = candidate["candidate_id"]
-            candidate_info = db.candidates.find_one(
-                {"_id": ObjectId(candidate_id)}
-            )
+            candidate_info = candidate_info_map.get(candidate_id)
 
             if not candidate_info:
                 print(f"⚠️ Candidate info not found for ID {candidate_id}")
                 continue
 
             candidate_assessment_url = f"{assessment_base_url}/{drive_id}/{candidate_id}"
+            invited.append((candidate, candidate_info, candidate_assessment_url))
+            invitations.append({"name": candidate_info["name"], "assessment_url": candidate_assessment_url})
+
+        if not invited:
+            return 0
+
+        emails = EmailTemplate.render_batch(
+            "coding_assessment",
+            invitations,
+            personalize=True,
+            company_name=company_name,
+            deadline=deadline.strftime('%A, %d %B %Y, %I:%M %p'),
+            duration=duration_hours,
+            hr_name=hr_name,
+            hr_email=hr_email
+        )
+
+        # -------------------------
+        # Send emails
+        # -------------------------
+        print(f"📧 Sending {len(emails)} coding assessment emails")
+        delivered = self._delivered(self.email_service.send_batch(
+            email_message(candidate_info["email"], email["subject"], email["body"],
+                          template_body=email.get("template_body"), params=email.get("params"))
+            for (_, candidate_info, _), email in zip(invited, emails)
+        ))
+        invited = [entry for entry, ok in zip(invited, delivered) if ok]
+
+        # -------------------------
+        # Update rounds_status ONLY (candidates whose invitation went out)
+        # -------------------------
+        self._mark_rounds_scheduled(
+            drive_id,
+            [(candidate, deadline, link) for candidate, _, link in invited],
+            CODING_ROUND_TYPES,
+            unset=["coding_assessment_sent", "assessment_deadline", "assessment_link"]
+        )
 
-            subject = template["subject"].format(
-                company_name=company_name
-            )
-
-            body = template["body"].format(
-                name=candidate_info["name"],
-                company_name=company_name,
-                assessment_url=candidate_assessment_url,
-                deadline=deadline.strftime('%A, %d %B %Y, %I:%M %p'),
-                duration=duration_hours,
-                hr_name=hr_name,
-                hr_email=hr_email
-            )
-
-            try:
-                print(f"📧 Sending coding assessment email to {candidate_info['email']}")
-
-                # for EmailSerive
-                # self.email_service.send_email(
-                #     candidate_info["email"],
-                #     subject,
-                #     body
-                # )
-
-                # for AsyncEmailSerive
-                self.email_service.send_email_background(
-                    candidate_info["email"],
-                    subject,
-                    body
-                )
-
-                # -------------------------
-                # Update rounds_status ONLY
-                # -------------------------
-                rounds_status = candidate.get("rounds_status", [])
-                round_updated = False
-
-                for round_info in rounds_status:
-                    rt = round_info.get("round_type", "").lower().strip()
-                    if rt in ["coding", "assessment", "coding assessment"]:
-                        round_info["scheduled"] = "yes"
-                        round_info["scheduled_date"] = deadline
-                        round_info["interview_link"] = candidate_assessment_url
-                        round_updated = True
-                        break
-
-                if not round_updated:
-                    print("⚠️ Coding round not found in rounds_status")
-
-                db.drive_candidates.update_one(
-                    {"_id": candidate["_id"]},
-                    {
-                        "$set": {
-                            "rounds_status": rounds_status,
-                            "updated_at": datetime.utcnow()
-                        },
-                        "$unset": {
-                            "coding_assessment_sent": "",
-                            "assessment_deadline": "",
-                            "assessment_link": ""
-                        }
-                    }
-                )
-
-                success_count += 1
-                print("   ✅ Email sent and rounds_status updated")
-
-            except Exception as e:
-                print(f"   ❌ Failed for {candidate_info['email']}: {e}")
-
-        print(f"\n✅ Coding assessment process completed: {success_count}/{len(shortlisted_candidates)}")
-        return success_count
+        print(f"\n✅ Coding assessment process completed: {len(invited)}/{len(shortlisted_candidates)}")
+        return len(invited)
@@ -6,7 +6,7 @@ import json
 from src.Prompts.SystemPrompts import HR_EVALUATION_PROMPT
 
 groq = GroqLLM()
-llm = groq.get_model()
+llm = groq.get_cached_model("MockInterviewAgent")
 
 
 class MockInterviewAgent:
@@ -1,15 +1,17 @@
-import fitz
 import json
+import os
 import requests
 from src.LLM.Groq import GroqLLM
 from src.Prompts.PromptBuilder import PromptBuilder
+from src.Utils.PdfTextExtractor import extract_text_from_pdf_bytes
 
 groq = GroqLLM()
+QUESTION_PDF_MAX_PAGES = int(os.getenv("QUESTION_PDF_MAX_PAGES", "50"))
 
 class QuestionIntakeAgent:
     def __init__(self):
         self.prompt_builder = PromptBuilder()
-        self.llm = groq.get_model()
+        self.llm = groq.get_cached_model("QuestionIntakeAgent")
 
     def download_pdf(self, url):
         # Ensure Cloudinary serves the PDF correctly as a raw file
@@ -21,11 +23,8 @@ class QuestionIntakeAgent:
         raise Exception(f"Failed to download Question PDF: {url}")
 
     def extract_text(self, pdf_bytes):
-        text = ""
-        with fitz.open(stream=pdf_bytes, filetype="pdf") as pdf:
-            for page in pdf:
-                text += page.get_text()
-        return text.strip()
+        # Question papers run longer than resumes; allow more pages before cutting off
+        return extract_text_from_pdf_bytes(pdf_bytes, max_pages=QUESTION_PDF_MAX_PAGES)
 
     def safe_json_parse(self, response_text):
         try:
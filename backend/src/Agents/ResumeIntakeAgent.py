@@ -1,20 +1,58 @@
-import fitz
 import json
+import os
 import requests
-from datetime import datetime
+from collections import Counter
+from concurrent.futures import ThreadPoolExecutor, as_completed
 from bson import ObjectId
+from pymongo import UpdateOne
 from src.LLM.Groq import GroqLLM
 from src.Prompts.PromptBuilder import PromptBuilder
 from src.Utils.Database import db
+from src.Utils.DriveStats import candidate_counters, counter_delta, inc_drive_stats
+from src.Utils.PdfTextExtractor import extract_text_from_pdf_bytes
 from src.Model.Candidate import create_candidate
 from src.Model.DriveCandidate import create_drive_candidate, initialize_candidate_rounds
 
 groq = GroqLLM()
 
+# Bounded concurrency for bulk extraction; override per deployment via env.
+# Provider rate limits are enforced by the shared LLM gateway.
+RESUME_INTAKE_MAX_WORKERS = int(os.getenv("RESUME_INTAKE_MAX_WORKERS", "8"))
+
+EXTRACTION_SYSTEM_PROMPT = """
+    You are a Resume Information Extraction Agent.
+    Your task is to carefully extract structured candidate details
+    from raw resume text.
+
+    Extraction Rules:
+    - Extract the full candidate name exactly as written in the resume header or first lines.
+    - Extract the primary email address in valid format (local@domain).
+    * Ignore prefixes/symbols around emails (like 'R username@gmail.com' -> 'username@gmail.com').
+    * If multiple emails, choose the personal Gmail/Outlook one.
+    - Keep the full resume content as a plain text string with the following processing:
+    * Remove any special or non-printable characters such as unusual symbols (for example: '↕', 'ï').
+    * Keep standard punctuation, letters, numbers, and common formatting like newlines.
+    * Escape double quotes inside the text.
+    * Ensure the text is clean and free from characters that can break JSON parsing.
+
+    Output format:
+    - Return ONLY valid JSON.
+    - Use exactly this schema:
+    {
+        "name": "string",
+        "email": "string",
+        "resume_content": "string"
+    }
+    - Do not add or remove keys.
+    - Do not include markdown, comments, or explanations.
+    - If the output is not valid JSON, regenerate until it is valid JSON.
+"""
+
 class ResumeIntakeAgent:
-    def __init__(self):
+    def __init__(self, max_workers=None):
         self.prompt_builder = PromptBuilder()
-        self.llm = groq.get_model()
+        self.llm = groq.get_cached_model("ResumeIntakeAgent")
+        self.max_workers = max_workers or RESUME_INTAKE_MAX_WORKERS
 
     def download_pdf(self, url):
     # Ensure PDF is served correctly as raw file
@@ -30,11 +68,7 @@ class ResumeIntakeAgent:
 
     def extract_text(self, pdf_bytes):
         """Extract readable text from PDF bytes"""
-        text = ""
-        with fitz.open(stream=pdf_bytes, filetype="pdf") as pdf:
-            for page in pdf:
-                text += page.get_text()
-        return text.strip()
+        return extract_text_from_pdf_bytes(pdf_bytes)
 
 
     def safe_json_parse(self, response_text):
@@ -64,142 +98,162 @@ class ResumeIntakeAgent:
 
 
 
-    def process_resumes(self, resume_data, drive_id):
-        candidates = []
-
-        system_prompt = """
-            You are a Resume Information Extraction Agent.
-            Your task is to carefully extract structured candidate details
-            from raw resume text.
-
-            Extraction Rules:
-            - Extract the full candidate name exactly as written in the resume header or first lines.
-            - Extract the primary email address in valid format (local@domain).
-            * Ignore prefixes/symbols around emails (like 'R username@gmail.com' -> 'username@gmail.com').
-            * If multiple emails, choose the personal Gmail/Outlook one.
-            - Keep the full resume content as a plain text string with the following processing:
-            * Remove any special or non-printable characters such as unusual symbols (for example: '↕', 'ï').
-            * Keep standard punctuation, letters, numbers, and common formatting like newlines.
-            * Escape double quotes inside the text.
-            * Ensure the text is clean and free from characters that can break JSON parsing.
-
-            Output format:
-            - Return ONLY valid JSON.
-            - Use exactly this schema:
-            {
-                "name": "string",
-                "email": "string",
-                "resume_content": "string"
+    def _normalize_item(self, item):
+        """Resolve one upload entry (dict from the upload controller or legacy URL) into text + metadata."""
+        # Handle both dictionary (new) and string (old) inputs
+        if isinstance(item, dict):
+            print(f"Processing resume from provided text: {item.get('url')}")
+            return {
+                "resume_url": item.get("url"),
+                "raw_text": item.get("text"),
+                "public_id": item.get("public_id"),
+                "version": item.get("version"),
+                "format": item.get("format"),
+                "resource_type": item.get("resource_type"),
             }
-            - Do not add or remove keys.
-            - Do not include markdown, comments, or explanations.
-            - If the output is not valid JSON, regenerate until it is valid JSON.
+
+        print(f"Processing resume from Cloudinary URL (legacy mode): {item}")
+        pdf_bytes = self.download_pdf(item)
+        return {
+            "resume_url": item,
+            "raw_text": self.extract_text(pdf_bytes),
+            "public_id": None,
+            "version": None,
+            "format": None,
+            "resource_type": "image",  # Assumption for legacy URLs
+        }
+
+    def _extract_candidate(self, item):
+        """
+        Run the LLM extraction for a single resume.
+        Executed on a worker thread; performs no database writes.
         """
+        resume = self._normalize_item(item)
+        resume_url = resume["resume_url"]
+
+        human_prompt = f"Extract candidate information:\n\n{resume['raw_text']}"
+        messages = self.prompt_builder.build(EXTRACTION_SYSTEM_PROMPT, human_prompt)
+        response = self.llm.invoke(messages)
+
+        # Try parsing JSON safely
+        llm_output = self.safe_json_parse(response.content)
+
+        # If parsing fails, retry once with a repair prompt
+        if not llm_output:
+            print(f"❌ Invalid JSON returned for: {resume_url}. Retrying with repair prompt...")
+            repair_prompt = f"""
+            The following text is invalid JSON. Fix it so it becomes valid JSON only:
+
+            {response.content}
+            """
+            repair_messages = self.prompt_builder.build(EXTRACTION_SYSTEM_PROMPT, repair_prompt)
+            repair_response = self.llm.invoke(repair_messages)
+            llm_output = self.safe_json_parse(repair_response.content)
+
+        if not llm_output:
+            raise ValueError("Could not parse JSON even after repair")
+
+        if not llm_output.get("email"):
+            raise ValueError("No email address found in resume")
+
+        # Build candidate data
+        return create_candidate(
+            name=llm_output.get("name", ""),
+            email=llm_output["email"],
+            resume_content=llm_output.get("resume_content", ""),
+            resume_url=resume_url,                      # ✅ Store Cloudinary PDF link
+            public_id=resume["public_id"],              # ✅ Store Cloudinary public_id
+            version=resume["version"],                  # ✅ Store Cloudinary version
+            format=resume["format"],                    # ✅ Store Cloudinary format
+            resource_type=resume["resource_type"]       # ✅ Store Cloudinary resource_type
+        )
+
+    def _load_drive_rounds(self, drive_id):
+        """Fetch the drive once per batch and build the initial rounds_status template."""
+        drive_rounds = []
+        try:
+            drive_doc = db.drives.find_one({"_id": ObjectId(drive_id)}, {"rounds": 1, "stages": 1})
+            if drive_doc:
+                # prefer explicit 'rounds' field, fallback to 'stages'
+                drive_rounds = drive_doc.get("rounds") or drive_doc.get("stages") or []
+        except Exception:
+            drive_rounds = []
 
-        for item in resume_data:
-            # Handle both dictionary (new) and string (old) inputs
-            public_id = None
-            version = None
-            format_type = None
-            if isinstance(item, dict):
-                resume_url = item.get("url")
-                raw_text = item.get("text")
-                public_id = item.get("public_id")
-                version = item.get("version")
-                format_type = item.get("format")
-                resource_type = item.get("resource_type")
-                print(f"Processing resume from provided text: {resume_url}")
+        # Normalize drive_rounds into list of dicts with 'type'
+        normalized_drive_rounds = []
+        if isinstance(drive_rounds, list) and drive_rounds:
+            if all(isinstance(x, str) for x in drive_rounds):
+                normalized_drive_rounds = [{"type": x} for x in drive_rounds]
             else:
-                resume_url = item
-                print(f"Processing resume from Cloudinary URL (legacy mode): {resume_url}")
-                pdf_bytes = self.download_pdf(resume_url)
-                raw_text = self.extract_text(pdf_bytes)
-                public_id = None
-                version = None
-                format_type = None
-                resource_type = "image"  # Assumption for legacy URLs
-
-            human_prompt = f"Extract candidate information:\n\n{raw_text}"
-            messages = self.prompt_builder.build(system_prompt, human_prompt)
-            response = self.llm.invoke(messages)
-            # print("LLM Response :", response.content)
-
-            # Try parsing JSON safely
-            llm_output = self.safe_json_parse(response.content)
-
-            # If parsing fails, retry once with a repair prompt
-            if not llm_output:
-                print(f"❌ Invalid JSON returned for: {resume_url}. Retrying with repair prompt...")
-                repair_prompt = f"""
-                The following text is invalid JSON. Fix it so it becomes valid JSON only:
-
-                {response.content}
-                """
-                repair_messages = self.prompt_builder.build(system_prompt, repair_prompt)
-                repair_response = self.llm.invoke(repair_messages)
-                llm_output = self.safe_json_parse(repair_response.content)
-
-            if not llm_output:
-                print(f"❌ Could not parse JSON even after repair for: {resume_url}")
-                continue
-
-            # Build candidate data
-            candidate_data = create_candidate(
-                name=llm_output["name"],
-                email=llm_output["email"],
-                resume_content=llm_output["resume_content"],
-                resume_url=resume_url,    # ✅ Store Cloudinary PDF link
-                public_id=public_id,       # ✅ Store Cloudinary public_id
-                version=version,           # ✅ Store Cloudinary version
-                format=format_type,        # ✅ Store Cloudinary format
-                resource_type=resource_type # ✅ Store Cloudinary resource_type
-            )
+                for r in drive_rounds:
+                    if isinstance(r, dict):
+                        if "type" in r:
+                            normalized_drive_rounds.append({"type": r.get("type")})
+                        elif "name" in r:
+                            normalized_drive_rounds.append({"type": r.get("name")})
+                        else:
+                            normalized_drive_rounds.append({"type": str(r)})
+                    else:
+                        normalized_drive_rounds.append({"type": str(r)})
 
-            # Preserve created_at if candidate already exists
-            existing = db.candidates.find_one({"email": candidate_data["email"]})
-            if existing:
-                candidate_data["created_at"] = existing["created_at"]
-            else:
-                candidate_data["created_at"] = datetime.utcnow()
+        return normalized_drive_rounds
 
-            # Save candidate
-            db.candidates.update_one(
-                {"email": candidate_data["email"]},
-                {"$set": candidate_data},
+    def _save_candidates(self, candidates, drive_id):
+        """
+        Persist a batch of extracted candidates with two bulk upserts
+        (candidates, then drive_candidates) and one id lookup in between.
+        Mutates each candidate dict in place with its stored candidate_id.
+        """
+        # Last occurrence wins when the same email appears twice in one batch,
+        # matching the previous one-by-one upsert behaviour.
+        by_email = {}
+        for candidate_data in candidates:
+            by_email[candidate_data["email"]] = candidate_data
+
+        candidate_ops = []
+        for email, candidate_data in by_email.items():
+            fields = {k: v for k, v in candidate_data.items() if k != "created_at"}
+            candidate_ops.append(UpdateOne(
+                {"email": email},
+                {
+                    "$set": fields,
+                    # Preserve created_at if candidate already exists
+                    "$setOnInsert": {"created_at": candidate_data["created_at"]}
+                },
                 upsert=True
+            ))
+        if candidate_ops:
+            db.candidates.bulk_write(candidate_ops, ordered=False)
+
+        # Fetch stored candidate IDs (and original created_at) in one query
+        stored = {
+            doc["email"]: doc
+            for doc in db.candidates.find(
+                {"email": {"$in": list(by_email.keys())}},
+                {"_id": 1, "email": 1, "created_at": 1}
             )
+        }
+
+        # Create drive-candidate entries using the rounds loaded once for this drive
+        normalized_drive_rounds = self._load_drive_rounds(drive_id)
+
+        # Current state of any re-uploaded candidates, so the drive_stats delta is exact
+        candidate_ids = [str(stored[c["email"]]["_id"]) for c in candidates]
+        existing = {
+            doc["candidate_id"]: doc
+            for doc in db.drive_candidates.find(
+                {"drive_id": drive_id, "candidate_id": {"$in": candidate_ids}},
+                {"candidate_id": 1, "resume_shortlisted": 1, "email_sent": 1, "selected": 1,
+                 "rounds_status.scheduled": 1, "rounds_status.completed": 1, "rounds_status.result": 1}
+            )
+        }
 
-            # Fetch stored candidate ID
-            stored = db.candidates.find_one({"email": candidate_data["email"]})
-            candidate_data["candidate_id"] = str(stored["_id"])
-
-            # Create drive-candidate entry
-            # Fetch drive to initialize rounds_status from drive definition
-            drive_rounds = []
-            try:
-                drive_doc = db.drives.find_one({"_id": ObjectId(drive_id)})
-                if drive_doc:
-                    # prefer explicit 'rounds' field, fallback to 'stages'
-                    drive_rounds = drive_doc.get("rounds") or drive_doc.get("stages") or []
-            except Exception:
-                drive_rounds = []
-
-            # Normalize drive_rounds into list of dicts with 'type'
-            normalized_drive_rounds = []
-            if isinstance(drive_rounds, list) and drive_rounds:
-                if all(isinstance(x, str) for x in drive_rounds):
-                    normalized_drive_rounds = [{"type": x} for x in drive_rounds]
-                else:
-                    for r in drive_rounds:
-                        if isinstance(r, dict):
-                            if "type" in r:
-                                normalized_drive_rounds.append({"type": r.get("type")})
-                            elif "name" in r:
-                                normalized_drive_rounds.append({"type": r.get("name")})
-                            else:
-                                normalized_drive_rounds.append({"type": str(r)})
-                        else:
-                            normalized_drive_rounds.append({"type": str(r)})
+        drive_candidate_ops = []
+        stats_deltas = Counter()
+        for candidate_data in candidates:
+            stored_doc = stored[candidate_data["email"]]
+            candidate_data["candidate_id"] = str(stored_doc["_id"])
+            candidate_data["created_at"] = stored_doc.get("created_at", candidate_data["created_at"])
 
             rounds_status = None
             if normalized_drive_rounds:
@@ -209,13 +263,71 @@ class ResumeIntakeAgent:
                     rounds_status = None
 
             drive_entry = create_drive_candidate(candidate_id=candidate_data["candidate_id"], drive_id=drive_id, rounds_status=rounds_status)
-            db.drive_candidates.update_one(
+            drive_candidate_ops.append(UpdateOne(
                 {"candidate_id": candidate_data["candidate_id"], "drive_id": drive_id},
                 {"$set": drive_entry},
                 upsert=True
-            )
+            ))
+            stats_deltas.update(counter_delta(
+                candidate_counters(existing.get(candidate_data["candidate_id"])),
+                candidate_counters(drive_entry)
+            ))
+            # A duplicate email later in the batch overwrites this entry
+            existing[candidate_data["candidate_id"]] = drive_entry
+        if drive_candidate_ops:
+            db.drive_candidates.bulk_write(drive_candidate_ops, ordered=False)
+            inc_drive_stats(drive_id, stats_deltas)
 
-            candidates.append(candidate_data)
+    def process_resumes(self, resume_data, drive_id):
+        """
+        Extract and store every resume in a bulk upload.
 
-        return candidates
+        LLM extraction runs on a bounded thread pool (self.max_workers) through the
+        shared LLM gateway, which applies the Groq rate limits; database writes
+        happen afterwards in bulk.
+        Returns one result per input item, in input order:
+            {"index", "resume_url", "status": "success" | "failed", "candidate", "error"}
+        """
+        resume_data = list(resume_data)
+        results = [None] * len(resume_data)
 
+        with ThreadPoolExecutor(max_workers=self.max_workers) as executor:
+            futures = {
+                executor.submit(self._extract_candidate, item): idx
+                for idx, item in enumerate(resume_data)
+            }
+            for future in as_completed(futures):
+                idx = futures[future]
+                item = resume_data[idx]
+                resume_url = item.get("url") if isinstance(item, dict) else item
+                try:
+                    candidate_data = future.result()
+                    results[idx] = {
+                        "index": idx,
+                        "resume_url": resume_url,
+                        "status": "success",
+                        "candidate": candidate_data,
+                        "error": None
+                    }
+                except Exception as e:
+                    print(f"❌ Failed to extract resume {resume_url}: {e}")
+                    results[idx] = {
+                        "index": idx,
+                        "resume_url": resume_url,
+                        "status": "failed",
+                        "candidate": None,
+                        "error": str(e)
+                    }
+
+        extracted = [r["candidate"] for r in results if r["status"] == "success"]
+        if extracted:
+            try:
+                self._save_candidates(extracted, drive_id)
+            except Exception as e:
+                print(f"❌ Failed to save extracted candidates: {e}")
+                for r in results:
+                    if r["status"] == "success":
+                        r.update(status="failed", candidate=None, error=f"Database write failed: {e}")
+
+        print(f"Processed {len(resume_data)} resumes: {len(extracted)} extracted, {len(resume_data) - len(extracted)} failed")
+        return results
@@ -1,48 +1,47 @@
 import json
+import os
+from collections import Counter, defaultdict
 from datetime import datetime
 
 from bson import ObjectId
+from pymongo import UpdateOne
+from src.LLM.Cache import cached_model
 from src.LLM.Groq import GroqLLM
 from src.Prompts.PromptBuilder import PromptBuilder
 from src.Utils.Database import db  # Import the database
+from src.Utils.DriveStats import candidate_counters, counter_delta, inc_drive_stats
+
+# Resumes packed into one scoring request, bounded by a character budget so
+# large resumes do not overflow the model context.
+SHORTLIST_BATCH_SIZE = int(os.getenv("SHORTLIST_BATCH_SIZE", "5"))
+SHORTLIST_BATCH_MAX_CHARS = int(os.getenv("SHORTLIST_BATCH_MAX_CHARS", "24000"))
 
-groq = GroqLLM()
 
 class ResumeShortlistingAgent:
-    def __init__(self):
+    def __init__(self, llm=None, batch_size=None, batch_max_chars=None):
         self.prompt_builder = PromptBuilder()
-        self.llm = groq.get_model()
-
-    def shortlist_candidates(self, candidates, keywords, job_role):
-        """
-        Takes extracted candidate info, keywords list, and job role.
-        Returns shortlisted and not_shortlisted lists.
-        Also updates the shortlist status and resume score in the database.
-        """
-        # print("ShortlistingAgent called with candidates")
-        # print("Number of candidates to process:", len(candidates))
-        # print("Keywords:", keywords)
-        # print("Job Role:", job_role)
+        self.llm = cached_model(llm, "ResumeShortlistingAgent") if llm else GroqLLM().get_cached_model("ResumeShortlistingAgent")
+        self.batch_size = batch_size or SHORTLIST_BATCH_SIZE
+        self.batch_max_chars = batch_max_chars or SHORTLIST_BATCH_MAX_CHARS
 
-        shortlisted = []
-        not_shortlisted = []
-
-        system_prompt = f"""
+    def _build_system_prompt(self, keywords, job_role):
+        return f"""
         You are an intelligent Resume Screening Agent.
 
         Job Role: {job_role}
         Required Skills/Keywords: {keywords}
 
         You will receive:
-        1. The candidate's resume text.
+        1. One or more candidate resumes. Each resume starts with a line "ID: <id>" followed by "RESUME:" and the resume text.
 
         Your task:
-        - Assess how well the candidate fits the {job_role} role, even if skill names or job titles are worded differently.
+        - Assess how well each candidate fits the {job_role} role, even if skill names or job titles are worded differently.
         - Recognize synonyms, related tools, frameworks, and transferable skills.
         - Give more weight to core role-specific skills and relevant work experience than to exact keyword matches.
         - Account for abbreviations, alternative names, and related technologies.
         - Consider potential to learn quickly if experience is similar but not exact.
         - Check that the resume includes at least 2 projects.
+        - Evaluate every resume independently of the others.
 
         Scoring:
         1. Assign a match score between 0 and 100 based on overall fit.
@@ -53,43 +52,141 @@ class ResumeShortlistingAgent:
 
         Output format:
         Do not return any explanations or additional text.
-        **Must** return ONLY a valid JSON object:
+        **Must** return ONLY a valid JSON object with one entry per resume, using the exact IDs given:
         {{
-            "shortlisted": "yes" or "no",
-            "score": <number between 0 and 100>
+            "results": [
+                {{
+                    "id": "<id>",
+                    "shortlisted": "yes" or "no",
+                    "score": <number between 0 and 100>
+                }}
+            ]
         }}
 
         Do NOT wrap the response in code blocks or markdown. Return ONLY the raw JSON object.
         """
-        
-        # print("here..........")
-        for candidate in candidates:
 
-            # here first we need to fetch the resume content from candidate
-            # from the drivecandidate first get the candidate id then form candidate fetch the resume content
-            candidate_id = candidate.get("candidate_id")
-            candidate_data = db.candidates.find_one({"_id": ObjectId(candidate_id)})
-            resume_content = candidate_data.get("resume_content", "")
+    def _make_batches(self, items):
+        """Greedily pack (id, resume_content) pairs by count and character budget."""
+        batches = []
+        current = []
+        current_chars = 0
+        for item in items:
+            size = len(item[1])
+            if current and (len(current) >= self.batch_size or current_chars + size > self.batch_max_chars):
+                batches.append(current)
+                current = []
+                current_chars = 0
+            current.append(item)
+            current_chars += size
+        if current:
+            batches.append(current)
+        return batches
+
+    def _parse_results(self, response_text, default_id=None):
+        """
+        Parse the batch response into {id: {"shortlisted", "score"}}; returns {} on bad JSON.
+        default_id is used for a bare result object that carries no "id" (single-resume requests).
+        """
+        cleaned = response_text.strip()
+        if cleaned.startswith("```"):
+            cleaned = cleaned.strip("`").replace("json", "", 1)
+
+        start = cleaned.find("{")
+        end = cleaned.rfind("}")
+        if start != -1 and end != -1:
+            cleaned = cleaned[start:end+1]
+
+        try:
+            llm_output = json.loads(cleaned)
+        except json.JSONDecodeError:
+            return {}
+
+        # A single-resume request may come back as a bare result object
+        entries = llm_output.get("results") if isinstance(llm_output, dict) and "results" in llm_output else [llm_output]
+
+        parsed = {}
+        for entry in entries or []:
+            if not isinstance(entry, dict):
+                continue
+            entry_id = entry.get("id", default_id)
+            if entry_id is not None:
+                parsed[str(entry_id)] = entry
+        return parsed
+
+    def _score_batch(self, system_prompt, batch):
+        """Score a batch in one request. Items missing from the reply are retried one at a time."""
+        human_prompt = "\n\n".join(
+            f"ID: {item_id}\nRESUME:\n{resume_content}" for item_id, resume_content in batch
+        )
+        human_prompt += (
+            "\n\nBased on these resumes, determine whether each candidate is a suitable match for the job role "
+            "and required skills. Provide the match score and shortlist decision for every ID."
+        )
+
+        messages = self.prompt_builder.build(system_prompt, human_prompt)
+        response = self.llm.invoke(messages)
+        scores = self._parse_results(response.content, default_id=batch[0][0] if len(batch) == 1 else None)
+
+        missing = [item for item in batch if item[0] not in scores]
+        if missing and len(batch) > 1:
+            print(f"Batch response missing {len(missing)} of {len(batch)} IDs, retrying individually")
+            for item in missing:
+                scores.update(self._score_batch(system_prompt, [item]))
+        elif missing:
+            print(f"Invalid JSON for {missing[0][0]}:\n", response.content)
+
+        return scores
+
+    def shortlist_candidates(self, candidates, keywords, job_role):
+        """
+        Takes extracted candidate info, keywords list, and job role.
+        Returns shortlisted and not_shortlisted lists.
+        Also updates the shortlist status and resume score in the database.
+
+        Resumes are fetched with one $in query, scored several per LLM request,
+        and the results are committed with a single bulk_write.
+        """
+        shortlisted = []
+        not_shortlisted = []
+
+        system_prompt = self._build_system_prompt(keywords, job_role)
 
-            human_prompt = (
-                f"Here is the candidate's resume content:\n{resume_content}\n\n"
-                "Based on this resume, determine if the candidate is a suitable match for the job role and required skills. "
-                "Provide the match score and shortlist decision."
+        # Prefetch all resume contents in one round trip
+        candidate_ids = [ObjectId(c["candidate_id"]) for c in candidates if c.get("candidate_id")]
+        candidate_info_map = {
+            str(doc["_id"]): doc
+            for doc in db.candidates.find(
+                {"_id": {"$in": candidate_ids}},
+                {"name": 1, "email": 1, "resume_content": 1}
             )
+        }
+
+        items = [
+            (cid, candidate_info_map[cid].get("resume_content", ""))
+            for cid in dict.fromkeys(str(c.get("candidate_id")) for c in candidates)
+            if cid in candidate_info_map
+        ]
 
-            messages = self.prompt_builder.build(system_prompt, human_prompt)
-            response = self.llm.invoke(messages)
+        scores = {}
+        for batch in self._make_batches(items):
+            scores.update(self._score_batch(system_prompt, batch))
 
-            try:
-                llm_output = json.loads(response.content.strip())
-                # print("Shortlisting Agent:", llm_output)
-            except json.JSONDecodeError:
-                print(f"Invalid JSON for {candidate.get('resume', 'unknown')}:\n", response.content)
+        operations = []
+        stats_deltas = defaultdict(Counter)
+        for candidate in candidates:
+            candidate_id = str(candidate.get("candidate_id"))
+            candidate_data = candidate_info_map.get(candidate_id)
+            llm_output = scores.get(candidate_id)
+
+            if not candidate_data or not llm_output:
+                print(f"Could not score candidate {candidate_id}, skipping")
                 continue
 
-            shortlist_status = llm_output.get("shortlisted", "").lower()
+            shortlist_status = str(llm_output.get("shortlisted", "")).lower()
             resume_score = llm_output.get("score", 0)  # Extract the score
-            
+            new_status = "yes" if shortlist_status == "yes" else "no"
+
             result = {
                 "resume": candidate_data.get("resume_content", ""),
                 "name": candidate_data.get("name", ""),
@@ -98,24 +195,30 @@ class ResumeShortlistingAgent:
             }
 
             # Update the shortlist status and resume score in the database
-            db.drive_candidates.update_one(
+            operations.append(UpdateOne(
                 {"_id": candidate.get("_id")},
                 {"$set": {
-                    "resume_shortlisted": "yes" if shortlist_status == "yes" else "no",
+                    "resume_shortlisted": new_status,
                     "resume_score": resume_score,  # Store the resume score
                     "updated_at": datetime.utcnow()
                 }}
-            )
+            ))
+            stats_deltas[candidate.get("drive_id")].update(counter_delta(
+                candidate_counters(candidate),
+                candidate_counters({**candidate, "resume_shortlisted": new_status})
+            ))
 
             if shortlist_status == "yes":
                 shortlisted.append(result)
             else:
                 not_shortlisted.append(result)
 
-        # print("shortlisted", len(shortlisted))
-        # print("not_shortlisted", len(not_shortlisted))
+        if operations:
+            db.drive_candidates.bulk_write(operations, ordered=False)
+            for drive_id, deltas in stats_deltas.items():
+                inc_drive_stats(drive_id, deltas)
 
         return {
             "shortlisted": shortlisted,
             "not_shortlisted": not_shortlisted
-        }
\ No newline at end of file
+        }
@@ -6,6 +6,7 @@ from datetime import datetime
 
 # Assuming you have database access
 from src.Utils.Database import db
+from src.CodingAssessment.Utils.execution_cache import invalidate_question
 
 def get_all_problems(drive_id=None):
     """
@@ -159,6 +160,9 @@ def update_problem(problem_id, data):
         
         if result.matched_count == 0:
             return {"error": "Problem not found", "status": 404}
+
+        if 'test_cases' in update_data:
+            invalidate_question(problem_id)
         
         return {"message": "Problem updated successfully", "status": 200}
         
@@ -182,6 +186,8 @@ def delete_problem(problem_id):
         
         if result.deleted_count == 0:
             return {"error": "Problem not found", "status": 404}
+
+        invalidate_question(problem_id)
         
         return {"message": "Problem deleted successfully", "status": 200}
         
@@ -10,13 +10,24 @@ from src.Model.Submission import (
     format_submission_response,
     get_language_id,
     determine_submission_result,
+    submission_totals_pipeline,
     SubmissionStatus,
     SubmissionResult,
-    ProgrammingLanguage
+    ProgrammingLanguage,
+    LEADERBOARD_SORT
 )
 from src.Utils.Database import db
 from datetime import datetime
-from src.CodingAssessment.Utils.judge0_client import submit_and_wait
+from pymongo import ReturnDocument
+from src.CodingAssessment.Utils.execution_backend import get_execution_backend
+from src.CodingAssessment.Utils.execution_cache import run_batch_cached, get_execution_cache_stats
+from src.CodingAssessment.Utils.code_run_service import (
+    CODE_EVAL_STREAM_CHUNK,
+    CODE_RUN_EVENT,
+    enqueue_code_run,
+    get_code_run,
+    get_code_eval_metrics
+)
 
 
 def create_submission_controller():
@@ -99,6 +110,8 @@ def submit_question_controller():
     Submit a single question for evaluation.
     This is called when user clicks "Run Code" button.
     Creates submission if it doesn't exist.
+    Evaluation is queued; the response carries the run id whose results are
+    streamed over Socket.IO (code_run_update) and served by get_code_run_controller.
     """
     try:
         data = request.get_json()
@@ -109,6 +122,7 @@ def submit_question_controller():
         source_code = data.get("source_code")
         language = data.get("language")
         time_taken = data.get("time_taken", 0)
+        early_exit = bool(data.get("early_exit", False))
         
         # Validation
         
@@ -225,16 +239,26 @@ def submit_question_controller():
                 {"$push": {"question_submissions": question_sub}}
             )
         
-        # Run the submission with proper test cases
-        result = run_submission(
-            code=source_code,
-            language_id=language_id,
+        # Queue the evaluation; test cases are loaded again by the worker
+        run_id = enqueue_code_run(
             submission_id=submission_id,
+            candidate_id=candidate_id,
+            drive_id=drive_id,
             question_id=question_id,
-            test_cases=test_cases  # Pass test cases here
+            source_code=source_code,
+            language_id=language_id,
+            total_test_cases=total_test_cases,
+            early_exit=early_exit
         )
         
-        return jsonify(result), 200
+        return jsonify({
+            "status": "queued",
+            "run_id": run_id,
+            "submission_id": submission_id,
+            "total_test_cases": total_test_cases,
+            "early_exit": early_exit,
+            "socket_event": CODE_RUN_EVENT
+        }), 202
         
     except ValueError as e:
         return jsonify({"error": str(e)}), 400
@@ -245,10 +269,16 @@ def submit_question_controller():
         return jsonify({"error": f"Server error: {str(e)}"}), 500
     
     
-def run_submission(code, language_id, submission_id, question_id, test_cases):
+def run_submission(code, language_id, submission_id, question_id, test_cases, drive_id=None,
+                   on_result=None, early_exit=False):
     """
     Run code submission against test cases and update database.
     Includes security masking for private test cases.
+    Unchanged code is answered from the execution cache (hits counted per drive_id).
+
+    on_result(res_obj) is called with each (masked) test case result as soon as
+    its chunk finishes. With early_exit, public test cases run first, one at a
+    time, and the remaining test cases are skipped after the first failure.
     """
     try:
         # 1. Mark the specific question as RUNNING in the database
@@ -260,92 +290,140 @@ def run_submission(code, language_id, submission_id, question_id, test_cases):
             }}
         )
         
-        results = []
+        results_by_index = {}
         test_cases_passed = 0
         total_test_cases = len(test_cases)
         total_execution_time = 0
         max_memory_used = 0
         error_messages = []
+
+        def record(res_obj):
+            results_by_index[res_obj["test_case_number"] - 1] = res_obj
+            if on_result:
+                on_result(res_obj)
         
-        # 2. Iterate through test cases
+        # 2. Normalize test cases
+        prepared = []
         for idx, tc in enumerate(test_cases):
             # Normalize keys (handles variations in DB schema)
             tc_input = tc.get("input") or tc.get("stdin") or ""
             expected_output = tc.get("output") or tc.get("expected_output") or tc.get("stdout") or ""
-            is_private = tc.get("type") == "private"
-            
+
             # Ensure values are strings and stripped of trailing whitespace
-            tc_input = str(tc_input)
-            expected_output = str(expected_output).strip()
+            prepared.append((idx, tc, str(tc_input), str(expected_output).strip()))
 
-            # Logic check: If no expected output, we can't grade it
+        # Logic check: If no expected output, we can't grade it
+        for idx, tc, _, expected_output in prepared:
             if not expected_output:
-                res_obj = {
+                record({
                     "test_case_number": idx + 1,
                     "status": {"id": -1, "description": "Invalid Test Case"},
                     "result": SubmissionResult.ERROR,
                     "type": tc.get("type", "public")
-                }
-                results.append(res_obj)
+                })
+
+        # 3. Group gradable test cases into execution chunks. A plain run sends all of
+        # them as one batch; streaming runs use smaller chunks so results arrive early.
+        gradable = [p for p in prepared if p[3]]
+        if early_exit:
+            public = [p for p in gradable if p[1].get("type") != "private"]
+            private = [p for p in gradable if p[1].get("type") == "private"]
+            chunks = [[p] for p in public]
+            chunks += [private[i:i + CODE_EVAL_STREAM_CHUNK] for i in range(0, len(private), CODE_EVAL_STREAM_CHUNK)]
+        elif on_result:
+            chunks = [gradable[i:i + CODE_EVAL_STREAM_CHUNK] for i in range(0, len(gradable), CODE_EVAL_STREAM_CHUNK)]
+        else:
+            chunks = [gradable] if gradable else []
+
+        stopped_at = None
+        for chunk in chunks:
+            if stopped_at is not None:
+                for idx, tc, _, _ in chunk:
+                    record({
+                        "test_case_number": idx + 1,
+                        "status": {"id": -2, "description": f"Skipped (test case {stopped_at} failed)"},
+                        "result": SubmissionResult.SKIPPED,
+                        "type": tc.get("type", "public")
+                    })
                 continue
 
             try:
-                # 3. Submit to Judge0
-                judge0_response = submit_and_wait(
-                    source_code=code,
-                    language_id=language_id,
-                    stdin=tc_input
-                )
-                
-                # Extract results from Judge0 response
-                actual_output = str(judge0_response.get("stdout") or "").strip()
-                judge0_status = judge0_response.get("status", {})
-                
-                # 4. Determine if the test case passed
-                # This function handles status checking and string comparison
-                result_status = determine_submission_result(
-                    judge0_status,
-                    expected_output,
-                    actual_output
+                judge0_responses = run_batch_cached(
+                    get_execution_backend(),
+                    [
+                        {"source_code": code, "language_id": language_id, "stdin": tc_input}
+                        for _, _, tc_input, _ in chunk
+                    ],
+                    drive_id=drive_id,
+                    question_id=question_id
                 )
-                
-                if result_status == SubmissionResult.ACCEPTED:
-                    test_cases_passed += 1
-                
-                # Track metrics
-                exec_time = float(judge0_response.get("time") or 0) * 1000 # to ms
-                memory = float(judge0_response.get("memory") or 0) / 1024  # to MB
-                total_execution_time += exec_time
-                max_memory_used = max(max_memory_used, memory)
-
-                # Collect errors for the DB log
-                if judge0_response.get("stderr"):
-                    error_messages.append(f"TC {idx+1} Error: {judge0_response.get('stderr')}")
-
-                # 5. SECURITY MASKING: Mask data before sending to the frontend
-                # We store the real data in 'res_obj' for the DB, but mask it for the 'sanitized' list
-                res_obj = {
-                    "test_case_number": idx + 1,
-                    "status": judge0_status,
-                    "stdin": "[Hidden]" if is_private else tc_input,
-                    "expected": "[Hidden]" if is_private else expected_output,
-                    "stdout": "[Hidden]" if is_private else actual_output,
-                    "stderr": "[Hidden]" if (is_private and judge0_response.get("stderr")) else judge0_response.get("stderr"),
-                    "time": judge0_response.get("time"),
-                    "memory": judge0_response.get("memory"),
-                    "result": result_status,
-                    "type": tc.get("type", "public")
-                }
-                results.append(res_obj)
-                
+                batch_error = None
             except Exception as e:
-                results.append({
-                    "test_case_number": idx + 1,
-                    "status": {"id": -1, "description": "Execution Error"},
-                    "stderr": str(e),
-                    "result": SubmissionResult.ERROR,
-                    "type": tc.get("type", "public")
-                })
+                judge0_responses, batch_error = [], e
+            response_by_index = dict(zip((p[0] for p in chunk), judge0_responses))
+
+            # 4. Grade results in test case order
+            for idx, tc, tc_input, expected_output in chunk:
+                is_private = tc.get("type") == "private"
+
+                try:
+                    if batch_error is not None:
+                        raise batch_error
+                    judge0_response = response_by_index[idx]
+
+                    # Extract results from Judge0 response
+                    actual_output = str(judge0_response.get("stdout") or "").strip()
+                    judge0_status = judge0_response.get("status", {})
+                    
+                    # This function handles status checking and string comparison
+                    result_status = determine_submission_result(
+                        judge0_status,
+                        expected_output,
+                        actual_output
+                    )
+                    
+                    if result_status == SubmissionResult.ACCEPTED:
+                        test_cases_passed += 1
+                    
+                    # Track metrics
+                    exec_time = float(judge0_response.get("time") or 0) * 1000 # to ms
+                    memory = float(judge0_response.get("memory") or 0) / 1024  # to MB
+                    total_execution_time += exec_time
+                    max_memory_used = max(max_memory_used, memory)
+
+                    # Collect errors for the DB log
+                    if judge0_response.get("stderr"):
+                        error_messages.append(f"TC {idx+1} Error: {judge0_response.get('stderr')}")
+
+                    # 5. SECURITY MASKING: Mask data before sending to the frontend
+                    # We store the real data in 'res_obj' for the DB, but mask it for the 'sanitized' list
+                    res_obj = {
+                        "test_case_number": idx + 1,
+                        "status": judge0_status,
+                        "stdin": "[Hidden]" if is_private else tc_input,
+                        "expected": "[Hidden]" if is_private else expected_output,
+                        "stdout": "[Hidden]" if is_private else actual_output,
+                        "stderr": "[Hidden]" if (is_private and judge0_response.get("stderr")) else judge0_response.get("stderr"),
+                        "time": judge0_response.get("time"),
+                        "memory": judge0_response.get("memory"),
+                        "result": result_status,
+                        "type": tc.get("type", "public")
+                    }
+                    
+                except Exception as e:
+                    res_obj = {
+                        "test_case_number": idx + 1,
+                        "status": {"id": -1, "description": "Execution Error"},
+                        "stderr": str(e),
+                        "result": SubmissionResult.ERROR,
+                        "type": tc.get("type", "public")
+                    }
+
+                record(res_obj)
+                if early_exit and not is_private and res_obj["result"] != SubmissionResult.ACCEPTED:
+                    stopped_at = idx + 1
+
+        results = [results_by_index[idx] for idx in sorted(results_by_index)]
 
         # 6. Determine overall result for this question
         if test_cases_passed == total_test_cases:
@@ -353,8 +431,9 @@ def run_submission(code, language_id, submission_id, question_id, test_cases):
         elif test_cases_passed > 0:
             overall_result = SubmissionResult.WRONG_ANSWER
         else:
-            # If no cases passed, use the result of the first failing case
-            overall_result = results[0].get("result") if results else SubmissionResult.ERROR
+            # If no cases passed, use the result of the first failing case that actually ran
+            ran = [r for r in results if r.get("result") != SubmissionResult.SKIPPED]
+            overall_result = ran[0].get("result") if ran else SubmissionResult.ERROR
 
         # 7. Update database with results and metrics
         update_fields = update_question_submission_result(
@@ -413,32 +492,20 @@ def run_submission(code, language_id, submission_id, question_id, test_cases):
 def update_overall_submission(submission_id):
     """
     Update overall submission statistics based on question submissions.
+    Totals are recomputed server-side in one atomic pipeline update, so
+    concurrently finishing questions cannot overwrite each other's totals.
     """
     try:
-        submission = db.submissions.find_one({"_id": ObjectId(submission_id)})
-        if not submission:
-            return
-        
-        question_submissions = submission.get("question_submissions", [])
-        
-        # Calculate statistics
-        stats = calculate_submission_statistics(question_submissions)
-        
-        # Update total time taken (sum of all question time_taken)
-        total_time = sum(qs.get("time_taken", 0) for qs in question_submissions)
-        
-        # Update submission (don't change status to COMPLETED automatically)
-        db.submissions.update_one(
+        submission = db.submissions.find_one_and_update(
             {"_id": ObjectId(submission_id)},
-            {"$set": {
-                "questions_solved": stats["questions_solved"],
-                "score_percentage": stats["score_percentage"],
-                "total_time_taken": total_time,
-                "updated_at": datetime.utcnow()
-            }}
+            submission_totals_pipeline(),
+            projection={"questions_solved": 1, "total_questions": 1, "score_percentage": 1},
+            return_document=ReturnDocument.AFTER
         )
+        if not submission:
+            return
         
-        print(f"Updated submission {submission_id}: {stats['questions_solved']}/{stats['total_questions']} solved ({stats['score_percentage']}%)")
+        print(f"Updated submission {submission_id}: {submission['questions_solved']}/{submission.get('total_questions', 0)} solved ({submission['score_percentage']}%)")
         
     except Exception as e:
         print(f"Error updating overall submission: {str(e)}")
@@ -568,6 +635,138 @@ def get_submissions_by_drive(drive_id):
         return jsonify({"error": f"Server error: {str(e)}"}), 500
 
 
+def _resolve_candidate_names(candidate_ids):
+    """candidate_id -> {"name", "email"} with one query."""
+    object_ids = [ObjectId(cid) for cid in candidate_ids if ObjectId.is_valid(cid)]
+    if not object_ids:
+        return {}
+    return {
+        str(c["_id"]): {"name": c.get("name"), "email": c.get("email")}
+        for c in db.candidates.find({"_id": {"$in": object_ids}}, {"name": 1, "email": 1})
+    }
+
+
+def get_drive_leaderboard(drive_id):
+    """
+    Ranked submissions for a drive, read page by page from the
+    (drive_id, questions_solved, test_cases_passed, total_time_taken) index.
+    Question submissions and test case results are not loaded.
+    Equal scores share a rank.
+    
+    Query params: limit (default 50, max 500), skip (default 0)
+    """
+    try:
+        limit = min(max(request.args.get("limit", 50, type=int), 1), 500)
+        skip = max(request.args.get("skip", 0, type=int), 0)
+        sort_fields = [field for field, _ in LEADERBOARD_SORT]
+
+        rows = list(db.submissions.find(
+            {"drive_id": drive_id},
+            {
+                "candidate_id": 1, "status": 1, "total_questions": 1, "questions_solved": 1,
+                "score_percentage": 1, "test_cases_passed": 1, "total_time_taken": 1, "submitted_at": 1
+            }
+        ).sort(LEADERBOARD_SORT).skip(skip).limit(limit))
+
+        # Rank of the first row: 1 + submissions strictly ahead of it (ties keep one rank across pages)
+        rank = skip + 1
+        if rows and skip:
+            first = rows[0]
+            ahead = []
+            for i, (field, direction) in enumerate(LEADERBOARD_SORT):
+                condition = {f: first.get(f, 0) for f in sort_fields[:i]}
+                condition[field] = {"$gt" if direction < 0 else "$lt": first.get(field, 0)}
+                ahead.append(condition)
+            rank = db.submissions.count_documents({"drive_id": drive_id, "$or": ahead}) + 1
+
+        names = _resolve_candidate_names([row.get("candidate_id") for row in rows])
+
+        leaderboard = []
+        previous_key = None
+        for position, row in enumerate(rows):
+            key = tuple(row.get(field, 0) for field in sort_fields)
+            if previous_key is not None and key != previous_key:
+                rank = skip + position + 1
+            previous_key = key
+
+            candidate = names.get(row.get("candidate_id"), {})
+            leaderboard.append({
+                "rank": rank,
+                "submission_id": str(row["_id"]),
+                "candidate_id": row.get("candidate_id"),
+                "candidate_name": candidate.get("name"),
+                "candidate_email": candidate.get("email"),
+                "status": row.get("status"),
+                "questions_solved": row.get("questions_solved", 0),
+                "total_questions": row.get("total_questions", 0),
+                "score_percentage": row.get("score_percentage", 0),
+                "test_cases_passed": row.get("test_cases_passed", 0),
+                "total_time_taken": row.get("total_time_taken", 0),
+                "submitted_at": row["submitted_at"].isoformat() if row.get("submitted_at") else None
+            })
+
+        return jsonify({
+            "message": f"Retrieved {len(leaderboard)} leaderboard entries",
+            "drive_id": drive_id,
+            "leaderboard": leaderboard,
+            "total": db.submissions.count_documents({"drive_id": drive_id}),
+            "skip": skip,
+            "limit": limit
+        }), 200
+        
+    except Exception as e:
+        print(f"Error in get_drive_leaderboard: {str(e)}")
+        return jsonify({"error": f"Server error: {str(e)}"}), 500
+
+
+def get_code_run_controller(run_id):
+    """
+    Current state of a queued "Run Code" evaluation (for clients polling instead of Socket.IO).
+    """
+    try:
+        try:
+            run = get_code_run(run_id)
+        except Exception:
+            return jsonify({"error": "Invalid run ID format"}), 400
+
+        if not run:
+            return jsonify({"error": "Run not found"}), 404
+
+        return jsonify({"run": run}), 200
+
+    except Exception as e:
+        print(f"Error in get_code_run_controller: {str(e)}")
+        return jsonify({"error": f"Server error: {str(e)}"}), 500
+
+
+def get_code_eval_metrics_controller():
+    """
+    Back-pressure metrics of the code evaluation queue.
+    """
+    try:
+        window = request.args.get("window_minutes", type=int)
+        return jsonify({"metrics": get_code_eval_metrics(window)}), 200
+
+    except Exception as e:
+        print(f"Error in get_code_eval_metrics_controller: {str(e)}")
+        return jsonify({"error": f"Server error: {str(e)}"}), 500
+
+
+def get_execution_cache_statistics(drive_id):
+    """
+    Execution cache hit rate and time saved for a drive.
+    """
+    try:
+        return jsonify({
+            "message": "Execution cache statistics retrieved successfully",
+            "statistics": get_execution_cache_stats(drive_id)
+        }), 200
+
+    except Exception as e:
+        print(f"Error in get_execution_cache_statistics: {str(e)}")
+        return jsonify({"error": f"Server error: {str(e)}"}), 500
+
+
 def get_submission_statistics(submission_id):
     """
     Get detailed statistics for a submission.
@@ -579,7 +778,7 @@ def get_submission_statistics(submission_id):
             return jsonify({"error": "Submission not found"}), 404
         
         question_submissions = submission.get("question_submissions", [])
-        stats = calculate_submission_statistics(question_submissions)
+        stats = calculate_submission_statistics(question_submissions, submission.get("total_questions"))
         
         # Add additional statistics
         stats["candidate_id"] = submission.get("candidate_id")
@@ -588,7 +787,6 @@ def get_submission_statistics(submission_id):
         stats["started_at"] = submission.get("started_at").isoformat() if submission.get("started_at") else None
         stats["submitted_at"] = submission.get("submitted_at").isoformat() if submission.get("submitted_at") else None
         stats["problems_attempted"] = len(question_submissions)
-        stats["total_questions"] = submission.get("total_questions", 0)
         # Question-wise breakdown
         question_breakdown = []
         for qs in question_submissions:
@@ -6,7 +6,11 @@ from src.CodingAssessment.Controllers.submission_controller import (
     get_submission_by_id,
     get_submissions_by_candidate,
     get_submissions_by_drive,
-    get_submission_statistics
+    get_submission_statistics,
+    get_execution_cache_statistics,
+    get_code_run_controller,
+    get_code_eval_metrics_controller,
+    get_drive_leaderboard
 )
 
 submission_bp = Blueprint("submission", __name__)
@@ -41,12 +45,37 @@ def submit_question():
         "question_id": "question_789",
         "source_code": "def solution():\n    return 42",
         "language": "python",
-        "time_taken": 120
+        "time_taken": 120,
+        "early_exit": false
     }
+
+    Returns 202 with a run_id. Join it with the Socket.IO event
+    "join_code_run" {"run_id"} to receive "code_run_update" events per test case,
+    or poll GET /runs/<run_id>. early_exit stops after the first failing public test case.
     """
     return submit_question_controller()
 
 
+@submission_bp.get("/runs/<run_id>")
+def get_code_run(run_id):
+    """
+    Get the state and test case results of a queued code run.
+    
+    Example: GET /api/coding-assessment/submission/runs/64b8f0c2e1b1f5a3c4d2e9b7
+    """
+    return get_code_run_controller(run_id)
+
+
+@submission_bp.get("/queue-metrics")
+def get_queue_metrics():
+    """
+    Code evaluation queue depth, wait and run times.
+    
+    Example: GET /api/coding-assessment/submission/queue-metrics?window_minutes=15
+    """
+    return get_code_eval_metrics_controller()
+
+
 @submission_bp.post("/final-submit")
 def final_submit():
     """
@@ -92,6 +121,26 @@ def get_drive_submissions(drive_id):
     return get_submissions_by_drive(drive_id)
 
 
+@submission_bp.get("/drive/<drive_id>/leaderboard")
+def get_leaderboard(drive_id):
+    """
+    Ranked submissions for a drive (solved, then test cases passed, then time).
+    
+    Example: GET /api/submission/drive/64b8f0c2e1b1f5a3c4d2e9b7/leaderboard?limit=50&skip=0
+    """
+    return get_drive_leaderboard(drive_id)
+
+
+@submission_bp.get("/drive/<drive_id>/execution-cache")
+def get_drive_execution_cache(drive_id):
+    """
+    Execution cache hit rate and execution time saved for a drive.
+    
+    Example: GET /api/submission/drive/64b8f0c2e1b1f5a3c4d2e9b7/execution-cache
+    """
+    return get_execution_cache_statistics(drive_id)
+
+
 @submission_bp.get("/<submission_id>/statistics")
 def get_statistics(submission_id):
     """
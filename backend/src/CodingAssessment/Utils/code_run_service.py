@@ -0,0 +1,277 @@
+"""
+Asynchronous code evaluation.
+
+"Run Code" no longer executes inside the HTTP request. submit_question_controller
+records a code_runs document and queues evaluate_code_run_task on the dedicated
+CODE_EVAL_QUEUE Celery queue, then returns the run id straight away. A worker
+claims the run, evaluates it through run_submission() and pushes every test case
+result to the candidate's browser as it completes:
+
+    client -> server  "join_code_run"    {"run_id"}   (joins room code_run:<run_id>)
+    server -> client  "code_run_update"  {"run_id", "type", ...}
+        type: "snapshot" (current state, sent on join), "started",
+              "test_case_result", "completed", "failed"
+
+Workers emit through SOCKETIO_MESSAGE_QUEUE, the same relay pipeline_update uses.
+GET /api/coding-assessment/submission/runs/<run_id> returns the same state for
+clients that poll instead. Without a reachable broker the run is evaluated in a
+background thread of the web process.
+
+Tasks are acked late, so a run whose worker died is redelivered. A RUNNING
+run whose started_at is older than CODE_EVAL_RUN_LEASE_SECONDS counts as
+abandoned: the redelivered task reclaims it and evaluates it again from the
+start, and get_code_eval_metrics() reports it as stale instead of running.
+
+Run the code evaluation workers separately from the email/ingestion workers so
+slow submissions cannot delay them (and vice versa):
+    celery -A celery_app worker -Q code_eval --concurrency 8
+
+get_code_eval_metrics() reports back-pressure: runs waiting and running, the age
+of the oldest waiting run, the broker queue length and wait/run time percentiles
+over the last CODE_EVAL_METRICS_WINDOW_MINUTES.
+
+Configuration (environment):
+- CODE_EVAL_QUEUE:                  Celery queue for evaluate_code_run_task (default "code_eval")
+- CODE_EVAL_STREAM_CHUNK:           test cases executed per streamed chunk (default 4)
+- CODE_EVAL_METRICS_WINDOW_MINUTES: window for wait/run time metrics (default 15)
+- CODE_EVAL_RUN_LEASE_SECONDS:      after this long a RUNNING run may be reclaimed (default 300)
+"""
+
+import os
+from datetime import datetime, timedelta
+
+from bson import ObjectId
+from pymongo import ReturnDocument
+
+from src.Model.CodeRun import CodeRunStatus, create_code_run
+
+CODE_EVAL_QUEUE = os.getenv("CODE_EVAL_QUEUE", "code_eval")
+CODE_EVAL_STREAM_CHUNK = max(1, int(os.getenv("CODE_EVAL_STREAM_CHUNK", "4")))
+CODE_EVAL_METRICS_WINDOW_MINUTES = int(os.getenv("CODE_EVAL_METRICS_WINDOW_MINUTES", "15"))
+CODE_EVAL_RUN_LEASE_SECONDS = int(os.getenv("CODE_EVAL_RUN_LEASE_SECONDS", "300"))
+
+CODE_RUN_EVENT = "code_run_update"
+
+# Fields returned to the candidate; the source code is never echoed back
+_PUBLIC_FIELDS = {
+    "submission_id": 1, "question_id": 1, "status": 1, "early_exit": 1, "total_test_cases": 1,
+    "results": 1, "result": 1, "test_cases_passed": 1, "error": 1,
+    "enqueued_at": 1, "started_at": 1, "completed_at": 1, "wait_ms": 1, "run_ms": 1
+}
+
+
+def code_run_room(run_id):
+    return f"code_run:{run_id}"
+
+
+def _ms_between(start, end):
+    return int((end - start).total_seconds() * 1000)
+
+
+def _serialize(run):
+    run = dict(run)
+    run["run_id"] = str(run.pop("_id"))
+    for field in ("enqueued_at", "started_at", "completed_at"):
+        if run.get(field):
+            run[field] = run[field].isoformat()
+    return run
+
+
+def _emit(run_id, event_type, **payload):
+    from src.SocketIO.SocketIO_Instance import socketio
+    try:
+        socketio.emit(CODE_RUN_EVENT, {"run_id": str(run_id), "type": event_type, **payload},
+                      to=code_run_room(run_id))
+    except Exception as e:
+        # Streaming is best effort; the run document is the source of truth
+        print(f"Could not emit {event_type} for code run {run_id}: {e}")
+
+
+def enqueue_code_run(submission_id, candidate_id, drive_id, question_id, source_code, language_id,
+                     total_test_cases, early_exit=False):
+    """Record a code run and queue it for evaluation. Returns the run id as a string."""
+    from src.Utils.Database import db
+
+    run = create_code_run(submission_id, candidate_id, drive_id, question_id, source_code,
+                          language_id, total_test_cases, early_exit)
+    run_id = str(db.code_runs.insert_one(run).inserted_id)
+
+    try:
+        from src.Tasks.tasks import evaluate_code_run_task
+        task_result = evaluate_code_run_task.apply_async(args=[run_id], queue=CODE_EVAL_QUEUE)
+        print(f"Code run {run_id} queued on '{CODE_EVAL_QUEUE}' with task ID: {task_result.id}")
+    except Exception as e:
+        # No broker reachable (local setup without worker): evaluate in the background
+        from src.SocketIO.SocketIO_Instance import socketio
+        print(f"Could not queue code run {run_id} ({e}); running in background thread")
+        socketio.start_background_task(process_code_run, run_id)
+    return run_id
+
+
+def process_code_run(run_id):
+    """
+    Claim a queued run and evaluate it, streaming test case results.
+    A run claimed within the lease (e.g. a duplicate delivery) is left alone;
+    one whose lease expired (its worker died) is reclaimed and run again.
+    """
+    from src.Utils.Database import db
+    from src.CodingAssessment.Controllers.submission_controller import run_submission
+
+    started_at = datetime.utcnow()
+    lease_expired = started_at - timedelta(seconds=CODE_EVAL_RUN_LEASE_SECONDS)
+    run = db.code_runs.find_one_and_update(
+        {"_id": ObjectId(run_id), "$or": [
+            {"status": CodeRunStatus.QUEUED},
+            {"status": CodeRunStatus.RUNNING, "started_at": {"$lt": lease_expired}}
+        ]},
+        {"$set": {"status": CodeRunStatus.RUNNING, "started_at": started_at, "results": []},
+         "$inc": {"attempts": 1}},
+        return_document=ReturnDocument.AFTER
+    )
+    if not run:
+        print(f"Code run {run_id} is not queued or is still leased; skipping")
+        return {"run_id": run_id, "status": "skipped"}
+    if run["attempts"] > 1:
+        print(f"Code run {run_id} reclaimed after an expired lease (attempt {run['attempts']})")
+
+    wait_ms = _ms_between(run["enqueued_at"], started_at)
+    db.code_runs.update_one({"_id": run["_id"]}, {"$set": {"wait_ms": wait_ms}})
+    _emit(run_id, "started", wait_ms=wait_ms, total_test_cases=run["total_test_cases"])
+
+    completed = []
+
+    def on_result(res_obj):
+        completed.append(res_obj)
+        db.code_runs.update_one({"_id": run["_id"]}, {"$push": {"results": res_obj}})
+        _emit(run_id, "test_case_result", result=res_obj,
+              completed=len(completed), total=run["total_test_cases"])
+
+    try:
+        question = db.coding_questions.find_one({"_id": ObjectId(run["question_id"])}, {"test_cases": 1})
+        if not question:
+            raise ValueError("Coding question not found")
+
+        outcome = run_submission(
+            code=run["source_code"],
+            language_id=run["language_id"],
+            submission_id=run["submission_id"],
+            question_id=run["question_id"],
+            test_cases=question.get("test_cases", []),
+            drive_id=run["drive_id"],
+            on_result=on_result,
+            early_exit=run.get("early_exit", False)
+        )
+        if not outcome.get("success"):
+            raise RuntimeError(outcome.get("error") or "Evaluation failed")
+    except Exception as e:
+        completed_at = datetime.utcnow()
+        db.code_runs.update_one({"_id": run["_id"]}, {"$set": {
+            "status": CodeRunStatus.FAILED,
+            "error": str(e),
+            "completed_at": completed_at,
+            "run_ms": _ms_between(started_at, completed_at)
+        }})
+        _emit(run_id, "failed", error=str(e))
+        print(f"Code run {run_id} failed: {e}")
+        return {"run_id": run_id, "status": CodeRunStatus.FAILED.value}
+
+    completed_at = datetime.utcnow()
+    run_ms = _ms_between(started_at, completed_at)
+    db.code_runs.update_one({"_id": run["_id"]}, {"$set": {
+        "status": CodeRunStatus.COMPLETED,
+        "results": outcome["results"],
+        "result": outcome["result"],
+        "test_cases_passed": outcome["test_cases_passed"],
+        "completed_at": completed_at,
+        "run_ms": run_ms
+    }})
+    _emit(run_id, "completed",
+          success=True,
+          result=outcome["result"],
+          test_cases_passed=outcome["test_cases_passed"],
+          total_test_cases=outcome["total_test_cases"],
+          results=outcome["results"],
+          wait_ms=wait_ms,
+          run_ms=run_ms)
+    return {"run_id": run_id, "status": CodeRunStatus.COMPLETED.value, "wait_ms": wait_ms, "run_ms": run_ms}
+
+
+def get_code_run(run_id):
+    """Public state of a run, or None."""
+    from src.Utils.Database import db
+    run = db.code_runs.find_one({"_id": ObjectId(run_id)}, _PUBLIC_FIELDS)
+    return _serialize(run) if run else None
+
+
+def _broker_queue_depth():
+    """Messages waiting on CODE_EVAL_QUEUE in the broker, or None if it cannot be read."""
+    try:
+        from celery_app import celery
+        with celery.connection_for_read() as conn:
+            conn.ensure_connection(max_retries=1)
+            return conn.default_channel.queue_declare(queue=CODE_EVAL_QUEUE, passive=True).message_count
+    except Exception as e:
+        print(f"Could not read broker depth of '{CODE_EVAL_QUEUE}': {e}")
+        return None
+
+
+def _percentile(sorted_values, fraction):
+    if not sorted_values:
+        return None
+    return sorted_values[min(len(sorted_values) - 1, int(round(fraction * (len(sorted_values) - 1))))]
+
+
+def _timing_summary(values):
+    values = sorted(values)
+    return {
+        "avg": int(sum(values) / len(values)) if values else None,
+        "p50": _percentile(values, 0.5),
+        "p95": _percentile(values, 0.95),
+        "max": values[-1] if values else None,
+    }
+
+
+def get_code_eval_metrics(window_minutes=None):
+    """Back-pressure metrics for the code evaluation queue."""
+    from src.Utils.Database import db
+
+    window_minutes = window_minutes or CODE_EVAL_METRICS_WINDOW_MINUTES
+    now = datetime.utcnow()
+    since = now - timedelta(minutes=window_minutes)
+
+    lease_expired = now - timedelta(seconds=CODE_EVAL_RUN_LEASE_SECONDS)
+    queued = db.code_runs.count_documents({"status": CodeRunStatus.QUEUED})
+    running = db.code_runs.count_documents({"status": CodeRunStatus.RUNNING, "started_at": {"$gte": lease_expired}})
+    # RUNNING past the lease: the worker died and the run awaits redelivery
+    stale = db.code_runs.count_documents({"status": CodeRunStatus.RUNNING, "started_at": {"$lt": lease_expired}})
+    oldest = db.code_runs.find_one(
+        {"status": CodeRunStatus.QUEUED}, {"enqueued_at": 1}, sort=[("enqueued_at", 1)]
+    )
+
+    waits, runs = [], []
+    finished = {CodeRunStatus.COMPLETED: 0, CodeRunStatus.FAILED: 0}
+    for run in db.code_runs.find(
+        {"started_at": {"$gte": since}},
+        {"status": 1, "wait_ms": 1, "run_ms": 1}
+    ):
+        if run.get("wait_ms") is not None:
+            waits.append(run["wait_ms"])
+        if run.get("run_ms") is not None:
+            runs.append(run["run_ms"])
+        if run.get("status") in finished:
+            finished[run["status"]] += 1
+
+    return {
+        "queue": CODE_EVAL_QUEUE,
+        "queued": queued,
+        "running": running,
+        "stale_running": stale,
+        "broker_queue_depth": _broker_queue_depth(),
+        "oldest_queued_age_ms": _ms_between(oldest["enqueued_at"], now) if oldest else 0,
+        "window_minutes": window_minutes,
+        "completed": finished[CodeRunStatus.COMPLETED],
+        "failed": finished[CodeRunStatus.FAILED],
+        "throughput_per_minute": round(sum(finished.values()) / window_minutes, 2),
+        "wait_ms": _timing_summary(waits),
+        "run_ms": _timing_summary(runs),
+    }
@@ -0,0 +1,119 @@
+"""
+Pluggable code execution backends.
+
+run_submission talks to get_execution_backend(), which is selected by
+CODE_EXECUTION_BACKEND:
+- "judge0" (default): the Judge0 API (judge0_client, batch submissions)
+- "local":            LocalExecutor, subprocesses with rlimits on this host
+                      (requires LOCAL_EXEC_LOCKED_DOWN_HOST=true)
+
+Both return results in the submit_and_wait() shape.
+
+Throughput benchmark (the same Python test cases on each backend; judge0
+uses JUDGE0_URL, e.g. the fake server from fake_judge0):
+    python -m src.CodingAssessment.Utils.execution_backend benchmark [runs] [judge0|local ...]
+"""
+
+import os
+import threading
+import time
+
+CODE_EXECUTION_BACKEND = os.getenv("CODE_EXECUTION_BACKEND", "judge0").lower()
+
+
+class ExecutionBackend:
+    """Base class: subclasses implement run_batch()."""
+
+    name = None
+
+    def run(self, source_code, language_id=71, stdin=""):
+        return self.run_batch([{"source_code": source_code, "language_id": language_id, "stdin": stdin}])[0]
+
+    def run_batch(self, submissions):
+        raise NotImplementedError
+
+    def limits_key(self):
+        """Identifies the limits results were produced under (part of the execution cache key)."""
+        raise NotImplementedError
+
+
+class Judge0Backend(ExecutionBackend):
+    name = "judge0"
+
+    def run_batch(self, submissions):
+        from src.CodingAssessment.Utils.judge0_client import run_batch
+        return run_batch(submissions)
+
+    def limits_key(self):
+        # No per-submission limits are sent, so the Judge0 instance's defaults apply
+        from src.CodingAssessment.Utils.judge0_client import JUDGE0_URL
+        return f"judge0:{JUDGE0_URL}"
+
+
+class LocalBackend(ExecutionBackend):
+    name = "local"
+
+    def __init__(self):
+        from src.CodingAssessment.Utils.local_executor import LOCAL_EXEC_LOCKED_DOWN_HOST, LocalExecutor
+        if not LOCAL_EXEC_LOCKED_DOWN_HOST:
+            # Candidate code would run as this service user, next to its secrets
+            raise RuntimeError(
+                "CODE_EXECUTION_BACKEND=local runs untrusted code on this host; set "
+                "LOCAL_EXEC_LOCKED_DOWN_HOST=true only inside a locked-down container"
+            )
+        self.executor = LocalExecutor()
+
+    def run_batch(self, submissions):
+        return self.executor.run_batch(submissions)
+
+    def limits_key(self):
+        from src.CodingAssessment.Utils import local_executor as local
+        return (
+            f"local:cpu={local.LOCAL_EXEC_CPU_SEC}:wall={local.LOCAL_EXEC_WALL_SEC}"
+            f":mem={local.LOCAL_EXEC_MEMORY_MB}:out={local.LOCAL_EXEC_OUTPUT_KB}"
+        )
+
+
+BACKENDS = {
+    Judge0Backend.name: Judge0Backend,
+    LocalBackend.name: LocalBackend,
+}
+
+_backends = {}
+_backends_lock = threading.Lock()
+
+
+def get_execution_backend(name=None):
+    """Process-wide backend instance (CODE_EXECUTION_BACKEND unless name is given)."""
+    name = (name or CODE_EXECUTION_BACKEND).lower()
+    if name not in BACKENDS:
+        raise ValueError(f"Unknown CODE_EXECUTION_BACKEND '{name}' (expected one of {sorted(BACKENDS)})")
+    with _backends_lock:
+        if name not in _backends:
+            _backends[name] = BACKENDS[name]()
+        return _backends[name]
+
+
+def run_benchmark(runs=40, names=None):
+    source = "import sys\nprint(sum(map(int, sys.stdin.read().split())))\n"
+    submissions = [{"source_code": source, "language_id": 71, "stdin": f"{i} {i}"} for i in range(runs)]
+
+    for name in names or sorted(BACKENDS):
+        backend = get_execution_backend(name)
+        backend.run_batch(submissions[:1])     # connect / warm up
+        started = time.perf_counter()
+        results = backend.run_batch(submissions)
+        elapsed = time.perf_counter() - started
+        correct = sum(
+            (r.get("stdout") or "").strip() == str(2 * i) for i, r in enumerate(results)
+        )
+        print(f"{name:>7}: {runs} runs in {elapsed:6.2f} s  ({runs / elapsed:6.1f} runs/s, {correct}/{runs} correct)")
+
+
+if __name__ == "__main__":
+    import sys
+
+    if len(sys.argv) < 2 or sys.argv[1] != "benchmark":
+        print("usage: python -m src.CodingAssessment.Utils.execution_backend benchmark [runs] [judge0|local ...]")
+        sys.exit(1)
+    run_benchmark(int(sys.argv[2]) if len(sys.argv) > 2 else 40, sys.argv[3:] or None)
@@ -0,0 +1,270 @@
+"""
+Execution result cache for coding assessments.
+
+Running the same source on the same input under the same limits gives the same
+result, so run_submission looks every test case up before sending anything to
+the execution backend. Keys are SHA-256 over (normalized source, language_id,
+stdin, backend limits). Normalizing only unifies line endings and trailing
+whitespace at the end of the file, so it never changes program behaviour.
+
+Lookups hit an in-process LRU first, then the execution_cache collection
+(shared across workers, expired through a TTL index). Only final, reproducible
+outcomes are stored: transport errors, internal errors and time-limit results
+(which depend on load) are always executed again.
+
+Entries record the question ids that produced them; update_problem calls
+invalidate_question() when test cases change. That deletes the Mongo entries
+and the LRU entries of the calling process only: the LRU is per process, so
+other workers may serve a stale result until their copy expires after
+EXECUTION_CACHE_LRU_TTL_SECONDS. Hits (including repeats of a test case within
+one batch), misses and the execution time saved are accumulated per drive in
+execution_cache_stats.
+
+Configuration (environment):
+- EXECUTION_CACHE_ENABLED:     "false" to bypass the cache (default true)
+- EXECUTION_CACHE_MAX_ENTRIES: in-process LRU capacity (default 4096)
+- EXECUTION_CACHE_TTL_SECONDS: entry lifetime in Mongo (default 7 days)
+- EXECUTION_CACHE_LRU_TTL_SECONDS: entry lifetime in the in-process LRU, which bounds how long
+                               an invalidated result can outlive it in other workers (default 300)
+"""
+
+import hashlib
+import os
+import threading
+import time
+from collections import OrderedDict
+from datetime import datetime, timedelta
+
+EXECUTION_CACHE_ENABLED = os.getenv("EXECUTION_CACHE_ENABLED", "true").lower() != "false"
+EXECUTION_CACHE_MAX_ENTRIES = int(os.getenv("EXECUTION_CACHE_MAX_ENTRIES", "4096"))
+EXECUTION_CACHE_TTL_SECONDS = int(os.getenv("EXECUTION_CACHE_TTL_SECONDS", str(7 * 24 * 60 * 60)))
+EXECUTION_CACHE_LRU_TTL_SECONDS = int(os.getenv("EXECUTION_CACHE_LRU_TTL_SECONDS", "300"))
+
+# Judge0 status ids whose result may change on a re-run:
+# 5 Time Limit Exceeded (load dependent), 13 Internal Error, 14 Exec Format Error
+UNCACHEABLE_STATUS_IDS = (5, 13, 14)
+
+
+def normalize_source(source_code):
+    return source_code.replace("\r\n", "\n").replace("\r", "\n").rstrip() + "\n"
+
+
+def execution_key(source_code, language_id, stdin, limits):
+    digest = hashlib.sha256()
+    for part in (normalize_source(source_code), str(language_id), stdin or "", limits):
+        data = part.encode("utf-8")
+        digest.update(len(data).to_bytes(8, "big"))
+        digest.update(data)
+    return digest.hexdigest()
+
+
+def is_cacheable(result):
+    if not result or result.get("error"):
+        return False
+    status_id = (result.get("status") or {}).get("id")
+    return status_id is not None and status_id not in UNCACHEABLE_STATUS_IDS
+
+
+class ExecutionResultCache:
+    """Per-process LRU front over the execution_cache collection."""
+
+    def __init__(self, collection=None, max_entries=None, ttl_seconds=None, lru_ttl_seconds=None):
+        self._collection = collection
+        self.max_entries = max_entries or EXECUTION_CACHE_MAX_ENTRIES
+        self.ttl_seconds = ttl_seconds or EXECUTION_CACHE_TTL_SECONDS
+        self.lru_ttl_seconds = min(lru_ttl_seconds or EXECUTION_CACHE_LRU_TTL_SECONDS, self.ttl_seconds)
+        self._entries = OrderedDict()      # key -> (entry, expires_at monotonic)
+        self._question_keys = {}           # question_id -> set of keys in the LRU
+        self._lock = threading.Lock()
+
+    @property
+    def collection(self):
+        if self._collection is None:
+            from src.Utils.Database import db
+            self._collection = db.execution_cache
+        return self._collection
+
+    # ---------- LRU ----------
+
+    def _lru_get(self, key):
+        with self._lock:
+            item = self._entries.get(key)
+            if item is None:
+                return None
+            if item[1] < time.monotonic():
+                del self._entries[key]
+                return None
+            self._entries.move_to_end(key)
+            return item[0]
+
+    def _lru_set(self, key, entry, question_id=None):
+        with self._lock:
+            self._entries[key] = (entry, time.monotonic() + self.lru_ttl_seconds)
+            self._entries.move_to_end(key)
+            if question_id:
+                self._question_keys.setdefault(question_id, set()).add(key)
+            while len(self._entries) > self.max_entries:
+                self._entries.popitem(last=False)
+
+    # ---------- lookups ----------
+
+    def get_many(self, keys, question_id=None):
+        """{key: {"result", "cost_ms"}} for every cached key."""
+        found = {}
+        missing = []
+        for key in keys:
+            entry = self._lru_get(key)
+            if entry is not None:
+                found[key] = entry
+            else:
+                missing.append(key)
+
+        if missing:
+            for doc in self.collection.find(
+                {"_id": {"$in": missing}, "expires_at": {"$gt": datetime.utcnow()}},
+                {"result": 1, "cost_ms": 1}
+            ):
+                entry = {"result": doc["result"], "cost_ms": doc.get("cost_ms", 0)}
+                found[doc["_id"]] = entry
+                self._lru_set(doc["_id"], entry, question_id)
+        return found
+
+    def set_many(self, entries, question_id=None):
+        """entries: {key: {"result", "cost_ms"}}."""
+        if not entries:
+            return
+        from pymongo import UpdateOne
+
+        now = datetime.utcnow()
+        expires_at = now + timedelta(seconds=self.ttl_seconds)
+        operations = []
+        for key, entry in entries.items():
+            self._lru_set(key, entry, question_id)
+            update = {"$set": {
+                "result": entry["result"],
+                "cost_ms": entry["cost_ms"],
+                "created_at": now,
+                "expires_at": expires_at
+            }}
+            if question_id:
+                update["$addToSet"] = {"question_ids": question_id}
+            operations.append(UpdateOne({"_id": key}, update, upsert=True))
+        self.collection.bulk_write(operations, ordered=False)
+
+    def invalidate_question(self, question_id):
+        """
+        Drop every entry produced for a question (e.g. its test cases were edited):
+        all Mongo entries, but only this process's LRU entries.
+        """
+        with self._lock:
+            for key in self._question_keys.pop(question_id, set()):
+                self._entries.pop(key, None)
+        return self.collection.delete_many({"question_ids": question_id}).deleted_count
+
+    def clear(self):
+        with self._lock:
+            self._entries.clear()
+            self._question_keys.clear()
+
+
+_cache = None
+_cache_lock = threading.Lock()
+
+
+def get_execution_cache():
+    global _cache
+    with _cache_lock:
+        if _cache is None:
+            _cache = ExecutionResultCache()
+        return _cache
+
+
+def invalidate_question(question_id):
+    try:
+        removed = get_execution_cache().invalidate_question(str(question_id))
+        print(f"Execution cache: dropped {removed} result(s) for question {question_id}")
+    except Exception as e:
+        print(f"Execution cache invalidation failed for question {question_id}: {e}")
+
+
+def _record_stats(drive_id, hits, misses, saved_ms, executed_ms):
+    if not drive_id:
+        return
+    from src.Utils.Database import db
+    db.execution_cache_stats.update_one(
+        {"_id": str(drive_id)},
+        {
+            "$inc": {"hits": hits, "misses": misses, "saved_ms": saved_ms, "executed_ms": executed_ms},
+            "$set": {"updated_at": datetime.utcnow()}
+        },
+        upsert=True
+    )
+
+
+def run_batch_cached(backend, submissions, drive_id=None, question_id=None):
+    """
+    backend.run_batch() with cache lookups in front; results in order.
+    Identical submissions within one batch are executed once.
+    """
+    submissions = list(submissions)
+    if not EXECUTION_CACHE_ENABLED or not submissions:
+        return backend.run_batch(submissions)
+
+    limits = backend.limits_key()
+    question_id = str(question_id) if question_id else None
+    keys = [execution_key(s["source_code"], s["language_id"], s.get("stdin"), limits) for s in submissions]
+
+    cache = get_execution_cache()
+    try:
+        cached = cache.get_many(set(keys), question_id)
+    except Exception as e:
+        print(f"Execution cache lookup failed: {e}")
+        cached = {}
+
+    to_run = {}
+    for key, submission in zip(keys, submissions):
+        if key not in cached and key not in to_run:
+            to_run[key] = submission
+
+    executed = {}
+    executed_ms = 0
+    if to_run:
+        started = time.perf_counter()
+        results = backend.run_batch(list(to_run.values()))
+        executed_ms = int((time.perf_counter() - started) * 1000)
+        cost_ms = executed_ms // len(to_run)
+        executed = {key: {"result": result, "cost_ms": cost_ms} for key, result in zip(to_run, results)}
+        try:
+            cache.set_many({k: e for k, e in executed.items() if is_cacheable(e["result"])}, question_id)
+        except Exception as e:
+            print(f"Execution cache store failed: {e}")
+
+    misses = len(to_run)
+    hits = sum(1 for key in keys if key in cached)
+    saved_ms = sum(cached[key]["cost_ms"] for key in keys if key in cached)
+    # Repeats of an executed submission within the batch are hits too: each saved one execution
+    repeats = len(keys) - hits - misses
+    if repeats:
+        hits += repeats
+        saved_ms += repeats * (executed_ms // misses)
+    try:
+        _record_stats(drive_id, hits, misses, saved_ms, executed_ms)
+    except Exception as e:
+        print(f"Execution cache stats update failed: {e}")
+
+    return [dict(cached[key]["result"]) if key in cached else executed[key]["result"] for key in keys]
+
+
+def get_execution_cache_stats(drive_id):
+    """Hit rate and execution time saved for a drive."""
+    from src.Utils.Database import db
+    doc = db.execution_cache_stats.find_one({"_id": str(drive_id)}) or {}
+    hits, misses = doc.get("hits", 0), doc.get("misses", 0)
+    return {
+        "drive_id": str(drive_id),
+        "hits": hits,
+        "misses": misses,
+        "hit_rate": round(hits / (hits + misses), 4) if hits + misses else 0.0,
+        "saved_ms": doc.get("saved_ms", 0),
+        "executed_ms": doc.get("executed_ms", 0),
+    }
@@ -0,0 +1,177 @@
+"""
+Minimal local stand-in for the Judge0 API, for developing and exercising
+judge0_client without a Judge0 deployment or RapidAPI key.
+
+Implements POST /submissions (with ?wait=true), GET /submissions/<token>,
+POST /submissions/batch and GET /submissions/batch?tokens=... . Python
+(language_id 71) is executed with the local interpreter; other languages
+finish with a Compilation Error. Submissions stay "Processing" for at least
+--delay seconds so token polling is exercised.
+
+    python -m src.CodingAssessment.Utils.fake_judge0 [--port 2358] [--delay 0.1] [--no-batch]
+    JUDGE0_URL=http://127.0.0.1:2358 python app.py
+
+NOT a sandbox: submitted code runs as the current user.
+"""
+
+import json
+import os
+import subprocess
+import sys
+import tempfile
+import threading
+import time
+import uuid
+from concurrent.futures import ThreadPoolExecutor
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+from urllib.parse import parse_qs, urlparse
+
+PYTHON_LANGUAGE_ID = 71
+RUN_TIMEOUT_SEC = 5
+
+STATUSES = {
+    1: "In Queue",
+    2: "Processing",
+    3: "Accepted",
+    5: "Time Limit Exceeded",
+    6: "Compilation Error",
+    11: "Runtime Error (NZEC)",
+}
+
+
+def _status(status_id):
+    return {"id": status_id, "description": STATUSES[status_id]}
+
+
+def _execute(submission):
+    if submission.get("language_id") != PYTHON_LANGUAGE_ID:
+        return {"status": _status(6), "compile_output": "fake_judge0 only runs Python (language_id 71)"}
+
+    with tempfile.NamedTemporaryFile("w", suffix=".py", delete=False) as source:
+        source.write(submission.get("source_code") or "")
+    started = time.perf_counter()
+    try:
+        proc = subprocess.run(
+            [sys.executable, source.name],
+            input=submission.get("stdin") or "",
+            capture_output=True, text=True, timeout=RUN_TIMEOUT_SEC
+        )
+        status = 3 if proc.returncode == 0 else 11
+        stdout, stderr = proc.stdout, proc.stderr or None
+    except subprocess.TimeoutExpired:
+        status, stdout, stderr = 5, None, None
+    finally:
+        os.unlink(source.name)
+    return {
+        "status": _status(status),
+        "stdout": stdout,
+        "stderr": stderr,
+        "time": f"{time.perf_counter() - started:.3f}",
+        "memory": 0,
+    }
+
+
+class FakeJudge0:
+    def __init__(self, delay=0.1, batch=True, workers=8):
+        self.delay = delay
+        self.batch = batch
+        self.submissions = {}
+        self.lock = threading.Lock()
+        self.pool = ThreadPoolExecutor(max_workers=workers)
+        self.requests = 0
+
+    def create(self, payload):
+        token = uuid.uuid4().hex
+        with self.lock:
+            self.submissions[token] = {"token": token, "status": _status(1), "compile_output": None,
+                                       "stdout": None, "stderr": None, "time": None, "memory": None}
+        return token, self.pool.submit(self._run, token, payload)
+
+    def _run(self, token, payload):
+        with self.lock:
+            self.submissions[token]["status"] = _status(2)
+        result = _execute(payload)
+        time.sleep(self.delay)
+        with self.lock:
+            self.submissions[token].update(result)
+        return self.get(token)
+
+    def get(self, token):
+        with self.lock:
+            submission = self.submissions.get(token)
+            return dict(submission) if submission else None
+
+
+def make_handler(judge):
+    class Handler(BaseHTTPRequestHandler):
+        protocol_version = "HTTP/1.1"
+
+        def log_message(self, *args):
+            pass
+
+        def _send(self, status, body):
+            data = json.dumps(body).encode()
+            self.send_response(status)
+            self.send_header("Content-Type", "application/json")
+            self.send_header("Content-Length", str(len(data)))
+            self.end_headers()
+            self.wfile.write(data)
+
+        def _body(self):
+            length = int(self.headers.get("Content-Length") or 0)
+            return json.loads(self.rfile.read(length) or b"{}")
+
+        def do_POST(self):
+            judge.requests += 1
+            url = urlparse(self.path)
+            query = parse_qs(url.query)
+            path = url.path.rstrip("/")
+            body = self._body()   # always drain it, the connection is kept alive
+            if path == "/submissions":
+                token, future = judge.create(body)
+                if query.get("wait", ["false"])[0] == "true":
+                    return self._send(201, future.result())
+                return self._send(201, {"token": token})
+            if path == "/submissions/batch" and judge.batch:
+                return self._send(201, [{"token": judge.create(s)[0]} for s in body.get("submissions", [])])
+            self._send(404, {"error": "not found"})
+
+        def do_GET(self):
+            judge.requests += 1
+            url = urlparse(self.path)
+            query = parse_qs(url.query)
+            path = url.path.rstrip("/")
+            if path == "/submissions/batch" and judge.batch:
+                tokens = query.get("tokens", [""])[0].split(",")
+                return self._send(200, {"submissions": [judge.get(t) for t in tokens]})
+            if path.startswith("/submissions/"):
+                submission = judge.get(path.rsplit("/", 1)[-1])
+                return self._send(200, submission) if submission else self._send(404, {"error": "not found"})
+            self._send(404, {"error": "not found"})
+
+    return Handler
+
+
+def serve(port=2358, delay=0.1, batch=True):
+    """Start the fake server in a daemon thread. Returns (server, FakeJudge0)."""
+    judge = FakeJudge0(delay=delay, batch=batch)
+    server = ThreadingHTTPServer(("127.0.0.1", port), make_handler(judge))
+    threading.Thread(target=server.serve_forever, daemon=True).start()
+    return server, judge
+
+
+if __name__ == "__main__":
+    import argparse
+
+    parser = argparse.ArgumentParser(description="Fake Judge0 server")
+    parser.add_argument("--port", type=int, default=2358)
+    parser.add_argument("--delay", type=float, default=0.1)
+    parser.add_argument("--no-batch", action="store_true", help="answer 404 on /submissions/batch")
+    args = parser.parse_args()
+
+    server, _ = serve(args.port, args.delay, not args.no_batch)
+    print(f"Fake Judge0 listening on http://127.0.0.1:{args.port}")
+    try:
+        threading.Event().wait()
+    except KeyboardInterrupt:
+        server.shutdown()
@@ -1,11 +1,43 @@
+"""
+Judge0 client.
+
+All calls share one pooled requests.Session (keep-alive connections sized by
+JUDGE0_POOL_SIZE). A multi-test-case run goes through run_batch(): test cases
+are posted to /submissions/batch in chunks of JUDGE0_BATCH_SIZE, and the
+returned tokens are polled with GET /submissions/batch until every one has
+finished. Chunks are submitted and polled concurrently. If the batch endpoint
+is unavailable (some hosted plans disable it), run_batch falls back to
+concurrent submit_and_wait calls.
+
+For local development, point JUDGE0_URL at the fake server:
+    python -m src.CodingAssessment.Utils.fake_judge0
+"""
+
 import os
+import time
 import requests
 import json
+import threading
+from concurrent.futures import ThreadPoolExecutor
+from requests.adapters import HTTPAdapter
 
 JUDGE0_URL = os.environ.get("JUDGE0_URL", "https://0-ce.p.rapidapi.com")
 JUDGE0_API_KEY = os.environ.get("JUDGE0_API_KEY")
 JUDGE0_HOST = os.environ.get("JUDGE0_HOST", "0-ce.p.rapidapi.com")
 TIMEOUT = int(os.environ.get("JUDGE0_TIMEOUT_SEC", 30))
+# Judge0's default max_submission_batch_size is 20
+JUDGE0_BATCH_SIZE = int(os.environ.get("JUDGE0_BATCH_SIZE", 20))
+JUDGE0_POOL_SIZE = int(os.environ.get("JUDGE0_POOL_SIZE", 10))
+JUDGE0_POLL_INTERVAL_SEC = float(os.environ.get("JUDGE0_POLL_INTERVAL_SEC", 0.2))
+
+# Status ids 1 (In Queue) and 2 (Processing) are not final
+PENDING_STATUS_IDS = (1, 2)
+RESULT_FIELDS = "token,stdout,stderr,compile_output,status,time,memory"
+
+_session = None
+_session_lock = threading.Lock()
+_executor = None
+
 
 def _build_headers():
     headers = {
@@ -15,28 +47,27 @@ def _build_headers():
     }
     return headers
 
-def submit_and_wait(source_code: str, language_id: int = 71, stdin: str = "") -> dict:
-    endpoint = JUDGE0_URL.rstrip("/") + "/submissions/?base64_encoded=false&wait=true"
-    payload = {
-        "language_id": language_id,
-        "source_code": source_code,
-        "stdin": stdin
-    }
 
-    headers = _build_headers()
-    try:
-        r = requests.post(endpoint, headers=headers, json=payload, timeout=TIMEOUT)
-    except Exception as e:
-        return {"error": "Failed to reach 0", "detail": str(e)}
+def _get_session():
+    """Process-wide session; connections are reused across requests and threads."""
+    global _session, _executor
+    with _session_lock:
+        if _session is None:
+            session = requests.Session()
+            adapter = HTTPAdapter(pool_connections=JUDGE0_POOL_SIZE, pool_maxsize=JUDGE0_POOL_SIZE)
+            session.mount("http://", adapter)
+            session.mount("https://", adapter)
+            session.headers.update(_build_headers())
+            _session = session
+            _executor = ThreadPoolExecutor(max_workers=JUDGE0_POOL_SIZE, thread_name_prefix="judge0")
+        return _session
 
-    if r.status_code not in (200, 201):
-        return {"error": "0 returned error", "status_code": r.status_code, "body": r.text}
 
-    try:
-        resp = r.json()
-    except json.JSONDecodeError:
-        return {"error": "Invalid JSON from 0", "body": r.text}
+def _endpoint(path):
+    return JUDGE0_URL.rstrip("/") + path
+
 
+def _format_result(resp):
     return {
         "stdout": resp.get("stdout"),
         "stderr": resp.get("stderr"),
@@ -47,3 +78,126 @@ def submit_and_wait(source_code: str, language_id: int = 71, stdin: str = "") ->
         "token": resp.get("token"),
         "raw": resp
     }
+
+
+def _request(method, path, **kwargs):
+    """Returns (parsed JSON, None) or (None, error dict)."""
+    try:
+        r = _get_session().request(method, _endpoint(path), timeout=TIMEOUT, **kwargs)
+    except Exception as e:
+        return None, {"error": "Failed to reach 0", "detail": str(e)}
+
+    if r.status_code not in (200, 201):
+        return None, {"error": "0 returned error", "status_code": r.status_code, "body": r.text}
+
+    try:
+        return r.json(), None
+    except json.JSONDecodeError:
+        return None, {"error": "Invalid JSON from 0", "body": r.text}
+
+
+def submit_and_wait(source_code: str, language_id: int = 71, stdin: str = "") -> dict:
+    payload = {
+        "language_id": language_id,
+        "source_code": source_code,
+        "stdin": stdin
+    }
+
+    resp, error = _request("POST", "/submissions/?base64_encoded=false&wait=true", json=payload)
+    if error:
+        return error
+    return _format_result(resp)
+
+
+def submit_batch(submissions):
+    """
+    Create up to JUDGE0_BATCH_SIZE submissions in one request.
+    Returns (list of {"token"} or per-item error dicts, None) or (None, error dict).
+    """
+    resp, error = _request("POST", "/submissions/batch?base64_encoded=false", json={"submissions": submissions})
+    if error:
+        return None, error
+    if not isinstance(resp, list) or len(resp) != len(submissions):
+        return None, {"error": "Unexpected batch response from 0", "body": resp}
+    return resp, None
+
+
+def get_batch(tokens):
+    """Fetch the current state of several submissions. Returns (list, None) or (None, error dict)."""
+    resp, error = _request(
+        "GET", "/submissions/batch",
+        params={"tokens": ",".join(tokens), "base64_encoded": "false", "fields": RESULT_FIELDS}
+    )
+    if error:
+        return None, error
+    return resp.get("submissions", []), None
+
+
+def wait_for_tokens(tokens, timeout=None):
+    """
+    Poll until every token has a final status (or timeout). Returns a dict
+    token -> formatted result; unfinished or failed tokens map to an error dict.
+    """
+    deadline = time.monotonic() + (timeout or TIMEOUT)
+    interval = JUDGE0_POLL_INTERVAL_SEC
+    results = {}
+    pending = list(tokens)
+
+    while pending:
+        submissions, error = get_batch(pending)
+        if error:
+            for token in pending:
+                results[token] = error
+            break
+
+        for resp in submissions:
+            if resp and (resp.get("status") or {}).get("id") not in PENDING_STATUS_IDS:
+                results[resp["token"]] = _format_result(resp)
+        pending = [token for token in pending if token not in results]
+
+        if pending and time.monotonic() >= deadline:
+            for token in pending:
+                results[token] = {"error": "Timed out waiting for 0", "token": token}
+            break
+        if pending:
+            time.sleep(interval)
+            interval = min(interval * 1.5, 2.0)
+
+    return results
+
+
+def _run_chunk(chunk):
+    created, error = submit_batch(chunk)
+    if error:
+        if error.get("status_code") in (404, 405, 501):
+            # Batch endpoint not offered: one blocking call per test case, concurrently
+            return list(_executor.map(
+                lambda s: submit_and_wait(s["source_code"], s["language_id"], s.get("stdin", "")), chunk
+            ))
+        return [error] * len(chunk)
+
+    tokens = [item.get("token") for item in created if item.get("token")]
+    finished = wait_for_tokens(tokens)
+    return [
+        finished[item["token"]] if item.get("token") else {"error": "0 rejected submission", "body": item}
+        for item in created
+    ]
+
+
+def run_batch(submissions):
+    """
+    Run several {"source_code", "language_id", "stdin"} submissions and return
+    their results in order, in the same shape as submit_and_wait().
+    """
+    submissions = list(submissions)
+    if not submissions:
+        return []
+    _get_session()
+
+    chunks = [submissions[i:i + JUDGE0_BATCH_SIZE] for i in range(0, len(submissions), JUDGE0_BATCH_SIZE)]
+    if len(chunks) == 1:
+        return _run_chunk(chunks[0])
+
+    # Separate threads per chunk: _run_chunk may itself fan out on the shared pool
+    with ThreadPoolExecutor(max_workers=len(chunks)) as chunk_pool:
+        return [result for chunk_results in chunk_pool.map(_run_chunk, chunks) for result in chunk_results]
@@ -0,0 +1,394 @@
+"""
+Local code execution engine (alternative to Judge0).
+
+Each run gets its own temp directory and a fresh child process in its own
+session. The child runs with rlimits for CPU seconds, address space, output
+file size and core dumps, a minimal environment, and a wall-clock timeout that
+kills its whole process group. stdin, stdout and stderr are files inside the
+run directory, so output size is capped by RLIMIT_FSIZE and a chatty program
+cannot fill a pipe and block.
+
+Compiled languages (C, C++, Java) are compiled once per source per batch and
+the binary is reused for every test case. Python runs on a warm pool:
+interpreters are started ahead of time, already limited and idle on a
+separate payload pipe, and each one takes exactly one submission, so
+interpreter start-up is off the request path. The submission's input file is
+dup2'ed onto fd 0 before its code runs, so sys.stdin, open(0) and os.read(0)
+all see the input exactly as on the cold path. Runs execute concurrently on a
+bounded thread pool.
+
+Results have the same shape as judge0_client.submit_and_wait(), with Judge0
+status ids.
+
+This is resource isolation, not a security sandbox: code runs as the service
+user with network access and can read whatever that user can. RLIMIT_NPROC
+bounds fork bombs, but it counts every process and thread of that user, so run
+the executor under a dedicated user. CODE_EXECUTION_BACKEND=local is refused
+unless LOCAL_EXEC_LOCKED_DOWN_HOST=true confirms the service runs in a
+locked-down container (no secrets on disk, no outbound network).
+
+Configuration (environment):
+- LOCAL_EXEC_WORKERS:       concurrent runs (default: CPU count)
+- LOCAL_EXEC_CPU_SEC:       CPU seconds per run (default 2)
+- LOCAL_EXEC_WALL_SEC:      wall-clock seconds per run (default 5)
+- LOCAL_EXEC_MEMORY_MB:     address-space / heap limit per run (default 256)
+- LOCAL_EXEC_OUTPUT_KB:     max bytes a run may write to any file, incl. stdout (default 1024)
+- LOCAL_EXEC_COMPILE_SEC:   wall-clock seconds per compilation (default 15)
+- LOCAL_EXEC_WARM_PYTHON:   idle pre-started Python interpreters (default 2, 0 disables)
+- LOCAL_EXEC_MAX_PROCS:     RLIMIT_NPROC of a run, per user (default 128)
+- LOCAL_EXEC_LOCKED_DOWN_HOST: "true" to allow CODE_EXECUTION_BACKEND=local (default false)
+"""
+
+import hashlib
+import json
+import os
+import queue
+import resource
+import shutil
+import signal
+import subprocess
+import sys
+import tempfile
+import threading
+from concurrent.futures import ThreadPoolExecutor
+
+LOCAL_EXEC_WORKERS = int(os.getenv("LOCAL_EXEC_WORKERS", str(os.cpu_count() or 2)))
+LOCAL_EXEC_CPU_SEC = int(os.getenv("LOCAL_EXEC_CPU_SEC", "2"))
+LOCAL_EXEC_WALL_SEC = float(os.getenv("LOCAL_EXEC_WALL_SEC", "5"))
+LOCAL_EXEC_MEMORY_MB = int(os.getenv("LOCAL_EXEC_MEMORY_MB", "256"))
+LOCAL_EXEC_OUTPUT_KB = int(os.getenv("LOCAL_EXEC_OUTPUT_KB", "1024"))
+LOCAL_EXEC_COMPILE_SEC = float(os.getenv("LOCAL_EXEC_COMPILE_SEC", "15"))
+LOCAL_EXEC_WARM_PYTHON = int(os.getenv("LOCAL_EXEC_WARM_PYTHON", "2"))
+LOCAL_EXEC_MAX_PROCS = int(os.getenv("LOCAL_EXEC_MAX_PROCS", "128"))
+LOCAL_EXEC_LOCKED_DOWN_HOST = os.getenv("LOCAL_EXEC_LOCKED_DOWN_HOST", "false").lower() == "true"
+
+PYTHON_LANGUAGE_ID = 71
+
+# Judge0 status ids
+STATUS_ACCEPTED = {"id": 3, "description": "Accepted"}
+STATUS_TIME_LIMIT = {"id": 5, "description": "Time Limit Exceeded"}
+STATUS_COMPILATION_ERROR = {"id": 6, "description": "Compilation Error"}
+STATUS_INTERNAL_ERROR = {"id": 13, "description": "Internal Error"}
+SIGNAL_STATUSES = {
+    signal.SIGSEGV: {"id": 7, "description": "Runtime Error (SIGSEGV)"},
+    signal.SIGXFSZ: {"id": 8, "description": "Runtime Error (SIGXFSZ)"},
+    signal.SIGFPE: {"id": 9, "description": "Runtime Error (SIGFPE)"},
+    signal.SIGABRT: {"id": 10, "description": "Runtime Error (SIGABRT)"},
+}
+STATUS_NZEC = {"id": 11, "description": "Runtime Error (NZEC)"}
+STATUS_OTHER = {"id": 12, "description": "Runtime Error (Other)"}
+
+# language_id -> how to build and run (see Submission.get_language_id).
+# "limit_memory": False for runtimes that reserve large virtual address space
+# up front (JVM, V8); their heap is capped by a flag instead.
+LANGUAGES = {
+    71: {"name": "python", "source": "main.py", "compile": None,
+         "run": [sys.executable, "-I", "main.py"], "limit_memory": True},
+    50: {"name": "c", "source": "main.c", "compile": ["gcc", "-O2", "-std=c11", "main.c", "-o", "main", "-lm"],
+         "run": ["./main"], "limit_memory": True},
+    54: {"name": "cpp", "source": "main.cpp", "compile": ["g++", "-O2", "-std=c++17", "main.cpp", "-o", "main"],
+         "run": ["./main"], "limit_memory": True},
+    62: {"name": "java", "source": "Main.java", "compile": ["javac", "Main.java"],
+         "run": ["java", "-Xmx{memory_mb}m", "-XX:+UseSerialGC", "Main"], "limit_memory": False},
+    63: {"name": "javascript", "source": "main.js", "compile": None,
+         "run": ["node", "--max-old-space-size={memory_mb}", "main.js"], "limit_memory": False},
+}
+
+# Runs inside a warm interpreter: read {"code", "stdin_path"} from the payload
+# pipe (fd in argv[1]), put the input file on fd 0 and rebuild sys.stdin on it,
+# then execute the submission as __main__.
+_WARM_BOOTSTRAP = (
+    "import sys, os, json\n"
+    "fd = int(sys.argv[1])\n"
+    "with os.fdopen(fd, 'rb') as pipe:\n"
+    "    p = json.loads(pipe.read())\n"
+    "inp = os.open(p['stdin_path'], os.O_RDONLY)\n"
+    "os.dup2(inp, 0)\n"
+    "os.close(inp)\n"
+    "sys.stdin = sys.__stdin__ = open(0, 'r', encoding='utf-8', errors='replace', closefd=False)\n"
+    "sys.argv = ['main.py']\n"
+    "del fd, pipe, inp\n"
+    "exec(compile(p.pop('code'), 'main.py', 'exec'), {'__name__': '__main__', '__builtins__': __builtins__})\n"
+)
+
+
+def _limits(limit_memory, cpu_sec=None):
+    cpu = cpu_sec or LOCAL_EXEC_CPU_SEC
+    memory = LOCAL_EXEC_MEMORY_MB * 1024 * 1024
+    output = LOCAL_EXEC_OUTPUT_KB * 1024
+
+    def apply():
+        os.setsid()
+        resource.setrlimit(resource.RLIMIT_CPU, (cpu, cpu + 1))
+        resource.setrlimit(resource.RLIMIT_FSIZE, (output, output))
+        resource.setrlimit(resource.RLIMIT_CORE, (0, 0))
+        # Fork bombs: setsid'ed grandchildren would escape killpg
+        resource.setrlimit(resource.RLIMIT_NPROC, (LOCAL_EXEC_MAX_PROCS, LOCAL_EXEC_MAX_PROCS))
+        if limit_memory:
+            resource.setrlimit(resource.RLIMIT_AS, (memory, memory))
+    return apply
+
+
+def _child_env(run_dir):
+    return {"PATH": os.environ.get("PATH", "/usr/bin:/bin"), "HOME": run_dir, "LANG": "C.UTF-8"}
+
+
+def _read(path):
+    try:
+        with open(path, "rb") as f:
+            return f.read().decode("utf-8", errors="replace")
+    except FileNotFoundError:
+        return ""
+
+
+def _kill_group(proc):
+    try:
+        os.killpg(proc.pid, signal.SIGKILL)
+    except (ProcessLookupError, PermissionError):
+        pass
+
+
+def _reap(proc, wall_sec):
+    """Wait for the child with a wall-clock timer. Returns (wait status, rusage, timed_out)."""
+    timed_out = threading.Event()
+
+    def expire():
+        timed_out.set()
+        _kill_group(proc)
+
+    timer = threading.Timer(wall_sec, expire)
+    timer.start()
+    try:
+        _, status, rusage = os.wait4(proc.pid, 0)
+    finally:
+        timer.cancel()
+    proc.returncode = os.waitstatus_to_exitcode(status)
+    _kill_group(proc)   # stray grandchildren
+    return status, rusage, timed_out.is_set()
+
+
+def _result(status, rusage, timed_out, stdout, stderr, compile_output=None):
+    cpu_time = rusage.ru_utime + rusage.ru_stime
+    if timed_out or (os.WIFSIGNALED(status) and os.WTERMSIG(status) in (signal.SIGXCPU, signal.SIGKILL)):
+        judge_status = STATUS_TIME_LIMIT
+    elif os.WIFSIGNALED(status):
+        judge_status = SIGNAL_STATUSES.get(os.WTERMSIG(status), STATUS_OTHER)
+    elif os.WEXITSTATUS(status) != 0:
+        judge_status = STATUS_NZEC
+    else:
+        judge_status = STATUS_ACCEPTED
+
+    resp = {
+        "stdout": stdout,
+        "stderr": stderr or None,
+        "compile_output": compile_output,
+        "status": judge_status,
+        "time": f"{cpu_time:.3f}",
+        "memory": rusage.ru_maxrss,    # KB on Linux, like Judge0
+        "token": None,
+    }
+    return {**resp, "raw": dict(resp)}
+
+
+def _error_result(status, message):
+    resp = {"stdout": None, "stderr": None, "compile_output": message, "status": status,
+            "time": None, "memory": None, "token": None}
+    return {**resp, "raw": dict(resp)}
+
+
+class _WarmPython:
+    """A pre-started, already-limited interpreter waiting for one submission."""
+
+    def __init__(self):
+        self.run_dir = tempfile.mkdtemp(prefix="hirekruit-run-")
+        self.stdin_path = os.path.join(self.run_dir, "stdin")
+        self.stdout_path = os.path.join(self.run_dir, "stdout")
+        self.stderr_path = os.path.join(self.run_dir, "stderr")
+        payload_read, payload_write = os.pipe()
+        try:
+            with open(self.stdout_path, "wb") as out, open(self.stderr_path, "wb") as err:
+                self.proc = subprocess.Popen(
+                    [sys.executable, "-I", "-c", _WARM_BOOTSTRAP, str(payload_read)],
+                    stdin=subprocess.DEVNULL, stdout=out, stderr=err, pass_fds=(payload_read,),
+                    cwd=self.run_dir, env=_child_env(self.run_dir),
+                    preexec_fn=_limits(limit_memory=True)
+                )
+        except Exception:
+            os.close(payload_write)
+            raise
+        finally:
+            os.close(payload_read)
+        self.payload = os.fdopen(payload_write, "wb")
+
+    def run(self, source_code, stdin):
+        try:
+            with open(self.stdin_path, "w") as f:
+                f.write(stdin or "")
+            try:
+                with self.payload:
+                    self.payload.write(json.dumps({"code": source_code, "stdin_path": self.stdin_path}).encode())
+            except BrokenPipeError:
+                pass
+            status, rusage, timed_out = _reap(self.proc, LOCAL_EXEC_WALL_SEC)
+            return _result(status, rusage, timed_out, _read(self.stdout_path), _read(self.stderr_path))
+        finally:
+            shutil.rmtree(self.run_dir, ignore_errors=True)
+
+    def discard(self):
+        self.payload.close()
+        _kill_group(self.proc)
+        self.proc.wait()
+        shutil.rmtree(self.run_dir, ignore_errors=True)
+
+
+class LocalExecutor:
+    def __init__(self, workers=None, warm_python=None):
+        self.workers = workers or LOCAL_EXEC_WORKERS
+        self.warm_python = LOCAL_EXEC_WARM_PYTHON if warm_python is None else warm_python
+        self._executor = ThreadPoolExecutor(max_workers=self.workers, thread_name_prefix="LocalExecutor")
+        self._warm = queue.Queue()
+        self._refill_lock = threading.Lock()
+        self._refilling = 0
+        self._refill()
+
+    # ---------- warm Python pool ----------
+
+    def _refill(self):
+        with self._refill_lock:
+            missing = self.warm_python - self._warm.qsize() - self._refilling
+            self._refilling += max(missing, 0)
+        for _ in range(max(missing, 0)):
+            threading.Thread(target=self._spawn_warm, daemon=True).start()
+
+    def _spawn_warm(self):
+        try:
+            self._warm.put(_WarmPython())
+        except Exception as e:
+            print(f"⚠️ Could not start warm interpreter: {e}")
+        finally:
+            with self._refill_lock:
+                self._refilling -= 1
+
+    def _run_python(self, source_code, stdin):
+        try:
+            warm = self._warm.get_nowait()
+        except queue.Empty:
+            warm = _WarmPython()
+        self._refill()
+        return warm.run(source_code, stdin)
+
+    # ---------- compile + run ----------
+
+    def _compile(self, spec, source_code):
+        """Compile into a new directory. Returns (build_dir, None) or (None, error result)."""
+        build_dir = tempfile.mkdtemp(prefix="hirekruit-build-")
+        with open(os.path.join(build_dir, spec["source"]), "w") as f:
+            f.write(source_code)
+        if spec["compile"] is None:
+            return build_dir, None
+
+        try:
+            proc = subprocess.run(
+                spec["compile"], cwd=build_dir, env=_child_env(build_dir),
+                capture_output=True, timeout=LOCAL_EXEC_COMPILE_SEC,
+                preexec_fn=_limits(limit_memory=False, cpu_sec=int(LOCAL_EXEC_COMPILE_SEC))
+            )
+        except FileNotFoundError:
+            shutil.rmtree(build_dir, ignore_errors=True)
+            return None, _error_result(STATUS_INTERNAL_ERROR, f"{spec['compile'][0]} is not installed")
+        except subprocess.TimeoutExpired:
+            shutil.rmtree(build_dir, ignore_errors=True)
+            return None, _error_result(STATUS_COMPILATION_ERROR, "Compilation timed out")
+
+        if proc.returncode != 0:
+            shutil.rmtree(build_dir, ignore_errors=True)
+            output = (proc.stdout + proc.stderr).decode("utf-8", errors="replace")
+            return None, _error_result(STATUS_COMPILATION_ERROR, output)
+        return build_dir, None
+
+    def _run_built(self, spec, build_dir, stdin):
+        run_dir = tempfile.mkdtemp(prefix="hirekruit-run-")
+        try:
+            for name in os.listdir(build_dir):
+                src = os.path.join(build_dir, name)
+                # Share read-only artifacts instead of copying them
+                os.symlink(src, os.path.join(run_dir, name))
+            stdin_path = os.path.join(run_dir, "stdin")
+            with open(stdin_path, "w") as f:
+                f.write(stdin or "")
+
+            argv = [arg.format(memory_mb=LOCAL_EXEC_MEMORY_MB) for arg in spec["run"]]
+            stdout_path, stderr_path = os.path.join(run_dir, "stdout"), os.path.join(run_dir, "stderr")
+            with open(stdin_path, "rb") as inp, open(stdout_path, "wb") as out, open(stderr_path, "wb") as err:
+                try:
+                    proc = subprocess.Popen(
+                        argv, stdin=inp, stdout=out, stderr=err,
+                        cwd=run_dir, env=_child_env(run_dir),
+                        preexec_fn=_limits(spec["limit_memory"])
+                    )
+                except FileNotFoundError:
+                    return _error_result(STATUS_INTERNAL_ERROR, f"{argv[0]} is not installed")
+                status, rusage, timed_out = _reap(proc, LOCAL_EXEC_WALL_SEC)
+            return _result(status, rusage, timed_out, _read(stdout_path), _read(stderr_path))
+        finally:
+            shutil.rmtree(run_dir, ignore_errors=True)
+
+    def _run_group(self, spec, source_code, stdins):
+        """All test cases of one source: compile once, run each input concurrently."""
+        build_dir, error = self._compile(spec, source_code)
+        if error:
+            return [error] * len(stdins)
+        try:
+            return list(self._executor.map(lambda stdin: self._run_built(spec, build_dir, stdin), stdins))
+        finally:
+            shutil.rmtree(build_dir, ignore_errors=True)
+
+    def run(self, source_code, language_id=PYTHON_LANGUAGE_ID, stdin=""):
+        return self.run_batch([{"source_code": source_code, "language_id": language_id, "stdin": stdin}])[0]
+
+    def run_batch(self, submissions):
+        """Run {"source_code", "language_id", "stdin"} submissions; results in order."""
+        submissions = list(submissions)
+        results = [None] * len(submissions)
+
+        groups = {}
+        for index, s in enumerate(submissions):
+            spec = LANGUAGES.get(s.get("language_id"))
+            if spec is None:
+                results[index] = _error_result(STATUS_INTERNAL_ERROR, f"Unsupported language_id {s.get('language_id')}")
+                continue
+            if s["language_id"] == PYTHON_LANGUAGE_ID and self.warm_python:
+                continue
+            key = (s["language_id"], hashlib.sha256(s["source_code"].encode()).hexdigest())
+            groups.setdefault(key, []).append(index)
+
+        warm_runs = [
+            (index, self._executor.submit(self._run_python, s["source_code"], s.get("stdin") or ""))
+            for index, s in enumerate(submissions)
+            if results[index] is None and s["language_id"] == PYTHON_LANGUAGE_ID and self.warm_python
+        ]
+
+        for (language_id, _), indexes in groups.items():
+            group_results = self._run_group(
+                LANGUAGES[language_id],
+                submissions[indexes[0]]["source_code"],
+                [submissions[i].get("stdin") or "" for i in indexes]
+            )
+            for index, result in zip(indexes, group_results):
+                results[index] = result
+
+        for index, future in warm_runs:
+            try:
+                results[index] = future.result()
+            except Exception as e:
+                results[index] = _error_result(STATUS_INTERNAL_ERROR, str(e))
+        return results
+
+    def close(self):
+        self.warm_python = 0
+        self._executor.shutdown(wait=True)
+        while True:
+            try:
+                self._warm.get_nowait().discard()
+            except queue.Empty:
+                break
@@ -4,7 +4,8 @@ from bson import ObjectId
 from src.Utils.Database import db
 from src.Utils.auth_utils import AuthUtils
 from src.Utils.EmailService import EmailService
-from src.Utils.BrevoEmailService import BrevoEmailService
+from src.Utils.BrevoEmailService import get_brevo_email_service
+from src.Utils.DriveContext import invalidate_company_context
 from src.Agents.EmailingAgent import EmailingAgent
 from src.Model.Company import create_company
 from src.Model.User import create_user
@@ -84,12 +85,14 @@ def register_user():
         # Insert user
         result = db.users.insert_one(user)
         user_id = result.inserted_id
+        # A new user can become the company's HR contact on its drives
+        invalidate_company_context(company_id)
 
         # Send OTP email
         # email_service = EmailService(SMTP_SERVER, SMTP_PORT, EMAIL_USER, EMAIL_PASSWORD)
 
         # for BrevoEmailService
-        email_service = BrevoEmailService()
+        email_service = get_brevo_email_service()
         #............................
 
         emailing_agent = EmailingAgent(email_service)
@@ -181,7 +184,7 @@ def verify_email():
         # email_service.send_welcome_email(email, user["name"])
 
          # for BrevoEmailService
-        email_service = BrevoEmailService()
+        email_service = get_brevo_email_service()
         #............................
 
         emailing_agent = EmailingAgent(email_service)
@@ -250,7 +253,7 @@ def resend_verification():
         # success = email_service.send_otp_email(email, otp, purpose="verification")
 
         # for BrevoEmailService
-        email_service = BrevoEmailService()
+        email_service = get_brevo_email_service()
         #............................
 
         emailing_agent = EmailingAgent(email_service)
@@ -397,7 +400,7 @@ def forgot_password():
         # email_service.send_otp_email(email, otp, purpose="password_reset")
 
         # for BrevoEmailService
-        email_service = BrevoEmailService()
+        email_service = get_brevo_email_service()
         #..........................................................
 
         emailing_agent = EmailingAgent(email_service)
@@ -476,7 +479,7 @@ def reset_password():
 
         # mail for password changed
         # for BrevoEmailService
-        email_service = BrevoEmailService()
+        email_service = get_brevo_email_service()
         #..........................................................
 
         emailing_agent = EmailingAgent(email_service)
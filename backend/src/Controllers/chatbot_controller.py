@@ -1,4 +1,5 @@
 from src.Agents.ChatBotAgnet import ChatBotAgent
+from src.SarthiRag.embeddings.embedding_service import get_embedding_service
 
 # Create a single instance of ChatBotAgent
 
@@ -18,3 +19,14 @@ def handle_chatbot_query(user_message: str) -> str:
         return reply
     except Exception as e:
         raise Exception(f"Groq API error: {str(e)}")
+
+def get_chatbot_status():
+    """
+    RAG mode, embedding service state ("cold", "loading", "ready" or "degraded")
+    with cache and batching counters, and answer cache hit/miss counters.
+    """
+    return {
+        "rag_enabled": not chatbot_agent.fallback,
+        "embeddings": get_embedding_service().status(),
+        "answer_cache": chatbot_agent.answer_cache.status() if chatbot_agent.answer_cache else None
+    }
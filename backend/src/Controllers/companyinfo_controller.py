@@ -1,6 +1,7 @@
 from src.Agents.CompanyInfoAgent import CompanyInfoAgent
 from flask import request, jsonify
 from src.Utils.Database import db
+from src.Utils.DriveContext import invalidate_company_context
 
 # Create a single instance of CompanyInfoAgent
 company_info_agent = CompanyInfoAgent()
@@ -46,4 +47,15 @@ def get_all_companies():
         print(f"Get all companies error: {str(e)}")
         return jsonify({
             "message": "Failed to fetch companies"
-        }), 500
\ No newline at end of file
+        }), 500
+
+def refresh_company_context(company_id):
+    """
+    Drop the cached company/HR context of a company's drives, e.g. after the
+    company or its HR contact was edited outside the app.
+    """
+    invalidate_company_context(company_id)
+    return jsonify({
+        "message": "Company context refreshed",
+        "company_id": company_id
+    }), 200
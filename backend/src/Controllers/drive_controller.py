@@ -4,9 +4,19 @@ from datetime import datetime
 import cloudinary.uploader
 from flask import request, jsonify
 from src.Utils.Database import db
+from src.Utils.DriveContext import invalidate_drive_context
 from src.Model.Drive import create_drive, JobType, DriveStatus, RoundStatus
 from src.Model.CodingQuestion import create_coding_question
 from src.Model.DriveCandidate import initialize_candidate_rounds
+from src.Utils.DriveStats import (
+    init_drive_stats,
+    inc_drive_stats,
+    record_transition,
+    get_drive_stats,
+    get_drive_stats_many,
+    round_stats,
+    funnel_summary
+)
 from src.Agents.QuestionIntakeAgent import QuestionIntakeAgent
 from src.SocketIO.SocketIO_Instance import socketio
 from src.Orchestrator.HiringOrchestrator import (
@@ -132,6 +142,7 @@ def create_drive_controller():
         # 4. Insert Drive to DB
         result = db.drives.insert_one(drive_doc)
         drive_doc["_id"] = str(result.inserted_id)
+        init_drive_stats(drive_doc["_id"])
 
         print(f"SUCCESS: Drive created with ID {drive_doc['_id']}. Questions: {len(coding_question_ids)}")
 
@@ -165,9 +176,13 @@ def get_drives_by_company(company_id):
         
         print(f"Found {len(drives)} drives for company {company_id}")
         
+        # Funnel counters for every drive in one query
+        stats = get_drive_stats_many(str(drive["_id"]) for drive in drives)
+        
         # Convert _id to string and add progress info
         for drive in drives:
             drive["_id"] = str(drive["_id"])
+            drive["funnel"] = funnel_summary(stats[drive["_id"]])
             
             # Add progress information
             current_round = drive.get("current_round", 0)
@@ -207,43 +222,26 @@ def get_drive_by_id(drive_id):
         # Convert ObjectId to string for JSON serialization
         drive["_id"] = str(drive["_id"])
         
-        # Get candidate statistics for each round
-        candidates = list(db.drive_candidates.find({"drive_id": drive_id}))
+        # Candidate statistics for each round (materialized drive_stats counters)
+        stats = get_drive_stats(drive_id)
         
         round_progress = []
         for round_status in drive.get("round_statuses", []):
             round_num = round_status["round_number"]
-            
-            # Count candidates in each status for this round
-            scheduled = sum(
-                1 for c in candidates 
-                if len(c.get("rounds_status", [])) >= round_num 
-                and c["rounds_status"][round_num - 1].get("scheduled") == "yes"
-            )
-            
-            completed = sum(
-                1 for c in candidates 
-                if len(c.get("rounds_status", [])) >= round_num 
-                and c["rounds_status"][round_num - 1].get("completed") == "yes"
-            )
-            
-            passed = sum(
-                1 for c in candidates 
-                if len(c.get("rounds_status", [])) >= round_num 
-                and c["rounds_status"][round_num - 1].get("result") == "passed"
-            )
+            round_counts = round_stats(stats, round_num)
             
             round_progress.append({
                 "round_number": round_num,
                 "round_type": round_status["round_type"],
                 "status": round_status["status"],
-                "scheduled_count": scheduled,
-                "completed_count": completed,
-                "passed_count": passed,
-                "total_candidates": len([c for c in candidates if c.get("resume_shortlisted") == "yes"])
+                "scheduled_count": round_counts["scheduled"],
+                "completed_count": round_counts["completed"],
+                "passed_count": round_counts["passed"],
+                "total_candidates": stats["shortlisted"]
             })
         
         drive["round_progress"] = round_progress
+        drive["funnel"] = funnel_summary(stats)
         
         print(f"Drive found successfully: {drive.get('job_id', 'No job_id')}")
         
@@ -354,7 +352,8 @@ def update_drive_status(drive_id):
             shortlist_result = shortlist_candidates(candidates, keywords, job_role)
 
             shortlisted_candidates = db.drive_candidates.find(
-                {"drive_id": drive_id, "resume_shortlisted": "yes"}
+                {"drive_id": drive_id, "resume_shortlisted": "yes"},
+                {"rounds_status.scheduled": 1, "rounds_status.completed": 1, "rounds_status.result": 1}
             )
 
             for candidate in shortlisted_candidates:
@@ -366,6 +365,12 @@ def update_drive_status(drive_id):
                         "$set": {"rounds_status": rounds_status}
                     }
                 )
+                # Only the round flags change here; shortlisting itself was counted by the agent
+                record_transition(
+                    drive_id,
+                    {"rounds_status": candidate.get("rounds_status")},
+                    {"rounds_status": rounds_status}
+                )
 
             print("✓ Resume shortlisting completed.")
 
@@ -456,16 +461,21 @@ def update_drive_status(drive_id):
             # --- 🔥 Candidate-level round update ---
             candidate_round_field = f"rounds_status.{round_number - 1}"
 
-            db.drive_candidates.update_many(
-                {"drive_id": drive_id},
-                {
-                    "$set": {
-                        f"{candidate_round_field}.status": RoundStatus.IN_PROGRESS,
-                        f"{candidate_round_field}.scheduled": "yes",
-                        f"{candidate_round_field}.updated_at": datetime.utcnow()
-                    }
+            round_update = {
+                "$set": {
+                    f"{candidate_round_field}.status": RoundStatus.IN_PROGRESS,
+                    f"{candidate_round_field}.scheduled": "yes",
+                    f"{candidate_round_field}.updated_at": datetime.utcnow()
                 }
-            )
+            }
+            # Flip the not-yet-scheduled candidates first so modified_count is the exact counter delta
+            newly_scheduled = db.drive_candidates.update_many(
+                {"drive_id": drive_id, f"{candidate_round_field}.scheduled": {"$ne": "yes"}},
+                round_update
+            ).modified_count
+            inc_drive_stats(drive_id, {f"rounds.{round_number}.scheduled": newly_scheduled})
+
+            db.drive_candidates.update_many({"drive_id": drive_id}, round_update)
 
             print(f"✓ Updated round {round_number} status for all drive candidates")
 
@@ -522,16 +532,20 @@ def update_drive_status(drive_id):
             # --- 🔥 Candidate Update ---
             candidate_round_field = f"rounds_status.{round_number - 1}"
 
-            db.drive_candidates.update_many(
-                {"drive_id": drive_id},
-                {
-                    "$set": {
-                        f"{candidate_round_field}.status": RoundStatus.COMPLETED,
-                        f"{candidate_round_field}.completed": "yes",
-                        f"{candidate_round_field}.updated_at": datetime.utcnow()
-                    }
+            round_update = {
+                "$set": {
+                    f"{candidate_round_field}.status": RoundStatus.COMPLETED,
+                    f"{candidate_round_field}.completed": "yes",
+                    f"{candidate_round_field}.updated_at": datetime.utcnow()
                 }
-            )
+            }
+            newly_completed = db.drive_candidates.update_many(
+                {"drive_id": drive_id, f"{candidate_round_field}.completed": {"$ne": "yes"}},
+                round_update
+            ).modified_count
+            inc_drive_stats(drive_id, {f"rounds.{round_number}.completed": newly_completed})
+
+            db.drive_candidates.update_many({"drive_id": drive_id}, round_update)
 
             print(f"✓ Marked round {round_number} as completed for all candidates")
 
@@ -643,34 +657,19 @@ def get_drive_progress(drive_id):
         if not drive:
             return jsonify({"error": "Drive not found"}), 404
         
-        # Get candidate statistics for each round
-        candidates = list(db.drive_candidates.find({"drive_id": drive_id}))
-        total_candidates = len([c for c in candidates if c.get("resume_shortlisted") == "yes"])
+        # Candidate statistics for each round (materialized drive_stats counters)
+        stats = get_drive_stats(drive_id)
+        total_candidates = stats["shortlisted"]
         
-        round_stats = []
+        round_details = []
         for round_status in drive.get("round_statuses", []):
             round_num = round_status["round_number"]
+            round_counts = round_stats(stats, round_num)
+            scheduled = round_counts["scheduled"]
+            completed = round_counts["completed"]
+            passed = round_counts["passed"]
             
-            # Count candidates in each status for this round
-            scheduled = sum(
-                1 for c in candidates 
-                if len(c.get("rounds_status", [])) >= round_num 
-                and c["rounds_status"][round_num - 1].get("scheduled") == "yes"
-            )
-            
-            completed = sum(
-                1 for c in candidates 
-                if len(c.get("rounds_status", [])) >= round_num 
-                and c["rounds_status"][round_num - 1].get("completed") == "yes"
-            )
-            
-            passed = sum(
-                1 for c in candidates 
-                if len(c.get("rounds_status", [])) >= round_num 
-                and c["rounds_status"][round_num - 1].get("result") == "passed"
-            )
-            
-            round_stats.append({
+            round_details.append({
                 "round_number": round_num,
                 "round_type": round_status["round_type"],
                 "status": round_status["status"],
@@ -689,7 +688,8 @@ def get_drive_progress(drive_id):
             "total_rounds": len(drive.get("rounds", [])),
             "overall_status": drive.get("status"),
             "total_candidates": total_candidates,
-            "round_details": round_stats
+            "funnel": funnel_summary(stats),
+            "round_details": round_details
         }), 200
         
     except Exception as e:
@@ -697,6 +697,25 @@ def get_drive_progress(drive_id):
         return jsonify({"error": f"Server error: {str(e)}"}), 500
 
 
+def get_drive_funnel(drive_id):
+    """
+    Get the candidate funnel (shortlisted, emailed, per-round, selected) for a drive.
+    Served from the drive_stats counters, without scanning drive_candidates.
+    """
+    try:
+        try:
+            ObjectId(drive_id)
+        except Exception:
+            return jsonify({"error": "Invalid drive ID format"}), 400
+
+        stats = get_drive_stats(drive_id)
+        return jsonify({"drive_id": drive_id, "funnel": funnel_summary(stats)}), 200
+
+    except Exception as e:
+        print(f"Error in get_drive_funnel: {str(e)}")
+        return jsonify({"error": f"Server error: {str(e)}"}), 500
+
+
 def serialize_mongo_doc(doc):
     """
     Convert MongoDB document to JSON-serializable dict
@@ -854,29 +873,30 @@ def remove_application_by_job(job_id, candidate_id):
 
         # Build deletion query: match drive_id and candidate_id (try ObjectId or string)
         base_query = {"drive_id": drive_id}
-        deleted_count = 0
+        deleted = None
 
         # Try ObjectId candidate_id match first
         try:
             obj_cid = ObjectId(candidate_id)
             query = {**base_query, "$or": [{"candidate_id": obj_cid}, {"candidate_id": candidate_id}, {"candidateId": candidate_id}]}
-            res = db.drive_candidates.delete_one(query)
-            deleted_count = res.deleted_count
+            deleted = db.drive_candidates.find_one_and_delete(query)
         except Exception:
             # candidate_id is not a valid ObjectId or ObjectId lookup failed, try string matches
             query = {**base_query, "$or": [{"candidate_id": candidate_id}, {"candidateId": candidate_id}]}
-            res = db.drive_candidates.delete_one(query)
-            deleted_count = res.deleted_count
+            deleted = db.drive_candidates.find_one_and_delete(query)
 
-        if deleted_count == 0:
+        if deleted is None:
             # Second attempt: try to delete by drive_candidate _id
             try:
                 obj_dc = ObjectId(candidate_id)
-                res2 = db.drive_candidates.delete_one({"_id": obj_dc, "drive_id": drive_id})
-                deleted_count = res2.deleted_count
+                deleted = db.drive_candidates.find_one_and_delete({"_id": obj_dc, "drive_id": drive_id})
             except Exception:
                 pass
 
+        deleted_count = 1 if deleted is not None else 0
+        if deleted is not None:
+            record_transition(drive_id, deleted, None)
+
         if deleted_count == 0:
             return jsonify({"error": "No application found to delete"}), 404
 
@@ -1182,6 +1202,8 @@ def delete_drive(drive_id):
             
         # Optional: Delete associated candidates if needed
         # db.drive_candidates.delete_many({"drive_id": drive_id})
+        db.drive_stats.delete_one({"_id": drive_id})
+        invalidate_drive_context(drive_id)
         
         print(f"Drive {drive_id} deleted successfully")
         return jsonify({"message": "Drive deleted successfully", "drive_id": drive_id}), 200
@@ -1218,7 +1240,8 @@ def update_drive(drive_id):
         
         if result.matched_count == 0:
             return jsonify({"error": "Drive not found"}), 404
-            
+
+        invalidate_drive_context(drive_id)
         print(f"Drive {drive_id} updated successfully")
         return jsonify({"message": "Drive updated successfully", "drive_id": drive_id}), 200
         
@@ -2,10 +2,11 @@ import asyncio
 import io, json, os
 from flask import jsonify, request
 from src.Utils.VapiService import upload_resume
-import pdfplumber
 from bson import ObjectId
 from dotenv import load_dotenv
 from src.Utils.Database import db
+from src.Utils.DriveStats import candidate_counters, counter_delta, inc_drive_stats
+from src.Utils.PdfTextExtractor import extract_text_from_pdf_bytes
 from datetime import datetime
 
 load_dotenv()
@@ -28,17 +29,12 @@ emailing_agent = EmailingAgent(email_service)
 def extract_resume_text(file):
     """Extract text from uploaded resume (PDF)."""
     print("Extracting resume text...")
-    text = ""
     try:
-        with pdfplumber.open(file) as pdf:
-            for page in pdf.pages:
-                page_text = page.extract_text()
-                if page_text:
-                    text += page_text + "\n"
+        text = extract_text_from_pdf_bytes(file.read())
     except Exception as e:
         raise RuntimeError(f"Error extracting resume text: {str(e)}")
     print("resume extraction done")
-    return text.strip()
+    return text
 
 
 def upload_resume_controller(file):
@@ -92,6 +88,8 @@ def evaluate_interview_controller(resume_text, transcript, driveCandidateId, int
             drive_candidate = db.drive_candidates.find_one({"_id": ObjectId(driveCandidateId)})
             if drive_candidate:
                 rounds_status = drive_candidate.get("rounds_status", [])
+                # rounds_status is edited in place below, so snapshot the counters first
+                counters_before = candidate_counters(drive_candidate)
 
                 # Find and update the round that matches the interviewType
                 # Normalize interviewType for comparison (e.g., "hr" matches "hr", "technical" matches "technical")
@@ -114,18 +112,23 @@ def evaluate_interview_controller(resume_text, transcript, driveCandidateId, int
                 if not updated_round:
                     print(f"Warning: No round found with type '{interviewType}' for candidate {driveCandidateId}")
 
+                selected = "yes" if decision == "PASS" else "no"
                 db.drive_candidates.update_one(
                     {"_id": drive_candidate["_id"]},
                     {
                         "$set": {
                             "rounds_status": rounds_status,
-                            "selected": "yes" if decision == "PASS" else "no",
+                            "selected": selected,
                             "feedback": feedback,
                             "evaluation_result": result,
                             "updated_at": datetime.utcnow()
                         }
                     }
                 )
+                inc_drive_stats(
+                    drive_candidate.get("drive_id"),
+                    counter_delta(counters_before, candidate_counters({**drive_candidate, "selected": selected}))
+                )
                 print(f"Drive candidate {driveCandidateId} updated with round completion status")
             else:
                 print(f"No drive candidate found for driveCandidateId: {driveCandidateId}")
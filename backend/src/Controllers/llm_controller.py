@@ -0,0 +1,14 @@
+from src.LLM.Cache import get_cache_stats
+from src.LLM.Gateway import get_metrics
+
+
+def get_llm_metrics():
+    """
+    LLM gateway metrics (queue depth, in-flight, retries, latency) and response
+    cache hit/miss counters per agent. Both are per process: Celery workers
+    keep their own counters.
+    """
+    return {
+        "gateway": get_metrics(),
+        "cache": get_cache_stats()
+    }
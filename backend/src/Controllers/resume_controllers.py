@@ -1,23 +1,18 @@
 from flask import request, jsonify, redirect
 from werkzeug.utils import secure_filename
 from bson import ObjectId
-from datetime import datetime
-import cloudinary.uploader
-from src.Orchestrator.HiringOrchestrator import create_driveCandidate
 from src.Config.cloudinary_config import cloudinary
 from src.Utils.Database import db
-from src.Model.Drive import DriveStatus
-
-def extract_text_from_pdf_bytes(pdf_bytes):
-    """Helper: Extract PDF text safely from uploaded bytes"""
-    import fitz  # PyMuPDF
-    doc = fitz.open(stream=pdf_bytes, filetype="pdf")
-    extracted_text = ""
-    for page in doc:
-        extracted_text += page.get_text()
-    return extracted_text.strip()
+from src.SocketIO.SocketIO_Instance import socketio
+from src.Tasks.tasks import ingest_resumes_task
+from src.Utils.ResumeIngestionService import stage_resume_upload, run_resume_ingestion, get_ingestion_job
 
 def upload_resumes():
+    """
+    Stage uploaded resumes and queue them for background ingestion.
+    Returns 202 with a job_id; progress is pushed on the `pipeline_update`
+    Socket.IO channel and can be polled via get_upload_job_status.
+    """
     try:
         print("Received request to upload resumes")
         if 'resumes' not in request.files:
@@ -38,93 +33,50 @@ def upload_resumes():
         if not drive_id:
             return jsonify({"error": "Missing drive_id"}), 400
 
-        uploaded_urls = []
-
-        resumes_data = []
+        staged_files = [
+            (secure_filename(file.filename), file.read())
+            for file in files
+            if file.filename
+        ]
 
-        for file in files:
-            if not file.filename:
-                continue
-            filename = secure_filename(file.filename)
-            
-            # ================================
-            # FIX: Use resume file directly instead of re-downloading from Cloudinary
-            # Reason: Cloudinary raw URLs may fail in some environments
-            # ================================
-            try:
-                # Read bytes once
-                file_bytes = file.read()
-                print(f"DEBUG: File '{filename}' byte length: {len(file_bytes)}")
-                
-                # Extract text from bytes
-                raw_text = extract_text_from_pdf_bytes(file_bytes)
-                if not raw_text:
-                    print(f"WARNING: No text extracted from {filename}. File might be corrupted or scanned image.")
-                
-                # CRITICAL FIX: Upload as 'image' with 'authenticated' type to match delivery
-                print(f"Uploading {filename} to Cloudinary as image/authenticated...")
-                result = cloudinary.uploader.upload(
-                    file_bytes,
-                    resource_type="image",
-                    type="authenticated",
-                    folder="resumes",
-                    use_filename=True,
-                    unique_filename=True
-                )
-                
-                print(f"DEBUG: Cloudinary response bytes: {result.get('bytes')}")
-                if result.get('bytes') != len(file_bytes):
-                    print(f"ERROR: Byte mismatch! Local: {len(file_bytes)}, Cloudinary: {result.get('bytes')}")
-                
-                print("FULL CLOUDINARY RESPONSE:", result)
-                resume_url = result["secure_url"]
-                public_id = result["public_id"]
-                version = result.get("version")
-                format_type = result.get("format")
-                
-                # Store authoritative metadata directly
-                resumes_data.append({
-                    "url": resume_url,
-                    "public_id": public_id,
-                    "version": version,
-                    "format": format_type,
-                    "resource_type": "image",
-                    "delivery_type": "authenticated",
-                    "text": raw_text
-                })
-                
-                uploaded_urls.append(resume_url)
-                print(f"Successfully uploaded {filename} to {resume_url} with public_id {public_id}")
-            except Exception as e:
-                print(f"Error processing {filename}: {str(e)}")
-                return jsonify({"error": f"Processing failed for {filename}: {str(e)}"}), 500
+        job_id = stage_resume_upload(staged_files, drive_id, skills, job_role)
+        print(f"Staged {len(staged_files)} resumes as ingestion job {job_id}")
 
-        # Pass rich data objects instead of just URL strings
-        print("Starting HiringOrchestrator.create_driveCandidate...")
-        result = create_driveCandidate(resumes_data, skills, job_role, drive_id)
-        print("HiringOrchestrator.create_driveCandidate completed.")
-
-        # Update drive status
         try:
-            drive_object_id = ObjectId(drive_id)
-            db.drives.update_one(
-                {"_id": drive_object_id},
-                {"$set": {"status": DriveStatus.RESUME_UPLOADED, "updated_at": datetime.utcnow()}}
-            )
+            task_result = ingest_resumes_task.delay(job_id)
+            print(f"Resume ingestion task queued with ID: {task_result.id}")
         except Exception as e:
-            print(f"Error updating drive status in DB: {str(e)}")
+            # No broker reachable (local setup without worker): process in-process in the background
+            print(f"Could not queue ingestion task ({e}); running in background thread")
+            socketio.start_background_task(run_resume_ingestion, job_id)
 
         return jsonify({
-            "status": "success",
-            "uploaded_urls": uploaded_urls,
-            "response": result
-        })
+            "status": "queued",
+            "job_id": job_id,
+            "total_files": len(staged_files)
+        }), 202
     except Exception as e:
         import traceback
         print("CRITICAL ERROR in upload_resumes:")
         traceback.print_exc()
         return jsonify({"error": f"Internal server error: {str(e)}"}), 500
 
+
+def get_upload_job_status(job_id):
+    """Report job status and per-file state for a resume ingestion job."""
+    try:
+        try:
+            job = get_ingestion_job(job_id)
+        except Exception:
+            return jsonify({"error": "Invalid job ID format"}), 400
+
+        if not job:
+            return jsonify({"error": "Job not found"}), 404
+
+        return jsonify({"job": job}), 200
+    except Exception as e:
+        return jsonify({"error": str(e)}), 500
+
 # Helper removed: Canonical data stored in DB. No parsing allowed.
 
 def view_resume_inline(candidate_id):
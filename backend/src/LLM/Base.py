@@ -8,3 +8,8 @@ class BaseLLM(ABC):
     def get_model(self):
         """Return the LLM model instance."""
         pass
+
+    def get_cached_model(self, agent_name: str):
+        """Return the model wrapped in the shared response cache (pass-through unless agent_name opted in)."""
+        from .Cache import cached_model
+        return cached_model(self.get_model(), agent_name)
@@ -0,0 +1,201 @@
+"""
+Content-addressed response cache for LLM calls.
+
+Responses are keyed on (model name, temperature, SHA-256 of the message list).
+All agents run at temperature=0, so a replayed prompt (re-uploaded resume,
+re-run shortlisting, repeated Sarthi question) can be answered from cache
+without another Groq round trip.
+
+Configuration (environment):
+- LLM_CACHE_AGENTS:  comma-separated agent names that opt in, or "*" for all.
+                     Empty (default) disables caching everywhere.
+- LLM_CACHE_BACKEND: "memory" (in-process LRU, default) or "mongo" (llm_cache collection).
+- LLM_CACHE_TTL_SECONDS: entry lifetime, default 24h.
+- LLM_CACHE_MAX_ENTRIES: LRU capacity for the memory backend, default 2048.
+"""
+
+import hashlib
+import json
+import os
+import threading
+import time
+from collections import OrderedDict
+from datetime import datetime, timedelta
+
+from langchain_core.messages import AIMessage
+
+LLM_CACHE_AGENTS = os.getenv("LLM_CACHE_AGENTS", "")
+LLM_CACHE_BACKEND = os.getenv("LLM_CACHE_BACKEND", "memory")
+LLM_CACHE_TTL_SECONDS = int(os.getenv("LLM_CACHE_TTL_SECONDS", str(24 * 60 * 60)))
+LLM_CACHE_MAX_ENTRIES = int(os.getenv("LLM_CACHE_MAX_ENTRIES", "2048"))
+
+
+def cache_key(model_name, temperature, messages):
+    """Hash the model identity and the full message list into a stable key."""
+    payload = json.dumps(
+        {
+            "model": model_name,
+            "temperature": temperature,
+            "messages": [[getattr(m, "type", "human"), getattr(m, "content", m)] for m in messages],
+        },
+        sort_keys=True,
+        ensure_ascii=False,
+        default=str,
+    )
+    return hashlib.sha256(payload.encode("utf-8")).hexdigest()
+
+
+class InMemoryLLMCache:
+    """Thread-safe LRU with per-entry TTL, local to the worker process."""
+
+    def __init__(self, max_entries=LLM_CACHE_MAX_ENTRIES, ttl_seconds=LLM_CACHE_TTL_SECONDS):
+        self.max_entries = max_entries
+        self.ttl_seconds = ttl_seconds
+        self._entries = OrderedDict()
+        self._lock = threading.Lock()
+
+    def get(self, key):
+        with self._lock:
+            entry = self._entries.get(key)
+            if entry is None:
+                return None
+            content, expires_at = entry
+            if expires_at < time.monotonic():
+                del self._entries[key]
+                return None
+            self._entries.move_to_end(key)
+            return content
+
+    def set(self, key, content):
+        with self._lock:
+            self._entries[key] = (content, time.monotonic() + self.ttl_seconds)
+            self._entries.move_to_end(key)
+            while len(self._entries) > self.max_entries:
+                self._entries.popitem(last=False)
+
+    def clear(self):
+        with self._lock:
+            self._entries.clear()
+
+
+class MongoLLMCache:
+    """Cache shared across workers, stored in the llm_cache collection with a TTL index."""
+
+    def __init__(self, collection=None, ttl_seconds=LLM_CACHE_TTL_SECONDS):
+        if collection is None:
+            from src.Utils.Database import db
+            collection = db.llm_cache
+        self.collection = collection
+        self.ttl_seconds = ttl_seconds
+        try:
+            self.collection.create_index("expires_at", expireAfterSeconds=0)
+        except Exception as e:
+            print("Failed to create llm_cache TTL index:", e)
+
+    def get(self, key):
+        doc = self.collection.find_one({"_id": key, "expires_at": {"$gt": datetime.utcnow()}}, {"content": 1})
+        return doc["content"] if doc else None
+
+    def set(self, key, content):
+        self.collection.update_one(
+            {"_id": key},
+            {"$set": {"content": content, "expires_at": datetime.utcnow() + timedelta(seconds=self.ttl_seconds)}},
+            upsert=True
+        )
+
+    def clear(self):
+        self.collection.delete_many({})
+
+
+class CachedChatModel:
+    """
+    Wraps a chat model's invoke()/ainvoke() with a cache lookup.
+    When `cache` is None the wrapper is a pass-through.
+    """
+
+    def __init__(self, model, cache=None, agent_name="default"):
+        self.model = model
+        self.cache = cache
+        self.agent_name = agent_name
+        self.model_name = getattr(model, "model_name", None) or getattr(model, "model", "unknown")
+        self.temperature = getattr(model, "temperature", None)
+
+    def _lookup(self, messages):
+        """Return (key, cached AIMessage or None). key is None when caching is off."""
+        if self.cache is None:
+            return None, None
+        key = cache_key(self.model_name, self.temperature, messages)
+        try:
+            content = self.cache.get(key)
+        except Exception as e:
+            print(f"LLM cache lookup failed ({self.agent_name}): {e}")
+            content = None
+        _record(self.agent_name, hit=content is not None)
+        return key, (AIMessage(content=content) if content is not None else None)
+
+    def _store(self, key, response):
+        if key is not None and isinstance(getattr(response, "content", None), str):
+            try:
+                self.cache.set(key, response.content)
+            except Exception as e:
+                print(f"LLM cache store failed ({self.agent_name}): {e}")
+
+    def invoke(self, messages):
+        key, cached = self._lookup(messages)
+        if cached is not None:
+            return cached
+        response = self.model.invoke(messages)
+        self._store(key, response)
+        return response
+
+    async def ainvoke(self, messages):
+        key, cached = self._lookup(messages)
+        if cached is not None:
+            return cached
+        response = await self.model.ainvoke(messages)
+        self._store(key, response)
+        return response
+
+    def __getattr__(self, name):
+        return getattr(self.model, name)
+
+
+_backend = None
+_backend_lock = threading.Lock()
+_stats = {}
+_stats_lock = threading.Lock()
+
+
+def _record(agent_name, hit):
+    with _stats_lock:
+        counters = _stats.setdefault(agent_name, {"hits": 0, "misses": 0})
+        counters["hits" if hit else "misses"] += 1
+
+
+def get_cache_stats():
+    """Return a snapshot of {agent_name: {"hits", "misses"}} for this process."""
+    with _stats_lock:
+        return {name: dict(counters) for name, counters in _stats.items()}
+
+
+def get_cache_backend():
+    """Return the process-wide backend selected by LLM_CACHE_BACKEND."""
+    global _backend
+    with _backend_lock:
+        if _backend is None:
+            if LLM_CACHE_BACKEND == "mongo":
+                _backend = MongoLLMCache()
+            else:
+                _backend = InMemoryLLMCache()
+        return _backend
+
+
+def is_cache_enabled(agent_name):
+    enabled = {name.strip() for name in LLM_CACHE_AGENTS.split(",") if name.strip()}
+    return "*" in enabled or agent_name in enabled
+
+
+def cached_model(model, agent_name):
+    """Wrap `model` for `agent_name`, attaching the shared backend if the agent opted in."""
+    cache = get_cache_backend() if is_cache_enabled(agent_name) else None
+    return CachedChatModel(model, cache=cache, agent_name=agent_name)
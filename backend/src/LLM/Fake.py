@@ -0,0 +1,57 @@
+"""
+Offline stand-in for GroqLLM.
+
+FakeLLM returns a chat model with the same `invoke(messages) -> response.content`
+surface the agents use, so agent logic (batching, JSON parsing, DB writes) can be
+exercised without network access or an API key.
+
+By default it answers the ResumeShortlistingAgent batch format: every
+"ID: <id>" block in the human message gets a deterministic score derived from
+the resume text. Pass `responder` to script any other behaviour.
+"""
+
+import hashlib
+import json
+import re
+from .Base import BaseLLM
+
+_BATCH_ITEM_RE = re.compile(r"^ID: (\S+)\nRESUME:\n(.*?)(?=^ID: |\Z)", re.MULTILINE | re.DOTALL)
+
+
+class FakeResponse:
+    def __init__(self, content: str):
+        self.content = content
+
+
+def shortlisting_responder(messages):
+    """Score each batched resume deterministically from a hash of its text."""
+    human_message = messages[-1].content
+    results = []
+    for item_id, resume in _BATCH_ITEM_RE.findall(human_message):
+        digest = hashlib.sha256(resume.strip().encode("utf-8")).digest()
+        score = digest[0] % 101
+        results.append({
+            "id": item_id,
+            "shortlisted": "yes" if score >= 75 else "no",
+            "score": score
+        })
+    return json.dumps({"results": results})
+
+
+class FakeChatModel:
+    def __init__(self, responder=None):
+        self.responder = responder or shortlisting_responder
+        self.calls = []
+
+    def invoke(self, messages):
+        self.calls.append(messages)
+        return FakeResponse(self.responder(messages))
+
+
+class FakeLLM(BaseLLM):
+    def __init__(self, model_name: str = "fake-llm", responder=None):
+        super().__init__(model_name)
+        self.responder = responder
+
+    def get_model(self):
+        return FakeChatModel(self.responder)
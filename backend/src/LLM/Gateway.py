@@ -0,0 +1,356 @@
+"""
+Process-wide LLM gateway.
+
+Every agent reaches Groq through this module (GroqLLM.get_model returns a
+GatewayChatModel), so the whole worker process shares:
+- one ChatGroq per model name, backed by one pooled httpx client; async calls
+  get their own ChatGroq, httpx.AsyncClient and semaphore per event loop
+  (an AsyncClient must not be shared across loops), held weakly and dropped
+  once the loop is closed
+- a concurrency governor capping in-flight requests
+- requests-per-minute and tokens-per-minute token buckets
+- retry with jittered exponential backoff on 429 / 5xx / connection errors
+- queue depth, in-flight, retry and latency metrics (get_metrics, served per
+  process by GET /api/llm/metrics)
+
+Configuration (environment):
+- LLM_MAX_CONCURRENCY         in-flight requests per process (default 8)
+- GROQ_REQUESTS_PER_MINUTE    request budget (default 30)
+- GROQ_TOKENS_PER_MINUTE      token budget (default 12000)
+- LLM_ESTIMATED_OUTPUT_TOKENS tokens reserved per call for the reply (default 1024)
+- LLM_MAX_RETRIES             retries after the first attempt (default 4)
+- LLM_BACKOFF_BASE_SECONDS / LLM_BACKOFF_MAX_SECONDS  backoff curve (default 1 / 30)
+- LLM_HTTP_TIMEOUT_SECONDS    per-request HTTP timeout (default 60)
+"""
+
+import asyncio
+import os
+import random
+import threading
+import time
+import weakref
+from collections import deque
+
+import httpx
+from langchain_groq import ChatGroq
+
+LLM_MAX_CONCURRENCY = int(os.getenv("LLM_MAX_CONCURRENCY", "8"))
+GROQ_REQUESTS_PER_MINUTE = int(os.getenv("GROQ_REQUESTS_PER_MINUTE", "30"))
+GROQ_TOKENS_PER_MINUTE = int(os.getenv("GROQ_TOKENS_PER_MINUTE", "12000"))
+LLM_ESTIMATED_OUTPUT_TOKENS = int(os.getenv("LLM_ESTIMATED_OUTPUT_TOKENS", "1024"))
+LLM_MAX_RETRIES = int(os.getenv("LLM_MAX_RETRIES", "4"))
+LLM_BACKOFF_BASE_SECONDS = float(os.getenv("LLM_BACKOFF_BASE_SECONDS", "1"))
+LLM_BACKOFF_MAX_SECONDS = float(os.getenv("LLM_BACKOFF_MAX_SECONDS", "30"))
+LLM_HTTP_TIMEOUT_SECONDS = float(os.getenv("LLM_HTTP_TIMEOUT_SECONDS", "60"))
+
+RETRYABLE_STATUS_CODES = {408, 409, 429, 500, 502, 503, 504}
+
+
+class TokenBucket:
+    """Thread-safe token bucket refilled continuously up to `capacity` per minute."""
+
+    def __init__(self, per_minute: int):
+        self.capacity = float(per_minute)
+        self.refill_per_second = per_minute / 60.0
+        self.tokens = float(per_minute)
+        self.updated_at = time.monotonic()
+        self._lock = threading.Lock()
+
+    def reserve(self, amount: float) -> float:
+        """
+        Take `amount` tokens and return how long the caller must wait before using them.
+        The balance may go negative, which queues later callers behind this one.
+        """
+        amount = min(amount, self.capacity)
+        with self._lock:
+            now = time.monotonic()
+            self.tokens = min(self.capacity, self.tokens + (now - self.updated_at) * self.refill_per_second)
+            self.updated_at = now
+            self.tokens -= amount
+            if self.tokens >= 0:
+                return 0.0
+            return -self.tokens / self.refill_per_second
+
+    def adjust(self, delta: float):
+        """Charge (positive) or refund (negative) tokens after the real cost is known."""
+        with self._lock:
+            self.tokens = min(self.capacity, self.tokens - delta)
+
+
+class GatewayMetrics:
+    def __init__(self, window: int = 500):
+        self._lock = threading.Lock()
+        self.queued = 0
+        self.in_flight = 0
+        self.requests = 0
+        self.failures = 0
+        self.retries = 0
+        self.tokens = 0
+        self._latencies = deque(maxlen=window)
+        self._queue_waits = deque(maxlen=window)
+
+    def enter_queue(self):
+        with self._lock:
+            self.queued += 1
+
+    def start(self, waited: float):
+        with self._lock:
+            self.queued -= 1
+            self.in_flight += 1
+            self._queue_waits.append(waited)
+
+    def finish(self, latency: float, tokens: int, ok: bool):
+        with self._lock:
+            self.in_flight -= 1
+            self.requests += 1
+            self.tokens += tokens
+            if not ok:
+                self.failures += 1
+            self._latencies.append(latency)
+
+    def retry(self):
+        with self._lock:
+            self.retries += 1
+
+    @staticmethod
+    def _percentile(values, pct):
+        if not values:
+            return 0.0
+        ordered = sorted(values)
+        return ordered[min(len(ordered) - 1, int(len(ordered) * pct))]
+
+    def snapshot(self):
+        with self._lock:
+            latencies = list(self._latencies)
+            waits = list(self._queue_waits)
+            return {
+                "queue_depth": self.queued,
+                "in_flight": self.in_flight,
+                "requests": self.requests,
+                "failures": self.failures,
+                "retries": self.retries,
+                "tokens": self.tokens,
+                "latency_p50_ms": round(self._percentile(latencies, 0.50) * 1000, 1),
+                "latency_p95_ms": round(self._percentile(latencies, 0.95) * 1000, 1),
+                "queue_wait_p95_ms": round(self._percentile(waits, 0.95) * 1000, 1),
+            }
+
+
+def _status_code(exc):
+    code = getattr(exc, "status_code", None)
+    if code is None:
+        code = getattr(getattr(exc, "response", None), "status_code", None)
+    return code
+
+
+def _is_retryable(exc):
+    code = _status_code(exc)
+    if code is not None:
+        return code in RETRYABLE_STATUS_CODES
+    # Connection resets / timeouts surface without a status code
+    return isinstance(exc, (httpx.TransportError, TimeoutError, ConnectionError)) or \
+        type(exc).__name__ in ("APIConnectionError", "APITimeoutError")
+
+
+def _retry_after(exc):
+    headers = getattr(getattr(exc, "response", None), "headers", None) or {}
+    try:
+        return float(headers.get("retry-after"))
+    except (TypeError, ValueError):
+        return None
+
+
+def _estimate_tokens(messages):
+    chars = sum(len(str(getattr(m, "content", m))) for m in messages)
+    return chars // 4 + LLM_ESTIMATED_OUTPUT_TOKENS
+
+
+def _used_tokens(response):
+    usage = getattr(response, "usage_metadata", None) or {}
+    if usage.get("total_tokens"):
+        return usage["total_tokens"]
+    token_usage = (getattr(response, "response_metadata", None) or {}).get("token_usage") or {}
+    return token_usage.get("total_tokens")
+
+
+class _LoopResources:
+    """Async state bound to one event loop."""
+
+    def __init__(self, max_concurrency, limits):
+        self.semaphore = asyncio.Semaphore(max_concurrency)
+        self.http_client = httpx.AsyncClient(limits=limits, timeout=LLM_HTTP_TIMEOUT_SECONDS)
+        self.models = {}
+
+
+class LLMGateway:
+    def __init__(self, api_key, max_concurrency=LLM_MAX_CONCURRENCY,
+                 requests_per_minute=GROQ_REQUESTS_PER_MINUTE, tokens_per_minute=GROQ_TOKENS_PER_MINUTE,
+                 max_retries=LLM_MAX_RETRIES):
+        self.api_key = api_key
+        self.max_concurrency = max_concurrency
+        self.max_retries = max_retries
+        self.request_bucket = TokenBucket(requests_per_minute)
+        self.token_bucket = TokenBucket(tokens_per_minute)
+        self.metrics = GatewayMetrics()
+
+        self._limits = httpx.Limits(max_connections=max_concurrency, max_keepalive_connections=max_concurrency)
+        self.http_client = httpx.Client(limits=self._limits, timeout=LLM_HTTP_TIMEOUT_SECONDS)
+
+        self._semaphore = threading.BoundedSemaphore(max_concurrency)
+        self._loops = weakref.WeakKeyDictionary()     # event loop -> _LoopResources
+        self._models = {}
+        self._lock = threading.Lock()
+
+    def _build_model(self, model_name, temperature, http_async_client=None):
+        return ChatGroq(
+            api_key=self.api_key,
+            model_name=model_name,
+            temperature=temperature,
+            max_retries=0,  # retries are handled by the gateway
+            http_client=self.http_client,
+            http_async_client=http_async_client,
+        )
+
+    def get_chat_model(self, model_name, temperature=0):
+        """Return the shared ChatGroq for this model (sync calls), built once on the pooled client."""
+        key = (model_name, temperature)
+        with self._lock:
+            model = self._models.get(key)
+            if model is None:
+                model = self._models[key] = self._build_model(model_name, temperature)
+            return model
+
+    def _loop_resources(self):
+        loop = asyncio.get_running_loop()
+        with self._lock:
+            # The resources reference their loop, so closed loops are dropped explicitly too
+            for closed in [other for other in self._loops if other.is_closed()]:
+                del self._loops[closed]
+            resources = self._loops.get(loop)
+            if resources is None:
+                resources = self._loops[loop] = _LoopResources(self.max_concurrency, self._limits)
+            return resources
+
+    def get_async_chat_model(self, model_name, temperature=0):
+        """Return the ChatGroq for this model on the running event loop's AsyncClient."""
+        resources = self._loop_resources()
+        key = (model_name, temperature)
+        with self._lock:
+            model = resources.models.get(key)
+            if model is None:
+                model = resources.models[key] = self._build_model(model_name, temperature, resources.http_client)
+            return model
+
+    def _backoff(self, attempt, exc):
+        retry_after = _retry_after(exc)
+        if retry_after is not None:
+            return min(retry_after, LLM_BACKOFF_MAX_SECONDS)
+        return random.uniform(0, min(LLM_BACKOFF_MAX_SECONDS, LLM_BACKOFF_BASE_SECONDS * (2 ** attempt)))
+
+    def _reserve(self, estimated):
+        return max(self.request_bucket.reserve(1), self.token_bucket.reserve(estimated))
+
+    def _settle(self, estimated, response):
+        used = _used_tokens(response)
+        if used:
+            self.token_bucket.adjust(used - estimated)
+        return used or estimated
+
+    def invoke(self, model, messages):
+        estimated = _estimate_tokens(messages)
+        attempt = 0
+        while True:
+            queued_at = time.monotonic()
+            self.metrics.enter_queue()
+            self._semaphore.acquire()
+            try:
+                wait = self._reserve(estimated)
+                if wait > 0:
+                    time.sleep(wait)
+                self.metrics.start(time.monotonic() - queued_at)
+                started_at = time.monotonic()
+                try:
+                    response = model.invoke(messages)
+                except Exception as e:
+                    self.metrics.finish(time.monotonic() - started_at, 0, ok=False)
+                    error = e
+                else:
+                    used = self._settle(estimated, response)
+                    self.metrics.finish(time.monotonic() - started_at, used, ok=True)
+                    return response
+            finally:
+                self._semaphore.release()
+
+            if attempt >= self.max_retries or not _is_retryable(error):
+                raise error
+            delay = self._backoff(attempt, error)
+            print(f"LLM call failed ({_status_code(error) or type(error).__name__}), retrying in {delay:.1f}s")
+            self.metrics.retry()
+            attempt += 1
+            time.sleep(delay)
+
+    async def ainvoke(self, model, messages):
+        estimated = _estimate_tokens(messages)
+        semaphore = self._loop_resources().semaphore
+        attempt = 0
+        while True:
+            queued_at = time.monotonic()
+            self.metrics.enter_queue()
+            async with semaphore:
+                wait = self._reserve(estimated)
+                if wait > 0:
+                    await asyncio.sleep(wait)
+                self.metrics.start(time.monotonic() - queued_at)
+                started_at = time.monotonic()
+                try:
+                    response = await model.ainvoke(messages)
+                except Exception as e:
+                    self.metrics.finish(time.monotonic() - started_at, 0, ok=False)
+                    error = e
+                else:
+                    used = self._settle(estimated, response)
+                    self.metrics.finish(time.monotonic() - started_at, used, ok=True)
+                    return response
+
+            if attempt >= self.max_retries or not _is_retryable(error):
+                raise error
+            delay = self._backoff(attempt, error)
+            self.metrics.retry()
+            attempt += 1
+            await asyncio.sleep(delay)
+
+
+class GatewayChatModel:
+    """Chat-model facade (invoke / ainvoke) that routes every call through the gateway."""
+
+    def __init__(self, gateway, model_name, temperature=0):
+        self.gateway = gateway
+        self.model_name = model_name
+        self.temperature = temperature
+
+    def invoke(self, messages):
+        return self.gateway.invoke(self.gateway.get_chat_model(self.model_name, self.temperature), messages)
+
+    async def ainvoke(self, messages):
+        return await self.gateway.ainvoke(self.gateway.get_async_chat_model(self.model_name, self.temperature),
+                                          messages)
+
+
+_gateway = None
+_gateway_lock = threading.Lock()
+
+
+def get_gateway(api_key):
+    """Return the process-wide gateway, creating it on first use."""
+    global _gateway
+    with _gateway_lock:
+        if _gateway is None:
+            _gateway = LLMGateway(api_key)
+        return _gateway
+
+
+def get_metrics():
+    """Snapshot of this process's gateway metrics, or an empty dict before the first call."""
+    if _gateway is None:
+        return {}
+    return {**_gateway.metrics.snapshot(), "event_loops": len(_gateway._loops)}
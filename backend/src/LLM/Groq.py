@@ -1,7 +1,7 @@
 import os
 from dotenv import load_dotenv
 from .Base import BaseLLM
-from langchain_groq import ChatGroq  # Assuming langchain-groq is installed
+from .Gateway import GatewayChatModel, get_gateway
 
 # Load environment variables from .env
 load_dotenv()
@@ -16,8 +16,9 @@ class GroqLLM(BaseLLM):
         self.api_key = api_key
 
     def get_model(self):
-        return ChatGroq(
-            api_key=self.api_key,
+        # All agents share one gateway: pooled HTTP client, concurrency cap, RPM/TPM buckets and retries
+        return GatewayChatModel(
+            get_gateway(self.api_key),
             model_name=self.model_name,
             temperature=0
         )
@@ -1,3 +1,6 @@
+from src.MailTemplate.TemplateEngine import compile_templates
+
+
 class EmailTemplate:
     """
     Centralized email template manager with HTML templates.
@@ -495,6 +498,98 @@ class EmailTemplate:
                 """
             },
 
+            # ---------------------------------
+            # Panel Digest (one mail per scheduled round)
+            # ---------------------------------
+            "panel_digest": {
+                "subject": "Panel Access — {round_type} Interviews ({candidate_count} Candidates) | {company_name}",
+                "row": """
+                                                        <tr>
+                                                            <td style="color: #1e40af; border-top: 1px solid #bfdbfe;">{candidate_name}</td>
+                                                            <td style="color: #1e40af; border-top: 1px solid #bfdbfe;">{interview_slot}</td>
+                                                            <td style="border-top: 1px solid #bfdbfe;">
+                                                                <a href="{panel_url}" style="color: #2563eb;">
+                                                                    Join Interview
+                                                                </a>
+                                                            </td>
+                                                        </tr>""",
+                "body": """
+                <!DOCTYPE html>
+                <html>
+                    <head>
+                        <meta charset="UTF-8">
+                        <meta name="viewport" content="width=device-width, initial-scale=1.0">
+                    </head>
+                    <body style="margin: 0; padding: 0; font-family: -apple-system, BlinkMacSystemFont, 'Segoe UI', Roboto, Arial, sans-serif; background-color: #f5f5f5;">
+                        <table width="100%" cellpadding="0" cellspacing="0" style="padding: 40px 20px;">
+                            <tr>
+                                <td align="center">
+                                    <table width="600" cellpadding="0" cellspacing="0" style="background-color: #ffffff; border-radius: 16px; box-shadow: 0 4px 6px rgba(0,0,0,0.1);">
+
+                                        <!-- Header -->
+                                        <tr>
+                                            <td style="background: linear-gradient(135deg, #000000, #434343); padding: 35px; text-align: center;">
+                                                <h1 style="margin: 0; color: #ffffff;">HiRekruit</h1>
+                                            </td>
+                                        </tr>
+
+                                        <!-- Content -->
+                                        <tr>
+                                            <td style="padding: 35px;">
+                                                <h2 style="margin-bottom: 20px; color: #1a1a1a;">
+                                                    Panel Interview Access
+                                                </h2>
+
+                                                <p style="color: #555;">
+                                                    Dear <strong>{hr_name}</strong>,
+                                                </p>
+
+                                                <p style="color: #555; line-height: 1.6;">
+                                                    You are assigned as the <strong>Panel Member</strong> for
+                                                    <strong>{candidate_count}</strong> <strong>{round_type} Round</strong> interviews at
+                                                    <strong>{company_name}</strong>, starting <strong>{interview_date}</strong>
+                                                    at <strong>{interview_time}</strong>.
+                                                </p>
+
+                                                <div style="background-color: #eff6ff; border: 2px solid #3b82f6; padding: 22px; margin: 30px 0; border-radius: 12px;">
+                                                    <p style="margin: 0 0 12px; font-weight: 600; color: #1e40af;">
+                                                        📋 Candidates
+                                                    </p>
+                                                    <table width="100%" cellpadding="6">
+                                                        <tr>
+                                                            <td style="font-weight: 600; color: #1e40af;">Candidate</td>
+                                                            <td style="font-weight: 600; color: #1e40af;">Slot</td>
+                                                            <td style="font-weight: 600; color: #1e40af;">Panel Link</td>
+                                                        </tr>{candidate_rows}
+                                                    </table>
+                                                </div>
+
+                                                <p style="color: #555; font-size: 14px;">
+                                                    Each link provides panel-level access to observe and evaluate that candidate's interview.
+                                                </p>
+
+                                                <p style="margin-top: 30px; color: #555;">
+                                                    Regards,<br>
+                                                    <strong>HiRekruit Team</strong>
+                                                </p>
+                                            </td>
+                                        </tr>
+
+                                        <tr>
+                                            <td style="background-color: #f9f9f9; padding: 20px; text-align: center; font-size: 12px; color: #999;">
+                                                © 2025 HiRekruit
+                                            </td>
+                                        </tr>
+
+                                    </table>
+                                </td>
+                            </tr>
+                        </table>
+                    </body>
+                </html>
+                """
+            },
+
             # ---------------------------------
             # Coding Assessment Invitation
             # ---------------------------------
@@ -891,7 +986,30 @@ class EmailTemplate:
 
     @staticmethod
     def get(template_key: str):
-        templates = EmailTemplate.get_templates()
-        if template_key not in templates:
+        if template_key not in _TEMPLATES:
             raise ValueError(f"Email template '{template_key}' not found")
-        return templates[template_key]
\ No newline at end of file
+        return _TEMPLATES[template_key]
+
+    @staticmethod
+    def compiled(template_key: str):
+        if template_key not in _COMPILED:
+            raise ValueError(f"Email template '{template_key}' not found")
+        return _COMPILED[template_key]
+
+    @staticmethod
+    def render(template_key: str, **values):
+        """Render {"subject", "body"} from the precompiled template."""
+        return EmailTemplate.compiled(template_key).render(**values)
+
+    @staticmethod
+    def render_batch(template_key: str, values_list, personalize=False, **common):
+        """
+        Render one {"subject", "body"} per dict in values_list; `common` is shared by all.
+        personalize=True adds "template_body"/"params" for batched Brevo sends.
+        """
+        return EmailTemplate.compiled(template_key).render_batch(values_list, personalize, **common)
+
+
+# Built and compiled once at import; malformed placeholders fail here, not mid-send
+_TEMPLATES = EmailTemplate.get_templates()
+_COMPILED = compile_templates(_TEMPLATES)
\ No newline at end of file
@@ -0,0 +1,40 @@
+from datetime import datetime
+from enum import Enum
+
+
+class CodeRunStatus(str, Enum):
+    QUEUED = "queued"          # waiting on the code evaluation queue
+    RUNNING = "running"        # claimed by a worker (leased); test case results are streamed
+    COMPLETED = "completed"
+    FAILED = "failed"          # the evaluation itself failed (not the candidate's code)
+
+
+def create_code_run(submission_id, candidate_id, drive_id, question_id, source_code, language_id,
+                    total_test_cases, early_exit=False):
+    """
+    Create a code_runs document: one "Run Code" evaluation of a question.
+    The source is copied onto the run so a newer run of the same question cannot
+    change what a queued run evaluates. The run records progress, streamed test
+    case results and the queue timings used for back-pressure metrics.
+    """
+    return {
+        "submission_id": submission_id,
+        "candidate_id": candidate_id,
+        "drive_id": drive_id,
+        "question_id": question_id,
+        "source_code": source_code,
+        "language_id": language_id,
+        "early_exit": early_exit,
+        "status": CodeRunStatus.QUEUED,
+        "total_test_cases": total_test_cases,
+        "results": [],
+        "result": None,
+        "test_cases_passed": 0,
+        "error": None,
+        "attempts": 0,             # claims; > 1 when reclaimed after an expired lease
+        "enqueued_at": datetime.utcnow(),
+        "started_at": None,
+        "completed_at": None,
+        "wait_ms": None,           # enqueued_at -> started_at
+        "run_ms": None             # started_at -> completed_at
+    }
@@ -0,0 +1,49 @@
+from datetime import datetime
+from enum import Enum
+
+
+class OutboxStatus(str, Enum):
+    PENDING = "pending"      # waiting for a dispatcher (or for its retry time)
+    SENDING = "sending"      # claimed by a dispatcher batch until lease_expires_at
+    SENT = "sent"
+    FAILED = "failed"        # gave up after EMAIL_OUTBOX_MAX_ATTEMPTS
+
+
+def outbox_key(drive_id, candidate_id, template):
+    """Idempotency key: one message per (drive, candidate, template)."""
+    return f"{drive_id}:{candidate_id}:{template}"
+
+
+def create_outbox_message(drive_id, candidate_id, template, to_email, subject, body, html=False,
+                          drive_candidate_id=None, on_sent=None, template_body=None, params=None):
+    """
+    Create an email_outbox document keyed by outbox_key().
+    on_sent holds the drive_candidates fields to $set once delivery is confirmed,
+    e.g. {"email_sent": "yes"}.
+    A personalised message (EmailTemplate.render_batch(..., personalize=True)) stores
+    template_body and params instead of the rendered body, so the dispatcher can
+    batch it with the drive's other messages; the body is filled in at send time.
+    """
+    return {
+        "_id": outbox_key(drive_id, candidate_id, template),
+        "drive_id": drive_id,
+        "candidate_id": candidate_id,
+        "drive_candidate_id": drive_candidate_id,
+        "template": template,
+        "to_email": to_email,
+        "subject": subject,
+        "body": None if template_body is not None else body,
+        "html": html,
+        "template_body": template_body,
+        "params": params,
+        "on_sent": on_sent or {},
+        "status": OutboxStatus.PENDING,
+        "attempts": 0,
+        "last_error": None,
+        "claim_id": None,
+        "lease_expires_at": None,
+        "next_attempt_at": datetime.utcnow(),
+        "created_at": datetime.utcnow(),
+        "updated_at": datetime.utcnow(),
+        "sent_at": None
+    }
@@ -0,0 +1,63 @@
+from pymongo import ASCENDING, DESCENDING
+
+# Declared indexes per collection, applied idempotently by src.Utils.IndexManager
+# (on Mongo client init and via `python -m src.Utils.IndexManager apply`).
+# Each entry is {"keys": [(field, direction), ...], **create_index options}.
+# Names are left to MongoDB's default (e.g. "drive_id_1_resume_shortlisted_1")
+# so existing indexes with the same keys are recognised and not rebuilt.
+INDEXES = {
+    "candidates": [
+        # Upserts and lookups by email in ResumeIntakeAgent / auth
+        {"keys": [("email", ASCENDING)], "unique": True},
+        # Legacy documents referenced by a candidate_id field instead of _id
+        {"keys": [("candidate_id", ASCENDING)], "sparse": True},
+    ],
+    "drive_candidates": [
+        # {"drive_id"} and {"drive_id", "resume_shortlisted" | "selected" | "evaluation_result"}
+        {"keys": [("drive_id", ASCENDING), ("resume_shortlisted", ASCENDING)]},
+        # Intake upserts and application lookups by (candidate_id, drive_id)
+        {"keys": [("candidate_id", ASCENDING), ("drive_id", ASCENDING)]},
+        # SlotScheduler booked-load scan: rounds_status $elemMatch on scheduled_date
+        {"keys": [("rounds_status.scheduled_date", ASCENDING)]},
+    ],
+    "drives": [
+        {"keys": [("job_id", ASCENDING)]},
+        {"keys": [("company_id", ASCENDING)]},
+    ],
+    "submissions": [
+        # {"candidate_id", "drive_id"} and {"candidate_id"}
+        {"keys": [("candidate_id", ASCENDING), ("drive_id", ASCENDING)]},
+        {"keys": [("drive_id", ASCENDING)]},
+        # Drive leaderboard: {"drive_id"} sorted by LEADERBOARD_SORT, read page by page
+        {"keys": [("drive_id", ASCENDING), ("questions_solved", DESCENDING),
+                  ("test_cases_passed", DESCENDING), ("total_time_taken", ASCENDING)]},
+    ],
+    "users": [
+        {"keys": [("email", ASCENDING)]},
+        {"keys": [("company_id", ASCENDING)]},
+    ],
+    "companies": [
+        # Company/HR resolution falls back from _id to company_id; signup looks up by name
+        {"keys": [("company_id", ASCENDING)]},
+        {"keys": [("name", ASCENDING)]},
+    ],
+    "email_outbox": [
+        # Dispatcher claims: due pending messages and expired leases
+        {"keys": [("status", ASCENDING), ("next_attempt_at", ASCENDING)]},
+        {"keys": [("claim_id", ASCENDING)]},
+        {"keys": [("drive_id", ASCENDING), ("status", ASCENDING)]},
+    ],
+    "code_runs": [
+        # Back-pressure metrics: waiting runs by age, recent runs by start time
+        {"keys": [("status", ASCENDING), ("enqueued_at", ASCENDING)]},
+        {"keys": [("started_at", ASCENDING)]},
+    ],
+    "execution_cache": [
+        # invalidate_question() on test case edits; expired results dropped by the TTL monitor
+        {"keys": [("question_ids", ASCENDING)]},
+        {"keys": [("expires_at", ASCENDING)], "expireAfterSeconds": 0},
+    ],
+    "interview_feedback": [
+        {"keys": [("drive_candidate_id", ASCENDING)]},
+    ],
+}
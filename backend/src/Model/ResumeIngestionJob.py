@@ -0,0 +1,50 @@
+from datetime import datetime
+from enum import Enum
+
+
+class IngestionJobStatus(str, Enum):
+    QUEUED = "queued"
+    PROCESSING = "processing"
+    COMPLETED = "completed"
+    FAILED = "failed"
+
+
+class IngestionFileStatus(str, Enum):
+    STAGED = "staged"          # bytes stored in GridFS, waiting for a worker
+    UPLOADED = "uploaded"      # text extracted and file uploaded to Cloudinary
+    PARSED = "parsed"          # candidate + drive_candidate written
+    FAILED = "failed"
+
+
+def create_ingestion_file(file_id, filename, size):
+    return {
+        "file_id": file_id,    # GridFS id of the staged bytes
+        "filename": filename,
+        "size": size,
+        "status": IngestionFileStatus.STAGED,
+        "error": None,
+        "resume_url": None,
+        "candidate_id": None,
+        "updated_at": datetime.utcnow()
+    }
+
+
+def create_ingestion_job(drive_id, skills, job_role, files):
+    """
+    Create a resume ingestion job document.
+    files is a list built with create_ingestion_file; its order is the upload order.
+    """
+    return {
+        "drive_id": drive_id,
+        "skills": skills,
+        "job_role": job_role,
+        "status": IngestionJobStatus.QUEUED,
+        "files": files,
+        "total_files": len(files),
+        "processed_files": 0,
+        "failed_files": 0,
+        "error": None,
+        "created_at": datetime.utcnow(),
+        "updated_at": datetime.utcnow(),
+        "completed_at": None
+    }
@@ -18,6 +18,7 @@ class SubmissionResult(str, Enum):
     TIME_LIMIT_EXCEEDED = "Time Limit Exceeded"
     MEMORY_LIMIT_EXCEEDED = "Memory Limit Exceeded"
     ERROR = "Error"
+    SKIPPED = "Skipped"  # not run: an early-exit run stopped at a failing public test case
 
 class ProgrammingLanguage(str, Enum):
     """Supported programming languages"""
@@ -192,6 +193,7 @@ def create_submission(
         "total_questions": total_questions,
         "questions_solved": questions_solved,
         "score_percentage": round(score_percentage, 2),
+        "test_cases_passed": 0,  # across all questions; leaderboard tie-break
         "total_time_taken": total_time_taken,
         
         # Question Submissions Array
@@ -427,18 +429,26 @@ def get_language_id(language: str) -> int:
     return language_id
 
 
-def calculate_submission_statistics(question_submissions: List[Dict]) -> Dict[str, Any]:
+def calculate_submission_statistics(
+    question_submissions: List[Dict],
+    total_questions: Optional[int] = None
+) -> Dict[str, Any]:
     """
     Calculate statistics from question submissions.
     
     Args:
         question_submissions: List of question submission objects
+        total_questions: Questions in the assessment (the submission's total_questions).
+                         The score is relative to it, as in submission_totals_pipeline;
+                         defaults to the number of questions attempted.
     
     Returns:
         dict: Statistics including solved count, total time, etc.
     
     Example:
-        >>> stats = calculate_submission_statistics(submission["question_submissions"])
+        >>> stats = calculate_submission_statistics(
+        ...     submission["question_submissions"], submission["total_questions"]
+        ... )
         >>> print(stats)
         {
             "total_questions": 3,
@@ -448,7 +458,8 @@ def calculate_submission_statistics(question_submissions: List[Dict]) -> Dict[st
             "all_completed": True
         }
     """
-    total_questions = len(question_submissions)
+    if not total_questions:
+        total_questions = len(question_submissions)
     
     questions_solved = sum(
         1 for qs in question_submissions 
@@ -519,6 +530,45 @@ def validate_submission_data(submission_data: Dict[str, Any]) -> tuple[bool, Opt
     return True, None
 
 
+def submission_totals_pipeline() -> List[Dict[str, Any]]:
+    """
+    Update pipeline that recomputes a submission's totals from its
+    question_submissions on the server, in one atomic update.
+
+    Concurrent question runs each apply it after writing their own result, so
+    the last one to finish always sees every result; nothing is read into
+    Python. The score is relative to total_questions (the drive's questions),
+    as in create_submission.
+
+    Example:
+        >>> db.submissions.update_one({"_id": submission_id}, submission_totals_pipeline())
+    """
+    return [
+        {"$set": {
+            "questions_solved": {"$size": {"$filter": {
+                "input": {"$ifNull": ["$question_submissions", []]},
+                "cond": {"$eq": ["$$this.result", SubmissionResult.ACCEPTED.value]}
+            }}},
+            "test_cases_passed": {"$sum": "$question_submissions.test_cases_passed"},
+            "total_time_taken": {"$sum": "$question_submissions.time_taken"},
+            "updated_at": "$$NOW"
+        }},
+        {"$set": {
+            "score_percentage": {"$round": [
+                {"$multiply": [
+                    {"$divide": ["$questions_solved", {"$max": ["$total_questions", 1]}]},
+                    100
+                ]},
+                2
+            ]}
+        }}
+    ]
+
+
+# Leaderboard order: most questions solved, then most test cases passed, then least time
+LEADERBOARD_SORT = [("questions_solved", -1), ("test_cases_passed", -1), ("total_time_taken", 1)]
+
+
 def format_submission_response(submission_doc: Dict[str, Any]) -> Dict[str, Any]:
     """
     Format submission document for API response.
@@ -570,6 +620,7 @@ SUBMISSION_SCHEMA = {
     "total_questions": "int (required) - Total questions in assessment",
     "questions_solved": "int - Questions with result='Accepted'",
     "score_percentage": "float - Overall score (0-100)",
+    "test_cases_passed": "int - Test cases passed across all questions",
     "total_time_taken": "int - Total time in seconds",
     
     # Status & Timestamps
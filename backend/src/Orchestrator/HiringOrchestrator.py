@@ -6,7 +6,7 @@ from src.Agents.EmailingAgent import EmailingAgent
 from src.Agents.InterviewSchedulingAgent import InterviewSchedulingAgent
 from src.Utils.EmailService import EmailService
 from src.Utils.AsyncEmailService import AsyncEmailService
-from src.Utils.BrevoEmailService import BrevoEmailService
+from src.Utils.BrevoEmailService import BrevoEmailService, get_brevo_email_service
 
 from dotenv import load_dotenv
 
@@ -24,8 +24,9 @@ def create_driveCandidate(file_paths, keywords, job_role, drive_id):
     # print("Starting drive candidate process")
     # ResumeIntakeAgent processes resumes and extracts candidate information
     resume_agent = ResumeIntakeAgent()
-    candidates = resume_agent.process_resumes(file_paths,drive_id)
-    return candidates
+    # Per-resume results in upload order; failed extractions are reported, not dropped
+    results = resume_agent.process_resumes(file_paths,drive_id)
+    return results
 
 # Shortlisting agent shortlists candidates based on keywords and job role
 def shortlist_candidates(candidates, keywords, job_role):
@@ -47,7 +48,7 @@ def email_candidates(drive_id):
     # email_service = AsyncEmailService(SMTP_SERVER, SMTP_PORT, EMAIL_USER, EMAIL_PASSWORD)
     
     # for BrevoEmailService
-    email_service = BrevoEmailService()
+    email_service = get_brevo_email_service()
     #............................
 
     emailing_agent = EmailingAgent(email_service)
@@ -66,7 +67,7 @@ def schedule_interviews(drive_id, round_type):
     # email_service = AsyncEmailService(SMTP_SERVER, SMTP_PORT, EMAIL_USER, EMAIL_PASSWORD)
 
     # for BrevoEmailService
-    email_service = BrevoEmailService()
+    email_service = get_brevo_email_service()
 
     interview_scheduling_agent = InterviewSchedulingAgent(email_service)
 
@@ -84,7 +85,7 @@ def send_final_selection_emails(drive_id):
     # email_service = AsyncEmailService(SMTP_SERVER, SMTP_PORT, EMAIL_USER, EMAIL_PASSWORD)
 
     # for BrevoEmailService
-    email_service = BrevoEmailService()
+    email_service = get_brevo_email_service()
     
     emailing_agent = EmailingAgent(email_service)
 
@@ -102,7 +103,7 @@ def schedule_coding_assessment(drive_id, round_type) :
     # email_service = AsyncEmailService(SMTP_SERVER, SMTP_PORT, EMAIL_USER, EMAIL_PASSWORD)
 
     # for BrevoEmailService
-    email_service = BrevoEmailService()
+    email_service = get_brevo_email_service()
 
     interview_scheduling_agent = InterviewSchedulingAgent(email_service)
 
@@ -1,5 +1,5 @@
 from flask import Blueprint, request, jsonify
-from src.Controllers.chatbot_controller import handle_chatbot_query
+from src.Controllers.chatbot_controller import handle_chatbot_query, get_chatbot_status
 
 chatbot_bp = Blueprint("chatbot", __name__)
 
@@ -17,3 +17,11 @@ def chatbot_query():
         return jsonify({"response": response})
     except Exception as e:
         return jsonify({"error": str(e)}), 500
+
+
+@chatbot_bp.route("/status", methods=["GET"])
+def chatbot_status():
+    try:
+        return jsonify(get_chatbot_status())
+    except Exception as e:
+        return jsonify({"error": str(e)}), 500
@@ -1,5 +1,5 @@
 from flask import Blueprint, request, jsonify
-from src.Controllers.companyinfo_controller import (handle_comapnyinfo_query,get_all_companies)
+from src.Controllers.companyinfo_controller import (handle_comapnyinfo_query,get_all_companies,refresh_company_context)
 
 companyinfo_bp = Blueprint("companyinfo", __name__)
 
@@ -20,4 +20,8 @@ def companyinfo_query():
 
 @companyinfo_bp.route("/companies", methods=["GET"])
 def handle_get_all_companies():
-    return get_all_companies()
\ No newline at end of file
+    return get_all_companies()
+
+@companyinfo_bp.route("/companies/<company_id>/refresh-context", methods=["POST"])
+def handle_refresh_company_context(company_id):
+    return refresh_company_context(company_id)
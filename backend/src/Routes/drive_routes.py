@@ -10,6 +10,7 @@ from src.Controllers.drive_controller import (
     update_round_deadlines,
     get_drive_candidates,
     get_drive_candidates_by_job,
+    get_drive_funnel,
     remove_application_by_job,
     get_drive_id_by_job,
     get_shortlisted_candidates_by_job,
@@ -34,6 +35,9 @@ drive_bp.route("/company/<company_id>", methods=["GET"])(get_drives_by_company)
 # Get candidates for a specific drive
 drive_bp.route("/<drive_id>/candidates", methods=["GET"])(get_drive_candidates)
 
+# Get the candidate funnel counters for a drive
+drive_bp.route("/<drive_id>/stats", methods=["GET"])(get_drive_funnel)
+
 # Get candidates for a job id (find drive by job_id and return its candidates)
 @drive_bp.route("/job/<job_id>/candidates", methods=["GET"])
 def get_candidates_by_job(job_id):
@@ -0,0 +1,12 @@
+from flask import Blueprint, jsonify
+from src.Controllers.llm_controller import get_llm_metrics
+
+llm_bp = Blueprint("llm", __name__)
+
+
+@llm_bp.route("/metrics", methods=["GET"])
+def llm_metrics():
+    try:
+        return jsonify(get_llm_metrics())
+    except Exception as e:
+        return jsonify({"error": str(e)}), 500
@@ -1,5 +1,5 @@
 from flask import Blueprint
-from src.Controllers.resume_controllers import upload_resumes, view_resume_inline, download_resume
+from src.Controllers.resume_controllers import upload_resumes, get_upload_job_status, view_resume_inline, download_resume
 from src.Controllers.allresumes_controller import get_all_drives_candidates_controller , get_drive_candidates_controller
 
 resume_bp = Blueprint('resume', __name__)
@@ -10,6 +10,11 @@ def handle_upload_resumes():
     print("Upload resumes endpoint hit")
     return upload_resumes()
 
+# Route to poll a resume upload (ingestion) job
+@resume_bp.route('/upload-jobs/<job_id>', methods=['GET'])
+def handle_upload_job_status(job_id):
+    return get_upload_job_status(job_id)
+
 
 # In your routes file
 @resume_bp.route('/<drive_id>/candidates', methods=['GET'])
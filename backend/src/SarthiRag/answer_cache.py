@@ -0,0 +1,201 @@
+"""
+Semantic answer cache for the Sarthi chatbot.
+
+HR users ask the same few questions in slightly different words. Before
+calling the LLM, ChatBotAgent looks the message up here: the normalized
+message is embedded and compared (cosine similarity) with the messages of
+earlier answers in a small in-process index. The best match at or above
+SARTHI_ANSWER_CACHE_THRESHOLD is returned without an LLM call.
+
+- Entries expire after SARTHI_ANSWER_CACHE_TTL_SECONDS; beyond
+  SARTHI_ANSWER_CACHE_MAX_ENTRIES the least recently used entry is evicted.
+- Every entry belongs to a knowledge base version (see
+  SarthiRAG.knowledge_base_version). The version is checked at most every
+  SARTHI_ANSWER_CACHE_VERSION_POLL_SECONDS; when a re-ingest changed it the
+  whole cache is dropped.
+- Every hit is logged with its score, the threshold and the matched message.
+  Misses whose best score came within SARTHI_ANSWER_CACHE_NEAR_MISS of the
+  threshold are logged too, so the threshold can be tuned from the logs.
+
+Configuration (environment):
+- SARTHI_ANSWER_CACHE_ENABLED:              "true"/"false"; unset enables it only with RAG, so the
+                                            model-free fallback bot never loads the embedding model
+- SARTHI_ANSWER_CACHE_THRESHOLD:            minimum cosine similarity for a hit (default 0.92)
+- SARTHI_ANSWER_CACHE_TTL_SECONDS:          lifetime of a cached answer (default 86400)
+- SARTHI_ANSWER_CACHE_MAX_ENTRIES:          cached answers kept (default 512)
+- SARTHI_ANSWER_CACHE_VERSION_POLL_SECONDS: minimum seconds between knowledge base version checks (default 30)
+- SARTHI_ANSWER_CACHE_NEAR_MISS:            log misses scoring within this of the threshold (default 0.05)
+"""
+
+import os
+import re
+import threading
+import time
+import unicodedata
+from dataclasses import dataclass
+
+import numpy as np
+
+SARTHI_ANSWER_CACHE_ENABLED = os.getenv("SARTHI_ANSWER_CACHE_ENABLED", "").lower()
+SARTHI_ANSWER_CACHE_THRESHOLD = float(os.getenv("SARTHI_ANSWER_CACHE_THRESHOLD", "0.92"))
+SARTHI_ANSWER_CACHE_TTL_SECONDS = float(os.getenv("SARTHI_ANSWER_CACHE_TTL_SECONDS", "86400"))
+SARTHI_ANSWER_CACHE_MAX_ENTRIES = int(os.getenv("SARTHI_ANSWER_CACHE_MAX_ENTRIES", "512"))
+SARTHI_ANSWER_CACHE_VERSION_POLL_SECONDS = float(os.getenv("SARTHI_ANSWER_CACHE_VERSION_POLL_SECONDS", "30"))
+SARTHI_ANSWER_CACHE_NEAR_MISS = float(os.getenv("SARTHI_ANSWER_CACHE_NEAR_MISS", "0.05"))
+
+
+def answer_cache_enabled(fallback):
+    """Whether a chatbot should use the cache; by default only RAG bots, which load the model anyway."""
+    if SARTHI_ANSWER_CACHE_ENABLED in ("true", "false"):
+        return SARTHI_ANSWER_CACHE_ENABLED == "true"
+    return not fallback
+
+
+def normalize_message(message):
+    """Lowercase, unify quotes/width, collapse whitespace and drop trailing punctuation."""
+    text = unicodedata.normalize("NFKC", message or "").lower()
+    text = re.sub(r"[‘’“”]", "'", text)
+    text = re.sub(r"\s+", " ", text).strip()
+    return text.rstrip("?!. ").strip()
+
+
+@dataclass
+class _Entry:
+    message: str
+    reply: str
+    created_at: float
+    last_used: float
+    hits: int = 0
+
+
+@dataclass
+class AnswerLookup:
+    """Result of lookup(); pass it to store() to cache the reply of a miss without re-embedding."""
+    message: str
+    vector: np.ndarray
+    version: str
+    reply: str = None
+    score: float = None
+
+
+class SemanticAnswerCache:
+
+    def __init__(self, embeddings, version_source, threshold=None, ttl_seconds=None, max_entries=None,
+                 version_poll_seconds=None):
+        self.embeddings = embeddings
+        self.version_source = version_source
+        self.threshold = SARTHI_ANSWER_CACHE_THRESHOLD if threshold is None else threshold
+        self.ttl = SARTHI_ANSWER_CACHE_TTL_SECONDS if ttl_seconds is None else ttl_seconds
+        self.max_entries = max_entries or SARTHI_ANSWER_CACHE_MAX_ENTRIES
+        self.version_poll = (SARTHI_ANSWER_CACHE_VERSION_POLL_SECONDS
+                             if version_poll_seconds is None else version_poll_seconds)
+
+        self._lock = threading.Lock()
+        self._entries = []          # _Entry, row i of self._vectors
+        self._vectors = None        # float32 [len(entries), dim], L2-normalized
+        self._version = None
+        self._version_checked_at = 0.0
+        self.stats = {"hits": 0, "misses": 0, "stored": 0, "expired": 0, "evicted": 0, "invalidations": 0}
+
+    # ---------- versioning ----------
+
+    def _current_version(self):
+        now = time.monotonic()
+        if self._version is not None and now - self._version_checked_at < self.version_poll:
+            return self._version
+        self._version_checked_at = now
+        version = str(self.version_source())
+        if self._version is not None and version != self._version:
+            self.invalidate(reason=f"knowledge base version {self._version} -> {version}")
+        self._version = version
+        return version
+
+    def invalidate(self, reason="manual"):
+        with self._lock:
+            dropped = len(self._entries)
+            self._entries, self._vectors = [], None
+            self.stats["invalidations"] += 1
+        print(f"Sarthi answer cache invalidated ({reason}); {dropped} entries dropped")
+
+    # ---------- index maintenance (caller holds the lock) ----------
+
+    def _remove(self, rows):
+        rows = set(rows)
+        keep = [i for i in range(len(self._entries)) if i not in rows]
+        self._entries = [self._entries[i] for i in keep]
+        self._vectors = self._vectors[keep] if keep else None
+
+    def _expire(self, now):
+        expired = [i for i, entry in enumerate(self._entries) if now - entry.created_at > self.ttl]
+        if expired:
+            self._remove(expired)
+            self.stats["expired"] += len(expired)
+
+    # ---------- public API ----------
+
+    def lookup(self, message):
+        """AnswerLookup with .reply set on a hit (reply None on a miss)."""
+        version = self._current_version()
+        normalized = normalize_message(message)
+        vector = np.asarray(self.embeddings.embed_query(normalized), dtype=np.float32)
+        norm = np.linalg.norm(vector)
+        vector = vector / norm if norm else vector
+        lookup = AnswerLookup(message=normalized, vector=vector, version=version)
+
+        now = time.time()
+        with self._lock:
+            self._expire(now)
+            if self._vectors is None:
+                self.stats["misses"] += 1
+                return lookup
+            scores = self._vectors @ vector
+            best = int(np.argmax(scores))
+            lookup.score = float(scores[best])
+            entry = self._entries[best]
+            if lookup.score >= self.threshold:
+                entry.hits += 1
+                entry.last_used = now
+                lookup.reply = entry.reply
+                self.stats["hits"] += 1
+            else:
+                self.stats["misses"] += 1
+
+        if lookup.reply is not None:
+            print(f"Sarthi answer cache hit: score {lookup.score:.3f} (threshold {self.threshold}) "
+                  f"'{normalized}' ~ '{entry.message}' (age {int(now - entry.created_at)}s, hit #{entry.hits})")
+        elif lookup.score >= self.threshold - SARTHI_ANSWER_CACHE_NEAR_MISS:
+            print(f"Sarthi answer cache near miss: score {lookup.score:.3f} (threshold {self.threshold}) "
+                  f"'{normalized}' ~ '{entry.message}'")
+        return lookup
+
+    def store(self, lookup, reply):
+        """Cache the reply for a missed lookup (ignored if the knowledge base changed meanwhile)."""
+        if not reply or lookup.reply is not None or lookup.version != self._version:
+            return
+        now = time.time()
+        with self._lock:
+            if self._vectors is not None and float(np.max(self._vectors @ lookup.vector)) >= 0.9999:
+                return  # a concurrent request already cached this message
+            self._entries.append(_Entry(lookup.message, reply, now, now))
+            row = lookup.vector[None, :]
+            self._vectors = row if self._vectors is None else np.vstack([self._vectors, row])
+            self.stats["stored"] += 1
+            if len(self._entries) > self.max_entries:
+                self._expire(now)
+            overflow = len(self._entries) - self.max_entries
+            if overflow > 0:
+                lru = sorted(range(len(self._entries)), key=lambda i: self._entries[i].last_used)[:overflow]
+                self._remove(lru)
+                self.stats["evicted"] += overflow
+
+    def status(self):
+        lookups = self.stats["hits"] + self.stats["misses"]
+        return {
+            "entries": len(self._entries),
+            "threshold": self.threshold,
+            "ttl_seconds": self.ttl,
+            "max_entries": self.max_entries,
+            "knowledge_base_version": self._version,
+            **self.stats,
+            "hit_rate": round(self.stats["hits"] / lookups, 3) if lookups else None,
+        }
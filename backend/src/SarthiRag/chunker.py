@@ -0,0 +1,192 @@
+"""
+Header-aware markdown chunking for the Sarthi knowledge base.
+
+A document is split into sections at markdown headers (ignoring lines inside
+code fences). Sections shorter than SARTHI_CHUNK_MIN_CHARS are merged into
+the section that follows them, so an introduction stays with its first
+subsection. Sections longer than SARTHI_CHUNK_MAX_CHARS are split on blank
+lines (then lines, then words) into windows that repeat the last
+SARTHI_CHUNK_OVERLAP_CHARS of the previous window.
+
+Every chunk starts with the header lines of its parent sections, so it is
+self-describing when retrieved on its own. Chunks carry a content hash
+(source + text) that ingest.py uses to embed only new or changed chunks.
+
+Configuration (environment):
+- SARTHI_CHUNK_MAX_CHARS:     target maximum chunk length (default 1000)
+- SARTHI_CHUNK_OVERLAP_CHARS: text repeated between consecutive windows of a section (default 150)
+- SARTHI_CHUNK_MIN_CHARS:     sections shorter than this are merged forward (default 200)
+"""
+
+import hashlib
+import os
+import re
+from dataclasses import dataclass, field
+
+SARTHI_CHUNK_MAX_CHARS = int(os.getenv("SARTHI_CHUNK_MAX_CHARS", "1000"))
+SARTHI_CHUNK_OVERLAP_CHARS = int(os.getenv("SARTHI_CHUNK_OVERLAP_CHARS", "150"))
+SARTHI_CHUNK_MIN_CHARS = int(os.getenv("SARTHI_CHUNK_MIN_CHARS", "200"))
+
+HEADER_RE = re.compile(r"^(#{1,6})\s+(.*?)\s*#*\s*$")
+FENCE_RE = re.compile(r"^\s*(```|~~~)")
+
+
+@dataclass
+class Chunk:
+    source: str
+    index: int
+    section: str           # "Parent > Child" header titles
+    text: str
+    hash: str = field(init=False)
+
+    def __post_init__(self):
+        self.hash = hashlib.sha256(f"{self.source}\0{self.text}".encode("utf-8")).hexdigest()
+
+    @property
+    def metadata(self):
+        return {"source": self.source, "section": self.section, "chunk_index": self.index, "chunk_hash": self.hash}
+
+
+@dataclass
+class _Section:
+    ancestors: list        # header lines of the enclosing sections
+    header: str            # this section's header line ("" before the first header)
+    titles: list           # plain header titles, outermost first
+    body: str
+
+    @property
+    def text(self):
+        return "\n\n".join(part for part in (self.header, self.body) if part)
+
+
+def _title(header_text):
+    return re.sub(r"[*_`]", "", header_text).strip()
+
+
+def _sections(markdown):
+    sections = []
+    stack = []             # (level, header line, title)
+    header, lines = "", []
+    in_fence = False
+
+    def close():
+        body = "\n".join(lines).strip()
+        if header or body:
+            sections.append(_Section(
+                ancestors=[line for _, line, _ in stack[:-1]] if header else [],
+                header=header,
+                titles=[title for _, _, title in stack],
+                body=body,
+            ))
+
+    for line in markdown.splitlines():
+        if FENCE_RE.match(line):
+            in_fence = not in_fence
+        match = None if in_fence else HEADER_RE.match(line)
+        if not match:
+            lines.append(line)
+            continue
+        close()
+        level = len(match.group(1))
+        while stack and stack[-1][0] >= level:
+            stack.pop()
+        header, lines = line.strip(), []
+        stack.append((level, header, _title(match.group(2))))
+    close()
+    return sections
+
+
+def _merge_small(sections, min_chars):
+    """Merge sections shorter than min_chars into the next one (keeping the first one's context)."""
+    merged = []
+    pending = None
+    for section in sections:
+        if pending is not None:
+            section = _Section(pending.ancestors, pending.header, pending.titles,
+                               "\n\n".join(p for p in (pending.body, section.text) if p))
+            pending = None
+        if len(section.text) < min_chars:
+            pending = section
+        else:
+            merged.append(section)
+    if pending is not None:
+        if merged:
+            last = merged.pop()
+            pending = _Section(last.ancestors, last.header, last.titles, f"{last.body}\n\n{pending.text}".strip())
+        merged.append(pending)
+    return merged
+
+
+def _pieces(text, max_chars):
+    """Split text into pieces no longer than max_chars: paragraphs, then lines, then words."""
+    pieces = []
+    for paragraph in re.split(r"\n\s*\n", text):
+        paragraph = paragraph.strip()
+        if not paragraph:
+            continue
+        if len(paragraph) <= max_chars:
+            pieces.append(paragraph)
+            continue
+        for line in paragraph.splitlines():
+            if len(line) <= max_chars:
+                pieces.append(line)
+                continue
+            words, current = line.split(), ""
+            for word in words:
+                if current and len(current) + 1 + len(word) > max_chars:
+                    pieces.append(current)
+                    current = word
+                else:
+                    current = f"{current} {word}".strip()
+            if current:
+                pieces.append(current)
+    return pieces
+
+
+def _overlap_tail(pieces, overlap_chars):
+    """Trailing pieces (or the tail of the last one, cut at a word) totalling at most overlap_chars."""
+    if overlap_chars <= 0 or not pieces:
+        return []
+    tail, size = [], 0
+    for piece in reversed(pieces):
+        if size + len(piece) > overlap_chars:
+            break
+        tail.insert(0, piece)
+        size += len(piece) + 2
+    if not tail:
+        cut = pieces[-1][-overlap_chars:]
+        tail = [cut[cut.find(" ") + 1:] if " " in cut else cut]
+    return tail
+
+
+def _windows(body, budget, overlap_chars):
+    pieces = _pieces(body, budget)
+    windows, current = [], []
+    for piece in pieces:
+        if current and len("\n\n".join(current + [piece])) > budget:
+            windows.append(current)
+            current = _overlap_tail(current, overlap_chars)
+            if len("\n\n".join(current + [piece])) > budget:
+                current = []
+        current.append(piece)
+    if current:
+        windows.append(current)
+    return ["\n\n".join(window) for window in windows]
+
+
+def chunk_markdown(markdown, source, max_chars=None, overlap_chars=None, min_chars=None):
+    """Split one markdown document into [Chunk], in document order."""
+    max_chars = max_chars or SARTHI_CHUNK_MAX_CHARS
+    overlap_chars = SARTHI_CHUNK_OVERLAP_CHARS if overlap_chars is None else overlap_chars
+    min_chars = SARTHI_CHUNK_MIN_CHARS if min_chars is None else min_chars
+
+    chunks = []
+    for section in _merge_small(_sections(markdown), min_chars):
+        context = "\n".join(section.ancestors + ([section.header] if section.header else []))
+        budget = max(max_chars - len(context) - 2, max_chars // 2)
+        section_name = " > ".join(section.titles)
+        for window in _windows(section.body, budget, overlap_chars) or [""]:
+            text = "\n\n".join(part for part in (context, window) if part)
+            if text:
+                chunks.append(Chunk(source, len(chunks), section_name, text))
+    return chunks
@@ -0,0 +1,170 @@
+"""
+Versioned cache of SarthiRAG's static (governance) context.
+
+The static documents change only when ingest.py runs, so they are loaded once
+and kept together with the prompt segments built from them. ingest.py writes
+a version stamp (ingest_meta {"_id": "static_docs"}) after refreshing
+static_docs. The cache only re-reads the documents when that stamp changes:
+
+- polling (default): at most one find_one on the stamp every
+  SARTHI_STATIC_CONTEXT_POLL_SECONDS, piggybacked on incoming messages;
+- change stream (SARTHI_STATIC_CONTEXT_WATCH=true, needs a replica set such as
+  Atlas): a daemon thread watches ingest_meta and marks the cache stale on
+  every write. Falls back to polling if the stream cannot be opened or dies.
+
+In embedded (offline) mode the static docs are read from the docs/ files and
+the version is their (name, size, mtime) signature.
+
+Configuration (environment):
+- SARTHI_STATIC_CONTEXT_POLL_SECONDS: minimum seconds between version checks (default 30; 0 checks every message)
+- SARTHI_STATIC_CONTEXT_WATCH:        "true" to use a change stream instead of polling (default false)
+"""
+
+import os
+import threading
+import time
+from datetime import datetime
+
+SARTHI_STATIC_CONTEXT_POLL_SECONDS = float(os.getenv("SARTHI_STATIC_CONTEXT_POLL_SECONDS", "30"))
+SARTHI_STATIC_CONTEXT_WATCH = os.getenv("SARTHI_STATIC_CONTEXT_WATCH", "false").lower() == "true"
+
+INGEST_META_COLLECTION = "ingest_meta"
+STATIC_VERSION_ID = "static_docs"
+# Bumped by ingest.py whenever static docs or dynamic chunks changed (e.g. to drop cached answers)
+KNOWLEDGE_BASE_VERSION_ID = "knowledge_base"
+
+
+def _write_version(db, version_id):
+    version = f"{time.time_ns():x}"
+    db[INGEST_META_COLLECTION].update_one(
+        {"_id": version_id},
+        {"$set": {"version": version, "updated_at": datetime.utcnow()}},
+        upsert=True
+    )
+    return version
+
+
+def read_version(db, version_id):
+    doc = db[INGEST_META_COLLECTION].find_one({"_id": version_id}, {"version": 1})
+    return doc["version"] if doc else None
+
+
+def write_static_version(db):
+    """Stamp a static_docs refresh (called by ingest.py). Returns the new version."""
+    return _write_version(db, STATIC_VERSION_ID)
+
+
+def write_knowledge_base_version(db):
+    """Stamp a change of the knowledge base (called by ingest.py). Returns the new version."""
+    return _write_version(db, KNOWLEDGE_BASE_VERSION_ID)
+
+
+class MongoStaticSource:
+    """Static docs in static_docs, versioned by the ingest_meta stamp."""
+
+    def __init__(self, db, static_collection):
+        self.db = db
+        self.meta = db[INGEST_META_COLLECTION]
+        self.static_collection = static_collection
+
+    def version(self):
+        return read_version(self.db, STATIC_VERSION_ID)
+
+    def load(self):
+        # Same order as FileStaticSource (ingest.py upserts by source)
+        docs = self.static_collection.find({}, {"_id": 0, "content": 1}).sort("source", 1)
+        return [doc["content"] for doc in docs]
+
+    def watch(self, on_change):
+        """Block on a change stream of the stamp; on_change() for every write."""
+        with self.meta.watch([{"$match": {"documentKey._id": STATIC_VERSION_ID}}]) as stream:
+            for _ in stream:
+                on_change()
+
+
+class FileStaticSource:
+    """Static docs read straight from the docs/ files (embedded mode)."""
+
+    def __init__(self, paths):
+        self.paths = list(paths)
+
+    def version(self):
+        signature = []
+        for path in self.paths:
+            stat = path.stat()
+            signature.append(f"{path.name}:{stat.st_size}:{stat.st_mtime_ns}")
+        return "|".join(signature)
+
+    def load(self):
+        return [path.read_text(encoding="utf-8") for path in self.paths]
+
+
+class StaticContextCache:
+    """
+    Holds the static context and the prompt segments built from it.
+    build(static_context) returns whatever should be cached per version
+    (here: the prompt prefix/suffix); get() returns it, refreshed if stale.
+    """
+
+    def __init__(self, source, build, poll_seconds=None, watch=None):
+        self.source = source
+        self.build = build
+        self.poll_seconds = SARTHI_STATIC_CONTEXT_POLL_SECONDS if poll_seconds is None else poll_seconds
+        self._lock = threading.Lock()
+        self._value = None
+        self._version = None
+        self._checked_at = 0.0
+        self._stale = True
+        self._watching = False
+        self.loads = 0
+
+        if (SARTHI_STATIC_CONTEXT_WATCH if watch is None else watch) and hasattr(source, "watch"):
+            self._watching = True
+            threading.Thread(target=self._watch, name="SarthiStaticContextWatch", daemon=True).start()
+
+    def _watch(self):
+        try:
+            self.source.watch(self.invalidate)
+        except Exception as e:
+            print(f"Static context change stream unavailable ({e}); polling every {self.poll_seconds}s")
+        self._watching = False
+        self.invalidate()
+
+    def invalidate(self):
+        self._stale = True
+
+    def _due(self):
+        if self._stale or self._value is None:
+            return True
+        if self._watching:
+            return False
+        return time.monotonic() - self._checked_at >= self.poll_seconds
+
+    def _refresh(self):
+        self._stale = False
+        self._checked_at = time.monotonic()
+        version = self.source.version()
+        if self._value is not None and version == self._version:
+            return
+        static_context = "\n\n".join(self.source.load())
+        self._value = self.build(static_context)
+        self._version = version
+        self.loads += 1
+        print(f"Sarthi static context loaded (version {version}, {len(static_context)} chars)")
+
+    def get(self):
+        if self._due():
+            with self._lock:
+                if self._due():
+                    try:
+                        self._refresh()
+                    except Exception as e:
+                        if self._value is None:
+                            raise
+                        # Keep serving the last good context; check again next interval
+                        print(f"Static context refresh failed, keeping version {self._version}: {e}")
+        return self._value
+
+    @property
+    def version(self):
+        return self._version
@@ -0,0 +1,400 @@
+"""
+Shared embedding service for SarthiRAG.
+
+One EmbeddingService per model and process (get_embedding_service()) owns the
+SentenceTransformer and is used by every SentenceTransformerEmbeddings:
+
+- Warm-up: with SARTHI_EMBED_WARMUP=true the model is loaded (and run once)
+  in a background thread when the web process boots, instead of on the
+  first chat query.
+- Micro-batching: embed_query() calls from concurrent request threads are
+  queued and encoded together by one dispatcher thread. A batch is closed
+  after SARTHI_EMBED_BATCH_WINDOW_MS or at SARTHI_EMBED_MAX_BATCH queries.
+  Identical queries in flight share one encode.
+- Cache: vectors are cached by sha256(model name + text), in an in-process
+  LRU (SARTHI_EMBED_CACHE_SIZE entries) and on disk (SARTHI_EMBED_CACHE_DIR,
+  one .npy per text), so a restart does not re-encode known texts. Only
+  embed_documents() writes to disk (knowledge base chunks, a bounded set);
+  query vectors stay in memory. Beyond SARTHI_EMBED_DISK_CACHE_MAX_FILES the
+  least recently written files are deleted.
+- Degraded mode: if the model cannot be loaded, calls raise
+  EmbeddingUnavailableError. Nothing returns placeholder vectors. Loading is
+  retried at most every SARTHI_EMBED_RETRY_SECONDS; status() reports the state.
+
+Throughput benchmark (embeddings/second per batch size, and concurrent
+queries with and without micro-batching):
+    python -m src.SarthiRag.embeddings.embedding_service benchmark [--texts 512] [--threads 16]
+
+Configuration (environment):
+- SARTHI_EMBED_MODEL:           SentenceTransformer model (default "all-MiniLM-L6-v2")
+- SARTHI_EMBED_WARMUP:          "true" to load the model at boot (default false)
+- SARTHI_EMBED_BATCH_WINDOW_MS: how long a query batch stays open (default 5; 0 disables waiting)
+- SARTHI_EMBED_MAX_BATCH:       maximum texts per encode call (default 64)
+- SARTHI_EMBED_CACHE_SIZE:      in-process LRU entries (default 4096; 0 disables)
+- SARTHI_EMBED_CACHE_DIR:       on-disk cache directory (default .cache/sarthi_embeddings; empty disables)
+- SARTHI_EMBED_DISK_CACHE_MAX_FILES: vectors kept on disk per model (default 20000)
+- SARTHI_EMBED_RETRY_SECONDS:   minimum seconds between model load attempts in degraded mode (default 60)
+"""
+
+import hashlib
+import os
+import queue
+import re
+import threading
+import time
+from collections import OrderedDict
+from concurrent.futures import Future
+from pathlib import Path
+
+import numpy as np
+
+SARTHI_EMBED_MODEL = os.getenv("SARTHI_EMBED_MODEL", "all-MiniLM-L6-v2")
+SARTHI_EMBED_WARMUP = os.getenv("SARTHI_EMBED_WARMUP", "false").lower() == "true"
+SARTHI_EMBED_BATCH_WINDOW_MS = float(os.getenv("SARTHI_EMBED_BATCH_WINDOW_MS", "5"))
+SARTHI_EMBED_MAX_BATCH = max(1, int(os.getenv("SARTHI_EMBED_MAX_BATCH", "64")))
+SARTHI_EMBED_CACHE_SIZE = int(os.getenv("SARTHI_EMBED_CACHE_SIZE", "4096"))
+SARTHI_EMBED_CACHE_DIR = os.getenv("SARTHI_EMBED_CACHE_DIR", ".cache/sarthi_embeddings")
+SARTHI_EMBED_DISK_CACHE_MAX_FILES = max(1, int(os.getenv("SARTHI_EMBED_DISK_CACHE_MAX_FILES", "20000")))
+SARTHI_EMBED_RETRY_SECONDS = float(os.getenv("SARTHI_EMBED_RETRY_SECONDS", "60"))
+
+
+class EmbeddingUnavailableError(RuntimeError):
+    """The embedding model is unavailable (degraded mode); no vectors were produced."""
+
+
+class EmbeddingState:
+    COLD = "cold"            # not loaded yet
+    LOADING = "loading"
+    READY = "ready"
+    DEGRADED = "degraded"    # last load failed; see status()["error"]
+
+
+class EmbeddingService:
+    def __init__(self, model_name=None, cache_size=None, cache_dir=None, batch_window_ms=None, max_batch=None):
+        self.model_name = model_name or SARTHI_EMBED_MODEL
+        self.cache_size = SARTHI_EMBED_CACHE_SIZE if cache_size is None else cache_size
+        cache_dir = SARTHI_EMBED_CACHE_DIR if cache_dir is None else cache_dir
+        self.cache_dir = Path(cache_dir) / re.sub(r"[^\w.-]", "_", self.model_name) if cache_dir else None
+        self.batch_window = (SARTHI_EMBED_BATCH_WINDOW_MS if batch_window_ms is None else batch_window_ms) / 1000.0
+        self.max_batch = max_batch or SARTHI_EMBED_MAX_BATCH
+
+        self.state = EmbeddingState.COLD
+        self.error = None
+        self._model = None
+        self._failed_at = None
+        self._load_lock = threading.Lock()
+
+        self._memory = OrderedDict()
+        self._memory_lock = threading.Lock()
+        self._disk_files = None     # counted on the first write
+        self._disk_lock = threading.Lock()
+
+        self._pending = queue.Queue()
+        self._inflight = {}
+        self._inflight_lock = threading.Lock()
+        self._dispatcher = None
+
+        self.stats = {"memory_hits": 0, "disk_hits": 0, "encoded": 0, "query_batches": 0, "batched_queries": 0}
+
+    # ---------- model ----------
+
+    def _ensure_model(self):
+        if self._model is not None:
+            return self._model
+        with self._load_lock:
+            if self._model is not None:
+                return self._model
+            if self._failed_at is not None and time.monotonic() - self._failed_at < SARTHI_EMBED_RETRY_SECONDS:
+                raise EmbeddingUnavailableError(f"Embedding model {self.model_name} unavailable: {self.error}")
+
+            self.state = EmbeddingState.LOADING
+            started = time.perf_counter()
+            try:
+                from sentence_transformers import SentenceTransformer
+                model = SentenceTransformer(self.model_name, cache_folder=".cache", device="cpu")
+            except Exception as e:
+                self.state, self.error, self._failed_at = EmbeddingState.DEGRADED, str(e), time.monotonic()
+                print(f"Embedding model {self.model_name} could not be loaded (degraded mode): {e}")
+                raise EmbeddingUnavailableError(f"Embedding model {self.model_name} unavailable: {e}") from e
+
+            self._model = model
+            self.state, self.error, self._failed_at = EmbeddingState.READY, None, None
+            print(f"Embedding model {self.model_name} loaded in {time.perf_counter() - started:.2f}s")
+            return model
+
+    def _encode(self, texts):
+        """float32 [len(texts), dim], bypassing the cache."""
+        model = self._ensure_model()
+        try:
+            vectors = model.encode(list(texts), batch_size=self.max_batch, convert_to_numpy=True,
+                                   show_progress_bar=False)
+        except Exception as e:
+            raise EmbeddingUnavailableError(f"Embedding failed: {e}") from e
+        self.stats["encoded"] += len(texts)
+        return np.asarray(vectors, dtype=np.float32)
+
+    def warm_up(self, background=True):
+        """Load the model and run one encode, in a daemon thread unless background=False."""
+        def run():
+            try:
+                self._encode(["Sarthi warm-up"])
+            except EmbeddingUnavailableError as e:
+                print(f"Embedding warm-up failed: {e}")
+
+        if not background:
+            run()
+            return None
+        thread = threading.Thread(target=run, name="SarthiEmbeddingWarmup", daemon=True)
+        thread.start()
+        return thread
+
+    # ---------- cache ----------
+
+    def _key(self, text):
+        return hashlib.sha256(f"{self.model_name}\0{text}".encode("utf-8")).hexdigest()
+
+    def _disk_path(self, key):
+        return self.cache_dir / key[:2] / f"{key}.npy"
+
+    def _remember(self, key, vector):
+        if self.cache_size <= 0:
+            return
+        with self._memory_lock:
+            self._memory[key] = vector
+            self._memory.move_to_end(key)
+            while len(self._memory) > self.cache_size:
+                self._memory.popitem(last=False)
+
+    def _lookup(self, key):
+        with self._memory_lock:
+            vector = self._memory.get(key)
+            if vector is not None:
+                self._memory.move_to_end(key)
+                self.stats["memory_hits"] += 1
+                return vector
+        if self.cache_dir is None:
+            return None
+        try:
+            vector = np.load(self._disk_path(key))
+        except (FileNotFoundError, ValueError, OSError):
+            return None
+        self.stats["disk_hits"] += 1
+        self._remember(key, vector)
+        return vector
+
+    def _store(self, key, vector, persist=False):
+        self._remember(key, vector)
+        if not persist or self.cache_dir is None:
+            return
+        path = self._disk_path(key)
+        try:
+            existed = path.exists()
+            path.parent.mkdir(parents=True, exist_ok=True)
+            tmp = path.with_name(f"{path.stem}.{threading.get_ident()}.tmp.npy")
+            np.save(tmp, vector)
+            os.replace(tmp, path)
+        except OSError as e:
+            # The disk cache is an optimization; keep serving from memory
+            print(f"Could not write embedding cache {path}: {e}")
+            return
+        if not existed:
+            self._count_disk_write()
+
+    def _count_disk_write(self):
+        with self._disk_lock:
+            if self._disk_files is None:
+                self._disk_files = sum(1 for _ in self.cache_dir.glob("*/*.npy"))
+            else:
+                self._disk_files += 1
+            if self._disk_files > SARTHI_EMBED_DISK_CACHE_MAX_FILES:
+                self._prune_disk()
+
+    def _prune_disk(self):
+        """Delete the oldest files down to 90% of the cap (caller holds _disk_lock)."""
+        files = []
+        for path in self.cache_dir.glob("*/*.npy"):
+            try:
+                files.append((path.stat().st_mtime, path))
+            except OSError:
+                continue
+        files.sort()
+        excess = len(files) - int(SARTHI_EMBED_DISK_CACHE_MAX_FILES * 0.9)
+        removed = 0
+        for _, path in files[:max(excess, 0)]:
+            try:
+                path.unlink()
+                removed += 1
+            except OSError:
+                continue
+        self._disk_files = len(files) - removed
+        print(f"Embedding disk cache pruned: {removed} files removed, {self._disk_files} kept")
+
+    # ---------- micro-batching ----------
+
+    def _ensure_dispatcher(self):
+        if self._dispatcher is None or not self._dispatcher.is_alive():
+            with self._inflight_lock:
+                if self._dispatcher is None or not self._dispatcher.is_alive():
+                    self._dispatcher = threading.Thread(target=self._dispatch_loop,
+                                                        name="SarthiEmbeddingBatcher", daemon=True)
+                    self._dispatcher.start()
+
+    def _submit(self, key, text):
+        with self._inflight_lock:
+            future = self._inflight.get(key)
+            if future is not None:
+                return future
+            future = Future()
+            self._inflight[key] = future
+        self._ensure_dispatcher()
+        self._pending.put((key, text, future))
+        return future
+
+    def _dispatch_loop(self):
+        while True:
+            batch = [self._pending.get()]
+            deadline = time.monotonic() + self.batch_window
+            while len(batch) < self.max_batch:
+                try:
+                    remaining = deadline - time.monotonic()
+                    batch.append(self._pending.get(timeout=remaining) if remaining > 0
+                                 else self._pending.get_nowait())
+                except queue.Empty:
+                    break
+            self._run_batch(batch)
+
+    def _run_batch(self, batch):
+        try:
+            vectors = self._encode([text for _, text, _ in batch])
+        except Exception as e:
+            error = e if isinstance(e, EmbeddingUnavailableError) else EmbeddingUnavailableError(str(e))
+            for _, _, future in batch:
+                future.set_exception(error)
+        else:
+            self.stats["query_batches"] += 1
+            self.stats["batched_queries"] += len(batch)
+            for (key, _, future), vector in zip(batch, vectors):
+                self._store(key, vector)
+                future.set_result(vector)
+        finally:
+            with self._inflight_lock:
+                for key, _, _ in batch:
+                    self._inflight.pop(key, None)
+
+    # ---------- public API ----------
+
+    def embed_query(self, text):
+        key = self._key(text)
+        vector = self._lookup(key)
+        if vector is None:
+            vector = self._submit(key, text).result()
+        return vector.tolist()
+
+    def embed_documents(self, texts):
+        texts = list(texts)
+        keys = [self._key(text) for text in texts]
+        found = {}
+        missing = {}
+        for key, text in zip(keys, texts):
+            if key in found or key in missing:
+                continue
+            vector = self._lookup(key)
+            if vector is None:
+                missing[key] = text
+            else:
+                found[key] = vector
+
+        missing_keys = list(missing)
+        for start in range(0, len(missing_keys), self.max_batch):
+            batch_keys = missing_keys[start:start + self.max_batch]
+            for key, vector in zip(batch_keys, self._encode([missing[key] for key in batch_keys])):
+                self._store(key, vector, persist=True)
+                found[key] = vector
+        return [found[key].tolist() for key in keys]
+
+    def status(self):
+        batches = self.stats["query_batches"]
+        return {
+            "model": self.model_name,
+            "state": self.state,
+            "error": self.error,
+            "memory_cache_entries": len(self._memory),
+            "disk_cache_dir": str(self.cache_dir) if self.cache_dir else None,
+            "disk_cache_files": self._disk_files,
+            **self.stats,
+            "avg_query_batch": round(self.stats["batched_queries"] / batches, 2) if batches else None,
+        }
+
+
+_services = {}
+_services_lock = threading.Lock()
+
+
+def get_embedding_service(model_name=None):
+    """Process-wide EmbeddingService for model_name (default SARTHI_EMBED_MODEL)."""
+    model_name = model_name or SARTHI_EMBED_MODEL
+    service = _services.get(model_name)
+    if service is None:
+        with _services_lock:
+            service = _services.get(model_name)
+            if service is None:
+                service = _services[model_name] = EmbeddingService(model_name)
+    return service
+
+
+def warm_up_if_configured():
+    """Start the background warm-up when SARTHI_EMBED_WARMUP is set (called at boot)."""
+    if SARTHI_EMBED_WARMUP:
+        get_embedding_service().warm_up()
+
+
+# ---------- benchmark ----------
+
+def run_benchmark(texts=512, threads=16, batch_sizes=(1, 2, 4, 8, 16, 32, 64, 128, 256)):
+    from concurrent.futures import ThreadPoolExecutor
+    from src.SarthiRag.chunker import chunk_markdown
+
+    docs_dir = Path(__file__).parent.parent / "docs"
+    corpus = [chunk.text for path in sorted(docs_dir.glob("*.md"))
+              for chunk in chunk_markdown(path.read_text(encoding="utf-8"), path.name)]
+    corpus += [sentence.strip() for text in list(corpus) for sentence in text.split(".") if len(sentence.strip()) > 20]
+    samples = [f"{corpus[i % len(corpus)]} #{i}" for i in range(texts)]
+
+    service = EmbeddingService(cache_size=0, cache_dir="", max_batch=max(batch_sizes))
+    started = time.perf_counter()
+    service.warm_up(background=False)
+    if service.state != EmbeddingState.READY:
+        print(f"Embedding model unavailable: {service.error}")
+        return
+    print(f"Model {service.model_name} loaded and warmed up in {time.perf_counter() - started:.2f}s")
+    print(f"{texts} texts (average {sum(map(len, samples)) // len(samples)} chars)")
+
+    for batch_size in batch_sizes:
+        started = time.perf_counter()
+        for start in range(0, texts, batch_size):
+            service._encode(samples[start:start + batch_size])
+        elapsed = time.perf_counter() - started
+        print(f"  batch {batch_size:>3}: {texts / elapsed:9.1f} embeddings/s")
+
+    queries = samples[:min(texts, threads * 16)]
+    for window_ms in (0, SARTHI_EMBED_BATCH_WINDOW_MS or 5):
+        batcher = EmbeddingService(cache_size=0, cache_dir="", batch_window_ms=window_ms)
+        batcher._model = service._model
+        batcher.state = EmbeddingState.READY
+        started = time.perf_counter()
+        with ThreadPoolExecutor(threads) as pool:
+            list(pool.map(batcher.embed_query, queries))
+        elapsed = time.perf_counter() - started
+        print(f"  {threads} threads, window {window_ms:g} ms: {len(queries) / elapsed:9.1f} queries/s "
+              f"(avg batch {batcher.status()['avg_query_batch']})")
+
+
+if __name__ == "__main__":
+    import argparse
+
+    parser = argparse.ArgumentParser(description="Sarthi embedding throughput benchmark")
+    parser.add_argument("command", choices=["benchmark"])
+    parser.add_argument("--texts", type=int, default=512)
+    parser.add_argument("--threads", type=int, default=16, help="concurrent embed_query callers")
+    args = parser.parse_args()
+    run_benchmark(args.texts, args.threads)
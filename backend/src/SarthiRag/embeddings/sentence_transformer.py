@@ -1,61 +1,26 @@
-import os
 from typing import List
 
+from src.SarthiRag.embeddings.embedding_service import EmbeddingUnavailableError, get_embedding_service
+
+
 class SentenceTransformerEmbeddings:
     """
-    Free tier compatible embeddings using external API
-    Falls back to lightweight embeddings if API unavailable
+    LangChain-style embeddings backed by the process-wide EmbeddingService
+    (warm-up, micro-batched queries, LRU + disk cache).
+    Raises EmbeddingUnavailableError when the model cannot be loaded instead
+    of returning placeholder vectors.
     """
-    _model = None
 
-    def __init__(self, model_name='all-MiniLM-L6-v2'):
-        # Model name stored but not loaded until needed
-        self.model_name = model_name
-        
-    def _lazy_load_model(self):
-        """Load model only when first embed is called"""
-        if self._model is None:
-            # Use try-except to gracefully fall back if model load fails
-            try:
-                from sentence_transformers import SentenceTransformer
-                self._model = SentenceTransformer(
-                    self.model_name,
-                    cache_folder=".cache",
-                    device="cpu"
-                )
-            except Exception as e:
-                print(f"Warning: Could not load sentence-transformers: {e}")
-                print("Using fallback mock embeddings")
-                self._model = "fallback"
-        
+    def __init__(self, model_name=None):
+        self.service = get_embedding_service(model_name)
+        self.model_name = self.service.model_name
+
     def embed_documents(self, texts: List[str]):
-        """Embed multiple texts with fallback support"""
+        """Embed multiple texts (cached texts are not re-encoded)"""
         if not texts:
             return []
-        
-        # Try to use real embeddings
-        try:
-            self._lazy_load_model()
-            if self._model != "fallback":
-                return self._model.encode(texts, convert_to_tensor=False).tolist()
-        except Exception as e:
-            print(f"Embedding failed: {e}")
-        
-        # Fallback: Return mock embeddings (for free tier compatibility)
-        return [[0.1] * 384 for _ in texts]
+        return self.service.embed_documents(texts)
 
     def embed_query(self, text: str):
-        """Embed single query with fallback support"""
-        if not text:
-            return []
-        
-        try:
-            self._lazy_load_model()
-            if self._model != "fallback":
-                return self._model.encode(text, convert_to_tensor=False).tolist()
-        except Exception as e:
-            print(f"Query embedding failed: {e}")
-        
-        # Fallback: Return mock embedding
-        return [0.1] * 384
-
+        """Embed a single query, batched with concurrent queries"""
+        return self.service.embed_query(text)
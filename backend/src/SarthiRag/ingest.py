@@ -1,8 +1,44 @@
+"""
+Incremental ingestion of the Sarthi knowledge base.
+
+Dynamic docs are split into header-aware chunks (chunker.py), each with a
+content hash. The embedded index manifest doubles as the ingestion manifest:
+it records the embedding model and, per chunk, its hash. A run only embeds
+chunks whose hash is not in the previous index (in batches of
+SARTHI_EMBED_BATCH_SIZE), reuses the stored vectors of the others and drops
+chunks that no longer exist. The whole index is re-embedded when the model
+changes or with --full.
+
+The Atlas collection is synced the same way: new chunks are inserted and
+documents whose chunk_hash is no longer current (including whole-file
+documents of older ingestions) are deleted. Static docs are upserted by
+source and only a real change stamps a new static version. Any change of
+static docs or chunks stamps a new knowledge base version; an unchanged
+embedded index is not rewritten.
+
+Every run prints the time spent per stage.
+
+    python -m src.SarthiRag.ingest [--embedded-only] [--full]
+
+Configuration (environment):
+- SARTHI_EMBED_BATCH_SIZE: chunks per embed_documents call (default 32)
+"""
+
+import hashlib
+import os
+import sys
+import time
+from contextlib import contextmanager
 from pathlib import Path
+
 from langchain.schema import Document
-from langchain_community.vectorstores import MongoDBAtlasVectorSearch
 from src.SarthiRag.config.mongodb import MongoDBClient
 from src.SarthiRag.embeddings.sentence_transformer import SentenceTransformerEmbeddings
+from src.SarthiRag.chunker import chunk_markdown
+from src.SarthiRag.vector_store import (
+    SARTHI_VECTOR_INDEX_DIR, SARTHI_VECTOR_QUANTIZATION, read_embedded_index, write_embedded_index
+)
+from src.SarthiRag.context_cache import write_knowledge_base_version, write_static_version
 
 STATIC_DOCS = {
     "identity_and_governance.md",
@@ -15,38 +51,178 @@ DB_NAME = "sarthi_rag"
 VECTOR_COLLECTION = "dynamic_docs"
 STATIC_COLLECTION = "static_docs"
 
+SARTHI_EMBED_BATCH_SIZE = max(1, int(os.getenv("SARTHI_EMBED_BATCH_SIZE", "32")))
+
+
 def load_markdown(path: Path) -> str:
     return path.read_text(encoding="utf-8")
 
-def ingest():
-    client = MongoDBClient().get_client()
-    db = client[DB_NAME]
-    vector_collection = db[VECTOR_COLLECTION]
+
+def _content_hash(text):
+    return hashlib.sha256(text.encode("utf-8")).hexdigest()
+
+
+class _StageTimer:
+    def __init__(self):
+        self.timings = {}
+
+    @contextmanager
+    def stage(self, name):
+        start = time.perf_counter()
+        try:
+            yield
+        finally:
+            self.timings[name] = round((time.perf_counter() - start) * 1000, 1)
+
+    def report(self):
+        total = sum(self.timings.values())
+        lines = [f"  {name:<12} {ms:>9.1f} ms" for name, ms in self.timings.items()]
+        return "\n".join(lines + [f"  {'total':<12} {total:>9.1f} ms"])
+
+
+def _previous_index(model_name, full):
+    """
+    (manifest, {chunk_hash: vector}) of the current embedded index, if it was
+    built with model_name; (None, {}) otherwise.
+    """
+    if full:
+        return None, {}
+    manifest, vectors = read_embedded_index(SARTHI_VECTOR_INDEX_DIR)
+    if manifest is None:
+        return None, {}
+    if manifest.get("model") != model_name:
+        print(f"Embedding model changed ({manifest.get('model')} -> {model_name}); re-embedding all chunks")
+        return None, {}
+    return manifest, {
+        doc["metadata"]["chunk_hash"]: vectors[i]
+        for i, doc in enumerate(manifest["documents"])
+        if doc["metadata"].get("chunk_hash")
+    }
+
+
+def _embed_in_batches(embeddings, texts):
+    vectors = []
+    for start in range(0, len(texts), SARTHI_EMBED_BATCH_SIZE):
+        vectors.extend(embeddings.embed_documents(texts[start:start + SARTHI_EMBED_BATCH_SIZE]))
+    return vectors
+
+
+def _sync_static_docs(db, static_docs):
+    """Upsert static docs by source, delete removed ones. Returns the number of changes."""
     static_collection = db[STATIC_COLLECTION]
+    stored = {doc.get("source"): doc.get("content_hash")
+              for doc in static_collection.find({}, {"source": 1, "content_hash": 1})}
+
+    changes = 0
+    for doc in static_docs:
+        if stored.get(doc["source"]) != doc["content_hash"]:
+            static_collection.update_one({"source": doc["source"]}, {"$set": doc}, upsert=True)
+            changes += 1
+    changes += static_collection.delete_many(
+        {"source": {"$nin": [doc["source"] for doc in static_docs]}}
+    ).deleted_count
+
+    if changes:
+        # Running SarthiRAG instances reload their static context when this stamp changes
+        print(f"Static docs version {write_static_version(db)} ({changes} changed)")
+    return changes
+
+
+def _sync_atlas(vector_collection, chunks, vectors_by_hash):
+    """Insert chunks missing from the Atlas collection and delete orphans. Returns (inserted, deleted)."""
+    current = [chunk.hash for chunk in chunks]
+    stored = set(vector_collection.distinct("chunk_hash"))
+    missing = [chunk for chunk in chunks if chunk.hash not in stored]
+    if missing:
+        # Same fields MongoDBAtlasVectorSearch writes ("text", "embedding", metadata)
+        vector_collection.insert_many([
+            {"text": chunk.text, "embedding": [float(x) for x in vectors_by_hash[chunk.hash]],
+             "type": "dynamic", **chunk.metadata}
+            for chunk in missing
+        ])
+    # Also removes whole-file documents written before chunking (no chunk_hash)
+    deleted = vector_collection.delete_many({"chunk_hash": {"$nin": current}}).deleted_count
+    return len(missing), deleted
+
+
+def ingest(embedded_only=False, full=False):
+    """
+    Chunk the docs, embed only new or changed chunks, rewrite the embedded
+    index and (unless embedded_only) sync the static docs and the Atlas
+    vector collection. Returns a summary with per-stage timings.
+    """
+    timer = _StageTimer()
     embeddings = SentenceTransformerEmbeddings()
 
-    dynamic_docs: list[Document] = []
-    static_docs = []
+    with timer.stage("load+chunk"):
+        chunks, static_docs, seen = [], [], set()
+        for md_file in sorted(DOCS_DIR.glob("*.md")):
+            content = load_markdown(md_file)
+            if md_file.name in STATIC_DOCS:
+                static_docs.append({"source": md_file.name, "content": content, "type": "static",
+                                    "content_hash": _content_hash(content)})
+                continue
+            for chunk in chunk_markdown(content, md_file.name):
+                # Identical chunks (same source and text) are stored once
+                if chunk.hash not in seen:
+                    seen.add(chunk.hash)
+                    chunks.append(chunk)
+
+    with timer.stage("diff"):
+        previous_manifest, previous = _previous_index(embeddings.model_name, full)
+        current_hashes = {chunk.hash for chunk in chunks}
+        to_embed = [chunk for chunk in chunks if chunk.hash not in previous]
+        orphans = len(set(previous) - current_hashes)
 
-    for md_file in DOCS_DIR.glob("*.md"):
-        content = load_markdown(md_file)
-        if md_file.name in STATIC_DOCS:
-            static_docs.append({"source": md_file.name, "content": content, "type": "static"})
+    with timer.stage("embed"):
+        new_vectors = _embed_in_batches(embeddings, [chunk.text for chunk in to_embed])
+        vectors_by_hash = {h: v for h, v in previous.items() if h in current_hashes}
+        vectors_by_hash.update((chunk.hash, vector) for chunk, vector in zip(to_embed, new_vectors))
+
+    with timer.stage("index write"):
+        # An unchanged index is left alone so its version (and everything keyed on it) stays valid
+        index_changed = (previous_manifest is None or to_embed or orphans
+                         or previous_manifest.get("quantization") != SARTHI_VECTOR_QUANTIZATION)
+        if index_changed:
+            documents = [Document(page_content=chunk.text, metadata={"type": "dynamic", **chunk.metadata})
+                         for chunk in chunks]
+            manifest = write_embedded_index(SARTHI_VECTOR_INDEX_DIR, documents,
+                                            [vectors_by_hash[chunk.hash] for chunk in chunks],
+                                            embeddings.model_name)
         else:
-            dynamic_docs.append(Document(page_content=content, metadata={"source": md_file.name, "type": "dynamic"}))
-    
-    static_collection.delete_many({})
-    static_collection.insert_many(static_docs)
-
-    if vector_collection.count_documents({}) == 0:
-        MongoDBAtlasVectorSearch.from_documents(
-            documents=dynamic_docs,
-            embedding=embeddings,
-            collection=vector_collection,
-        )
-    
-    print("Sarthi ingestion completed")
+            manifest = previous_manifest
 
-if __name__ == "__main__":
-    ingest()
+    summary = {
+        "chunks": len(chunks),
+        "embedded": len(to_embed),
+        "reused": len(chunks) - len(to_embed),
+        "orphans_removed": orphans,
+        "quantization": manifest["quantization"],
+        "index_written": bool(index_changed),
+    }
 
+    if not embedded_only:
+        client = MongoDBClient().get_client()
+        db = client[DB_NAME]
+        with timer.stage("static sync"):
+            summary["static_changed"] = _sync_static_docs(db, static_docs)
+        with timer.stage("atlas sync"):
+            summary["atlas_inserted"], summary["atlas_deleted"] = _sync_atlas(
+                db[VECTOR_COLLECTION], chunks, vectors_by_hash
+            )
+        if summary["static_changed"] or summary["atlas_inserted"] or summary["atlas_deleted"]:
+            # Consumers of the knowledge base (e.g. the chatbot answer cache) drop derived state
+            print(f"Knowledge base version {write_knowledge_base_version(db)}")
+
+    summary["timings_ms"] = timer.timings
+    print(f"Sarthi ingestion completed{' (embedded index only)' if embedded_only else ''}: "
+          f"{summary['chunks']} chunks, {summary['embedded']} embedded, {summary['reused']} reused, "
+          f"{summary['orphans_removed']} orphans removed")
+    print(timer.report())
+    return summary
+
+
+if __name__ == "__main__":
+    # Offline (no RAG_MONGO_URI): python -m src.SarthiRag.ingest --embedded-only
+    args = sys.argv[1:]
+    ingest(embedded_only="--embedded-only" in args, full="--full" in args)
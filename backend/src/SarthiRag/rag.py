@@ -1,9 +1,13 @@
 #PS D:\2025\PROJECTS\HireMate\backend> python -m src.SarthiRag.ingest
 # When do we need to create a db.
 
-from langchain_community.vectorstores import MongoDBAtlasVectorSearch
 from src.SarthiRag.config.mongodb import MongoDBClient
 from src.SarthiRag.embeddings.sentence_transformer import SentenceTransformerEmbeddings
+from src.SarthiRag.vector_store import get_vector_store
+from src.SarthiRag.ingest import DOCS_DIR, STATIC_DOCS
+from src.SarthiRag.context_cache import (
+    KNOWLEDGE_BASE_VERSION_ID, FileStaticSource, MongoStaticSource, StaticContextCache, read_version
+)
 from dotenv import load_dotenv
 import os
 
@@ -14,30 +18,8 @@ VECTOR_COLLECTION = "dynamic_docs"
 STATIC_COLLECTION = "static_docs"
 TOP_K = 3
 
-class SarthiRAG:
-    def __init__(self):
-        self.client = MongoDBClient().get_client()
-        self.db = self.client[DB_NAME]
-        self.embeddings = SentenceTransformerEmbeddings()     
-        self.static_collection = self.db[STATIC_COLLECTION]
-        self.vector_store = MongoDBAtlasVectorSearch.from_connection_string(
-            connection_string=os.getenv("RAG_MONGO_URI"),
-            namespace=f"{DB_NAME}.{VECTOR_COLLECTION}",
-            embedding=self.embeddings,
-        )
-    
-    def _load_static_context(self) -> str:
-        docs = self.static_collection.find({}, {"_id":0, "content":1})
-        return "\n\n".join(doc["content"] for doc in docs)
-    
-    def _load_dynamic_context(self, query: str) -> str:
-        docs = self.vector_store.similarity_search(query, k=TOP_K)
-        return "\n\n".join(doc.page_content for doc in docs)
-
-    def build_context(self, query:str) -> str:
-        static_context = self._load_static_context()
-        dynamic_context = self._load_dynamic_context(query)
-        return f"""
+# System prompt; {static_context} is filled once per static version, {dynamic_context} per message
+PROMPT_TEMPLATE = """
         You are **Sarthi**, the official Hirekruit Assistant.
 
         Your knowledge comes ONLY from these authoritative sources:
@@ -79,4 +61,42 @@ class SarthiRAG:
 
         ---
         End of system rules. Process user queries strictly against provided context.
-        """.strip()
\ No newline at end of file
+        """.strip()
+
+
+def build_prompt_segments(static_context: str):
+    """Split the prompt around {dynamic_context} with the static context already in place."""
+    prefix, _, suffix = PROMPT_TEMPLATE.partition("{dynamic_context}")
+    return prefix.replace("{static_context}", static_context), suffix
+
+
+class SarthiRAG:
+    def __init__(self):
+        self.embeddings = SentenceTransformerEmbeddings()     
+        # Atlas Vector Search or the embedded index, per SARTHI_VECTOR_BACKEND
+        self.vector_store = get_vector_store(self.embeddings, namespace=f"{DB_NAME}.{VECTOR_COLLECTION}")
+        if self.vector_store.name == "embedded":
+            # Embedded (offline) mode: the same files ingest.py copies into static_docs
+            static_source = FileStaticSource(DOCS_DIR / name for name in sorted(STATIC_DOCS))
+        else:
+            self.client = MongoDBClient().get_client()
+            self.db = self.client[DB_NAME]
+            self.static_collection = self.db[STATIC_COLLECTION]
+            static_source = MongoStaticSource(self.db, self.static_collection)
+        self.static_source = static_source
+        # Static context and the prompt segments around it, rebuilt only when ingest.py changes them
+        self.static_context = StaticContextCache(static_source, build_prompt_segments)
+
+    def knowledge_base_version(self) -> str:
+        """Changes whenever a re-ingest changed the static docs or the dynamic chunks."""
+        if self.vector_store.name == "embedded":
+            return f"{self.vector_store.index_version()}|{self.static_source.version()}"
+        return read_version(self.db, KNOWLEDGE_BASE_VERSION_ID) or "unversioned"
+    
+    def _load_dynamic_context(self, query: str) -> str:
+        docs = self.vector_store.similarity_search(query, k=TOP_K)
+        return "\n\n".join(doc.page_content for doc in docs)
+
+    def build_context(self, query:str) -> str:
+        prefix, suffix = self.static_context.get()
+        return prefix + self._load_dynamic_context(query) + suffix
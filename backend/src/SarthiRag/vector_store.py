@@ -0,0 +1,370 @@
+"""
+Vector stores for SarthiRAG dynamic context.
+
+Both backends expose similarity_search(query, k) -> [Document] (and a batched
+similarity_search_batch), so rag.py does not care which one is configured:
+
+- "atlas" (default): MongoDB Atlas Vector Search, one network round trip per query.
+- "embedded": the corpus is a few markdown files, so ingest.py also writes a
+  local index (SARTHI_VECTOR_INDEX_DIR) holding the L2-normalized embeddings as a NumPy
+  matrix. It is memory-mapped and searched in process with one matrix product
+  per batch of queries plus argpartition top-k. No network, works offline.
+  With int8 quantization each row is stored as int8 with a float32 scale
+  (4x smaller; scores are within ~1% of float32).
+
+Index layout (written by write_embedded_index):
+    manifest.json            index_version, model, dim, count, quantization, the documents and
+                             the names of the array files below
+    vectors-<version>.npy    float32 [count, dim] or int8 [count, dim]
+    scales-<version>.npy     float32 [count] (int8 only)
+Array files are never overwritten: a new version is written first and the
+manifest is swapped in last, so a reader always gets a consistent pair.
+
+A running process reloads the index when ingest.py rewrites it.
+
+Benchmark (embedded vs. the Atlas code path over a mocked collection):
+    python -m src.SarthiRag.vector_store benchmark [--queries 500] [--replicate 50]
+        [--atlas-rtt-ms 20] [--quantization float32|int8]
+
+Configuration (environment):
+- SARTHI_VECTOR_BACKEND:      "atlas" or "embedded" (default "atlas")
+- SARTHI_VECTOR_INDEX_DIR:    embedded index directory (default src/SarthiRag/index)
+- SARTHI_VECTOR_QUANTIZATION: "float32" or "int8", used by ingest.py (default "float32")
+"""
+
+import json
+import os
+import threading
+import time
+import zlib
+from pathlib import Path
+
+import numpy as np
+from langchain.schema import Document
+
+SARTHI_VECTOR_BACKEND = os.getenv("SARTHI_VECTOR_BACKEND", "atlas").lower()
+SARTHI_VECTOR_INDEX_DIR = Path(os.getenv("SARTHI_VECTOR_INDEX_DIR", Path(__file__).parent / "index"))
+SARTHI_VECTOR_QUANTIZATION = os.getenv("SARTHI_VECTOR_QUANTIZATION", "float32").lower()
+
+QUANTIZATIONS = ("float32", "int8")
+MANIFEST_FILE = "manifest.json"
+
+# Rows scored per block, bounding the float32 copy made of int8 / memory-mapped rows
+SEARCH_BLOCK_ROWS = 65536
+
+
+def normalize_rows(vectors):
+    vectors = np.asarray(vectors, dtype=np.float32)
+    if vectors.ndim == 1:
+        vectors = vectors[None, :]
+    norms = np.linalg.norm(vectors, axis=1, keepdims=True)
+    norms[norms == 0] = 1.0
+    return vectors / norms
+
+
+def quantize_int8(vectors):
+    """Symmetric per-row int8 quantization. Returns (int8 matrix, float32 scales)."""
+    scales = np.abs(vectors).max(axis=1) / 127.0
+    scales[scales == 0] = 1.0
+    quantized = np.clip(np.rint(vectors / scales[:, None]), -127, 127).astype(np.int8)
+    return quantized, scales.astype(np.float32)
+
+
+def write_embedded_index(index_dir, documents, vectors, model_name=None, quantization=None):
+    """
+    Persist documents ([Document]) and their embeddings as an embedded index.
+    Array files of previous versions are removed after the manifest switch;
+    processes that still have them memory-mapped keep reading them.
+    """
+    index_dir = Path(index_dir)
+    quantization = (quantization or SARTHI_VECTOR_QUANTIZATION).lower()
+    if quantization not in QUANTIZATIONS:
+        raise ValueError(f"Unknown quantization '{quantization}' (expected one of {QUANTIZATIONS})")
+    if len(documents) != len(vectors):
+        raise ValueError("documents and vectors must have the same length")
+
+    index_dir.mkdir(parents=True, exist_ok=True)
+    matrix = normalize_rows(vectors) if len(vectors) else np.zeros((0, 0), dtype=np.float32)
+    version = f"{time.time_ns():x}"
+    files = {"vectors_file": f"vectors-{version}.npy", "scales_file": None}
+
+    if quantization == "int8":
+        quantized, scales = quantize_int8(matrix)
+        np.save(index_dir / files["vectors_file"], quantized)
+        files["scales_file"] = f"scales-{version}.npy"
+        np.save(index_dir / files["scales_file"], scales)
+    else:
+        np.save(index_dir / files["vectors_file"], matrix)
+
+    manifest = {
+        "version": 1,
+        "index_version": version,
+        "model": model_name,
+        "dim": int(matrix.shape[1]) if matrix.size else 0,
+        "count": len(documents),
+        "quantization": quantization,
+        **files,
+        "created_at": time.strftime("%Y-%m-%dT%H:%M:%SZ", time.gmtime()),
+        "documents": [{"page_content": d.page_content, "metadata": d.metadata} for d in documents],
+    }
+    tmp = index_dir / (MANIFEST_FILE + ".tmp")
+    tmp.write_text(json.dumps(manifest, ensure_ascii=False), encoding="utf-8")
+    os.replace(tmp, index_dir / MANIFEST_FILE)
+
+    current = set(files.values())
+    for stale in list(index_dir.glob("vectors-*.npy")) + list(index_dir.glob("scales-*.npy")):
+        if stale.name not in current:
+            stale.unlink()
+    return manifest
+
+
+def read_embedded_index(index_dir):
+    """
+    (manifest, float32 vectors) of the index in index_dir, or (None, None) if
+    there is none. int8 rows are dequantized; rows are L2-normalized.
+    """
+    index_dir = Path(index_dir)
+    try:
+        manifest = json.loads((index_dir / MANIFEST_FILE).read_text(encoding="utf-8"))
+        vectors = np.load(index_dir / manifest["vectors_file"]).astype(np.float32)
+        if manifest.get("scales_file"):
+            vectors *= np.load(index_dir / manifest["scales_file"])[:, None]
+    except (FileNotFoundError, KeyError, ValueError) as e:
+        print(f"No readable embedded index in {index_dir}: {e}")
+        return None, None
+    return manifest, vectors
+
+
+class VectorStore:
+    """Base class: subclasses implement similarity_search_batch()."""
+
+    name = None
+
+    def similarity_search(self, query, k=4):
+        return self.similarity_search_batch([query], k)[0]
+
+    def similarity_search_batch(self, queries, k=4):
+        raise NotImplementedError
+
+
+class AtlasVectorStore(VectorStore):
+    name = "atlas"
+
+    def __init__(self, embeddings, namespace, connection_string=None, collection=None):
+        from langchain_community.vectorstores import MongoDBAtlasVectorSearch
+
+        if collection is not None:
+            self.store = MongoDBAtlasVectorSearch(collection, embeddings)
+        else:
+            self.store = MongoDBAtlasVectorSearch.from_connection_string(
+                connection_string=connection_string or os.getenv("RAG_MONGO_URI"),
+                namespace=namespace,
+                embedding=embeddings,
+            )
+
+    def similarity_search_batch(self, queries, k=4):
+        return [self.store.similarity_search(query, k=k) for query in queries]
+
+
+class EmbeddedVectorStore(VectorStore):
+    name = "embedded"
+
+    def __init__(self, embeddings, index_dir=None):
+        self.embeddings = embeddings
+        self.index_dir = Path(index_dir or SARTHI_VECTOR_INDEX_DIR)
+        self._lock = threading.Lock()
+        self._loaded_mtime = None
+        self._load()
+
+    def _manifest_mtime(self):
+        try:
+            return (self.index_dir / MANIFEST_FILE).stat().st_mtime_ns
+        except FileNotFoundError:
+            raise FileNotFoundError(
+                f"No embedded vector index in {self.index_dir}; run `python -m src.SarthiRag.ingest` first"
+            )
+
+    def _load(self):
+        mtime = self._manifest_mtime()
+        manifest = json.loads((self.index_dir / MANIFEST_FILE).read_text(encoding="utf-8"))
+        vectors = np.load(self.index_dir / manifest["vectors_file"], mmap_mode="r")
+        scales = None
+        if manifest.get("scales_file"):
+            scales = np.load(self.index_dir / manifest["scales_file"], mmap_mode="r")
+
+        self.manifest = manifest
+        self.documents = [Document(page_content=d["page_content"], metadata=d["metadata"])
+                          for d in manifest["documents"]]
+        self.vectors = vectors
+        self.scales = scales
+        self._loaded_mtime = mtime
+        print(f"Embedded vector index loaded: {manifest['count']} documents, "
+              f"dim {manifest['dim']}, {manifest['quantization']}")
+
+    def _reload_if_changed(self):
+        if self._manifest_mtime() != self._loaded_mtime:
+            with self._lock:
+                if self._manifest_mtime() != self._loaded_mtime:
+                    self._load()
+
+    def index_version(self):
+        """Version of the index currently on disk (changes on every ingest.py write)."""
+        self._reload_if_changed()
+        return self.manifest.get("index_version") or self.manifest.get("vectors_file")
+
+    def search_vectors(self, query_vectors, k=4):
+        """Top-k (indices, scores) per query for already-embedded queries."""
+        queries = normalize_rows(query_vectors)
+        vectors, scales = self.vectors, self.scales
+        count = vectors.shape[0]
+        k = min(k, count)
+        if k == 0:
+            return [([], []) for _ in range(len(queries))]
+
+        scores = np.empty((count, len(queries)), dtype=np.float32)
+        for start in range(0, count, SEARCH_BLOCK_ROWS):
+            block = np.asarray(vectors[start:start + SEARCH_BLOCK_ROWS], dtype=np.float32)
+            block_scores = block @ queries.T
+            if scales is not None:
+                block_scores *= np.asarray(scales[start:start + SEARCH_BLOCK_ROWS])[:, None]
+            scores[start:start + len(block)] = block_scores
+
+        results = []
+        for column in scores.T:
+            top = np.argpartition(-column, k - 1)[:k] if k < count else np.arange(count)
+            top = top[np.argsort(-column[top], kind="stable")]
+            results.append((top.tolist(), column[top].tolist()))
+        return results
+
+    def similarity_search_batch(self, queries, k=4):
+        self._reload_if_changed()
+        queries = list(queries)
+        # A single chat query goes through the micro-batcher (and is not persisted to the disk cache)
+        query_vectors = ([self.embeddings.embed_query(queries[0])] if len(queries) == 1
+                         else self.embeddings.embed_documents(queries))
+        return [
+            [self.documents[i] for i in indices]
+            for indices, _ in self.search_vectors(query_vectors, k)
+        ]
+
+
+BACKENDS = {
+    AtlasVectorStore.name: AtlasVectorStore,
+    EmbeddedVectorStore.name: EmbeddedVectorStore,
+}
+
+
+def get_vector_store(embeddings, namespace, backend=None):
+    """Vector store for SARTHI_VECTOR_BACKEND (or the given backend name)."""
+    backend = (backend or SARTHI_VECTOR_BACKEND).lower()
+    if backend == AtlasVectorStore.name:
+        return AtlasVectorStore(embeddings, namespace)
+    if backend == EmbeddedVectorStore.name:
+        return EmbeddedVectorStore(embeddings)
+    raise ValueError(f"Unknown SARTHI_VECTOR_BACKEND '{backend}' (expected one of {sorted(BACKENDS)})")
+
+
+# ---------- benchmark ----------
+
+class _HashingEmbeddings:
+    """Deterministic offline bag-of-words embeddings (benchmark only)."""
+
+    model_name = "hashing-384"
+
+    def __init__(self, dim=384):
+        self.dim = dim
+
+    def _embed(self, text):
+        vector = np.zeros(self.dim, dtype=np.float32)
+        for token in text.lower().split():
+            vector[zlib.crc32(token.encode("utf-8")) % self.dim] += 1.0
+        return vector.tolist()
+
+    def embed_documents(self, texts):
+        return [self._embed(text) for text in texts]
+
+    def embed_query(self, text):
+        return self._embed(text)
+
+
+class _MockAtlasCollection:
+    """Answers the $vectorSearch pipeline of MongoDBAtlasVectorSearch after a simulated round trip."""
+
+    def __init__(self, documents, vectors, rtt_ms):
+        self.documents = documents
+        self.vectors = normalize_rows(vectors)
+        self.rtt = rtt_ms / 1000.0
+
+    def aggregate(self, pipeline):
+        params = pipeline[0]["$vectorSearch"]
+        time.sleep(self.rtt)
+        scores = self.vectors @ normalize_rows(params["queryVector"])[0]
+        top = np.argsort(-scores)[:params["limit"]]
+        return [
+            {"text": self.documents[i].page_content, "score": float(scores[i]), **self.documents[i].metadata}
+            for i in top
+        ]
+
+
+def _percentiles(samples_ms):
+    samples = np.asarray(samples_ms)
+    return {p: float(np.percentile(samples, p)) for p in (50, 99)}
+
+
+def run_benchmark(queries=500, replicate=50, atlas_rtt_ms=20.0, quantization="float32", k=3):
+    import tempfile
+
+    docs_dir = Path(__file__).parent / "docs"
+    base = [
+        Document(page_content=path.read_text(encoding="utf-8"), metadata={"source": path.name})
+        for path in sorted(docs_dir.glob("*.md"))
+    ]
+    # Replicate the corpus (with distinct sources) to look at a larger index too
+    documents = [
+        Document(page_content=d.page_content, metadata={"source": f"{i}/{d.metadata['source']}"})
+        for i in range(replicate) for d in base
+    ]
+    embeddings = _HashingEmbeddings()
+    vectors = embeddings.embed_documents([d.page_content for d in documents])
+    words = " ".join(d.page_content for d in base).split()
+    rng = np.random.default_rng(0)
+    query_texts = [" ".join(rng.choice(words, size=8)) for _ in range(queries)]
+
+    with tempfile.TemporaryDirectory() as index_dir:
+        write_embedded_index(index_dir, documents, vectors, embeddings.model_name, quantization)
+        stores = {
+            f"embedded ({quantization})": EmbeddedVectorStore(embeddings, index_dir),
+            f"atlas (mocked, {atlas_rtt_ms:g} ms rtt)": AtlasVectorStore(
+                embeddings, namespace=None,
+                collection=_MockAtlasCollection(documents, vectors, atlas_rtt_ms)
+            ),
+        }
+        print(f"{len(documents)} documents, {queries} queries, k={k}")
+        for name, store in stores.items():
+            store.similarity_search(query_texts[0], k)    # warm up
+            samples = []
+            for text in query_texts:
+                started = time.perf_counter()
+                store.similarity_search(text, k)
+                samples.append((time.perf_counter() - started) * 1000)
+            p = _percentiles(samples)
+            print(f"{name:>32}: p50 {p[50]:8.3f} ms   p99 {p[99]:8.3f} ms")
+
+        store = stores[f"embedded ({quantization})"]
+        started = time.perf_counter()
+        store.similarity_search_batch(query_texts, k)
+        elapsed = (time.perf_counter() - started) * 1000
+        print(f"{'embedded, one batch':>32}: {elapsed:8.3f} ms total ({elapsed / queries:.3f} ms/query)")
+
+
+if __name__ == "__main__":
+    import argparse
+
+    parser = argparse.ArgumentParser(description="SarthiRAG vector store benchmark")
+    parser.add_argument("command", choices=["benchmark"])
+    parser.add_argument("--queries", type=int, default=500)
+    parser.add_argument("--replicate", type=int, default=50, help="copies of the docs corpus in the index")
+    parser.add_argument("--atlas-rtt-ms", type=float, default=20.0, help="simulated Atlas round trip")
+    parser.add_argument("--quantization", choices=QUANTIZATIONS, default="float32")
+    args = parser.parse_args()
+    run_benchmark(args.queries, args.replicate, args.atlas_rtt_ms, args.quantization)
@@ -1,4 +1,4 @@
-from flask_socketio import emit
+from flask_socketio import emit, join_room, leave_room
 from src.SocketIO.SocketIO_Instance import socketio
 # from src.Controllers.Live_Controller import handle_utterance
 
@@ -11,6 +11,32 @@ def on_connect():
 def on_disconnect():
     print("🔌 Client disconnected")
 
+@socketio.on("join_code_run")
+def on_join_code_run(data):
+    """
+    data: {"run_id": "..."}
+    Subscribes to code_run_update events for the run and sends its current state,
+    so results that finished before the client joined are not missed.
+    """
+    from src.CodingAssessment.Utils.code_run_service import CODE_RUN_EVENT, code_run_room, get_code_run
+    run_id = (data or {}).get("run_id")
+    try:
+        run = get_code_run(run_id) if run_id else None
+    except Exception:
+        run = None
+    if not run:
+        emit(CODE_RUN_EVENT, {"run_id": run_id, "type": "error", "error": "Run not found"})
+        return
+    join_room(code_run_room(run_id))
+    emit(CODE_RUN_EVENT, {"run_id": run_id, "type": "snapshot", "run": run})
+
+@socketio.on("leave_code_run")
+def on_leave_code_run(data):
+    from src.CodingAssessment.Utils.code_run_service import code_run_room
+    run_id = (data or {}).get("run_id")
+    if run_id:
+        leave_room(code_run_room(run_id))
+
 # @socketio.on("utterance")
 # def on_utterance(data):
 #     """
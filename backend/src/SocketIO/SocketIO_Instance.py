@@ -1,4 +1,7 @@
+import os
 from flask_socketio import SocketIO
 
 # Create SocketIO instance (don't bind app here)
-socketio = SocketIO(cors_allowed_origins="*")
+# SOCKETIO_MESSAGE_QUEUE (e.g. the Celery Redis broker) lets Celery workers
+# emit pipeline_update events that the web process relays to browsers.
+socketio = SocketIO(cors_allowed_origins="*", message_queue=os.getenv("SOCKETIO_MESSAGE_QUEUE"))
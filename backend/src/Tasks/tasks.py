@@ -4,6 +4,11 @@ import os
 from src.Agents.EmailingAgent import EmailingAgent
 from src.Agents.InterviewSchedulingAgent import InterviewSchedulingAgent
 from src.Utils.EmailService import EmailService
+from src.Utils.ResumeIngestionService import run_resume_ingestion
+from src.Utils.EmailOutboxService import (
+    dispatch_outbox, get_outbox_transport, next_dispatch_delay, reserve_delayed_dispatch
+)
+from src.CodingAssessment.Utils.code_run_service import process_code_run
 # from src.Utils.GoogleEmailService import EmailService 
 from dotenv import load_dotenv
 
@@ -90,3 +95,46 @@ def schedule_coding_assessments_task(self, drive_id):
     except Exception as e:
         print(f"Error in schedule_coding_assessments_task: {str(e)}")
         raise self.retry(exc=e, countdown=60, max_retries=3)
+
+
+@celery.task(name="ingest_resumes_task", bind=True)
+def ingest_resumes_task(self, job_id):
+    """Extract, upload and parse a staged resume upload"""
+    try:
+        print(f"Starting resume ingestion job {job_id}")
+        result = run_resume_ingestion(job_id)
+        print(f"Resume ingestion job {job_id} finished: {result}")
+        return {"status": "success", **result}
+    except Exception as e:
+        print(f"Error in ingest_resumes_task: {str(e)}")
+        # Already parsed files are skipped on retry
+        raise self.retry(exc=e, countdown=60, max_retries=3)
+
+
+@celery.task(name="dispatch_email_outbox_task", bind=True)
+def dispatch_email_outbox_task(self, transport="brevo"):
+    """Send every due email_outbox message in batches, then schedule the next retry"""
+    try:
+        result = dispatch_outbox(get_outbox_transport(transport))
+        print(f"Email outbox drained ({transport}): {result}")
+    except Exception as e:
+        print(f"Error in dispatch_email_outbox_task: {str(e)}")
+        # Claimed messages are re-dispatched once their lease expires
+        raise self.retry(exc=e, countdown=60, max_retries=3)
+
+    # Messages backing off (or leased by a dead dispatcher) get a delayed dispatch
+    delay = next_dispatch_delay()
+    if delay is not None and reserve_delayed_dispatch(transport, delay):
+        countdown = max(int(delay) + 1, 1)
+        self.apply_async(args=[transport], countdown=countdown)
+        print(f"Email outbox re-dispatch ({transport}) scheduled in {countdown}s")
+    return {"status": "success", **result}
+
+
+@celery.task(name="evaluate_code_run_task", bind=True, acks_late=True)
+def evaluate_code_run_task(self, run_id):
+    """Evaluate one "Run Code" request (routed to CODE_EVAL_QUEUE)"""
+    # No retry: a failed evaluation is recorded on the run and the candidate can run again.
+    # acks_late: a run lost with its worker is redelivered; process_code_run reclaims it once
+    # its lease (CODE_EVAL_RUN_LEASE_SECONDS) has expired and skips runs still leased.
+    return process_code_run(run_id)
@@ -1,57 +1,119 @@
 from email.message import EmailMessage
 from aiosmtplib import SMTP
+from aiosmtplib.errors import SMTPServerDisconnected
 import asyncio
 import threading
 
+from src.Utils.EmailService import SMTP_MAX_MESSAGES_PER_CONNECTION, SMTP_USE_TLS
+from src.Utils.EmailTransport import EMAIL_MAX_WORKERS
+
 
 class AsyncEmailService:
-    def __init__(self, smtp_server, smtp_port, username, password):
+    """
+    aiosmtplib sender running on one background event loop.
+
+    A fixed set of max_workers authenticated connections is opened lazily and
+    reused; send_email_background() schedules onto that loop and returns a
+    concurrent.futures.Future[bool] instead of starting a thread per email.
+    """
+
+    def __init__(self, smtp_server, smtp_port, username, password, use_tls=None, max_workers=None):
         self.smtp_server = smtp_server
         self.smtp_port = smtp_port
         self.username = username
         self.password = password
+        self.use_tls = SMTP_USE_TLS if use_tls is None else use_tls
+        self.max_workers = max_workers or EMAIL_MAX_WORKERS
+        self._loop = None
+        self._loop_lock = threading.Lock()
+        self._idle = None   # asyncio.Queue of [SMTP or None, messages_sent] slots
 
-    async def send_email(self, to_email: str, subject: str, body: str):
-        try:
-            print("\n=== Sending Email (async) ===")
-            print(f"To: {to_email} | Subject: {subject}")
+    def _get_loop(self):
+        with self._loop_lock:
+            if self._loop is None:
+                self._loop = asyncio.new_event_loop()
+                threading.Thread(target=self._loop.run_forever, name="AsyncEmailService", daemon=True).start()
+            return self._loop
 
-            msg = EmailMessage()
-            msg["From"] = self.username
-            msg["To"] = to_email
-            msg["Subject"] = subject
-            msg.set_content(body)
+    async def _connect(self):
+        smtp = SMTP(
+            hostname=self.smtp_server,
+            port=self.smtp_port,
+            timeout=10,
+        )
+        await smtp.connect()
+        if self.use_tls:
+            await smtp.starttls()
+        if self.username and self.password:
+            await smtp.login(self.username, self.password)
+        return smtp
 
-            smtp = SMTP(
-                hostname=self.smtp_server,
-                port=self.smtp_port,
-                start_tls=True,
-                timeout=10,
-            )
+    async def _send_on(self, slot, msg):
+        smtp, sent = slot
+        if smtp is not None and sent >= SMTP_MAX_MESSAGES_PER_CONNECTION:
+            await self._quit(smtp)
+            smtp = None
+        if smtp is None:
+            smtp, sent = await self._connect(), 0
+        slot[0], slot[1] = smtp, sent
+        await smtp.send_message(msg)
+        slot[1] += 1
 
-            await smtp.connect()
-            await smtp.login(self.username, self.password)
-            await smtp.send_message(msg)
+    async def _quit(self, smtp):
+        try:
             await smtp.quit()
+        except Exception:
+            smtp.close()
 
-            print(f"✓ Email sent to {to_email}")
+    async def send_email(self, to_email: str, subject: str, body: str, html: bool = False):
+        print("\n=== Sending Email (async) ===")
+        print(f"To: {to_email} | Subject: {subject}")
+
+        msg = EmailMessage()
+        msg["From"] = self.username
+        msg["To"] = to_email
+        msg["Subject"] = subject
+        if html:
+            msg.set_content(body, subtype="html")
+        else:
+            msg.set_content(body)
+
+        if self._idle is None:
+            self._idle = asyncio.Queue()
+            for _ in range(self.max_workers):
+                self._idle.put_nowait([None, 0])
 
+        slot = await self._idle.get()
+        try:
+            try:
+                await self._send_on(slot, msg)
+            except SMTPServerDisconnected:
+                # Idle connection closed by the server: reconnect once and retry
+                slot[0] = None
+                await self._send_on(slot, msg)
+            print(f"✓ Email sent to {to_email}")
+            return True
         except Exception as e:
             print(f"✗ Email failed: {e}")
+            if slot[0] is not None:
+                await self._quit(slot[0])
+            slot[0], slot[1] = None, 0
             raise
+        finally:
+            self._idle.put_nowait(slot)
 
-    # ✅ THIS IS THE KEY FIX
-    def send_email_background(self, to_email, subject, body):
+    def send_email_background(self, to_email, subject, body, html=False):
         """
-        Safe for Flask / sync apps
+        Safe for Flask / sync apps. Returns a concurrent.futures.Future[bool].
         """
+        return asyncio.run_coroutine_threadsafe(
+            self.send_email(to_email, subject, body, html),
+            self._get_loop()
+        )
 
-        def runner():
-            asyncio.run(
-                self.send_email(to_email, subject, body)
-            )
-
-        threading.Thread(
-            target=runner,
-            daemon=True
-        ).start()
+    def send_batch(self, messages):
+        """Queue several messages (see EmailTransport.email_message()). Returns one Future per message."""
+        return [
+            self.send_email_background(m["to_email"], m["subject"], m["body"], m.get("html", False))
+            for m in messages
+        ]
@@ -3,49 +3,126 @@ import threading
 import sib_api_v3_sdk
 from sib_api_v3_sdk.rest import ApiException
 
+from src.Utils.EmailTransport import PooledEmailTransport
 
-class BrevoEmailService:
-    def __init__(self):
+# Recipients per batch request (Brevo messageVersions)
+BREVO_BATCH_SIZE = int(os.getenv("BREVO_BATCH_SIZE", "100"))
+
+
+class BrevoEmailService(PooledEmailTransport):
+    """
+    Brevo transactional sender. One ApiClient (and its keep-alive HTTP
+    connection pool, sized to the worker pool) is shared by all deliveries.
+    Use get_brevo_email_service() for the process-wide instance.
+    """
+
+    transport_name = "brevo"
+
+    def __init__(self, max_workers=None):
+        super().__init__(max_workers)
         configuration = sib_api_v3_sdk.Configuration()
         configuration.api_key["api-key"] = os.getenv("BREVO_API_KEY")
+        configuration.connection_pool_maxsize = self.max_workers
 
         self.api_client = sib_api_v3_sdk.ApiClient(configuration)
+        self.api_instance = sib_api_v3_sdk.TransactionalEmailsApi(self.api_client)
         self.sender_email = os.getenv("BREVO_SENDER_EMAIL")
         self.sender_name = os.getenv("BREVO_SENDER_NAME", "HiRekruit")
 
-    def _send_email(self, to_email, subject, body, html=False):
-        try:
-            api_instance = sib_api_v3_sdk.TransactionalEmailsApi(self.api_client)
-
-            email_data = {
-                "to": [{"email": to_email}],
-                "sender": {
-                    "email": self.sender_email,
-                    "name": self.sender_name,
-                },
-                "subject": subject,
-            }
-
-            # ✅ HTML vs Text
-            if html:
-                email_data["html_content"] = body
-            else:
-                email_data["text_content"] = body
+    def _email_data(self, subject, body, html):
+        email_data = {
+            "sender": {
+                "email": self.sender_email,
+                "name": self.sender_name,
+            },
+            "subject": subject,
+        }
 
-            email = sib_api_v3_sdk.SendSmtpEmail(**email_data)
+        # ✅ HTML vs Text
+        if html:
+            email_data["html_content"] = body
+        else:
+            email_data["text_content"] = body
+        return email_data
 
-            api_instance.send_transac_email(email)
+    def _deliver(self, to_email, subject, body, html=False):
+        email = sib_api_v3_sdk.SendSmtpEmail(to=[{"email": to_email}], **self._email_data(subject, body, html))
+        try:
+            self.api_instance.send_transac_email(email)
             print(f"✓ Email delivered to {to_email} by Brevo")
-
         except ApiException as e:
             print(f"✗ Brevo API error for {to_email}: {e}")
+            raise
+
+    def _deliver_versions(self, messages, body, html):
+        """
+        Send several messages sharing one body with a single API call. Personalised
+        messages carry their own subject and params ({{ params.* }} slots in body).
+        """
+        versions = []
+        for m in messages:
+            version = sib_api_v3_sdk.SendSmtpEmailMessageVersions(
+                to=[sib_api_v3_sdk.SendSmtpEmailTo1(email=m["to_email"])]
+            )
+            if m.get("template_body") is not None:
+                version.subject = m["subject"]
+                version.params = m["params"]
+            versions.append(version)
+        email = sib_api_v3_sdk.SendSmtpEmail(
+            message_versions=versions,
+            **self._email_data(messages[0]["subject"], body, html)
+        )
+        try:
+            self.api_instance.send_transac_email(email)
+            print(f"✓ Email delivered to {len(messages)} recipients by Brevo")
+            return True
+        except ApiException as e:
+            print(f"✗ Brevo API error for batch of {len(messages)}: {e}")
+            raise
+
+    def send_batch(self, messages):
+        """
+        Queue several messages; returns one Future per message, in order.
+        Messages sharing a body are sent together as Brevo message versions
+        (BREVO_BATCH_SIZE recipients per call) and share that call's Future:
+        personalised messages (email_message(template_body=..., params=...)) are
+        grouped by template body, each version with its own subject and params;
+        other messages are grouped when subject and body are identical. A
+        message with no partner goes out in its own call on the pool.
+        """
+        messages = list(messages)
+        groups = {}
+        for index, m in enumerate(messages):
+            html = m.get("html", False)
+            if m.get("template_body") is not None:
+                key = (None, m["template_body"], html)
+            else:
+                key = (m["subject"], m["body"], html)
+            groups.setdefault(key, []).append(index)
+
+        futures = [None] * len(messages)
+        executor = self._get_executor()
+        for (_, body, html), indexes in groups.items():
+            if len(indexes) == 1:
+                m = messages[indexes[0]]
+                futures[indexes[0]] = self.send_email_background(m["to_email"], m["subject"], m["body"], html)
+                continue
+            for start in range(0, len(indexes), BREVO_BATCH_SIZE):
+                chunk = indexes[start:start + BREVO_BATCH_SIZE]
+                future = executor.submit(self._deliver_versions, [messages[i] for i in chunk], body, html)
+                for i in chunk:
+                    futures[i] = future
+        return futures
+
+
+_brevo_service = None
+_brevo_service_lock = threading.Lock()
 
-        except Exception as e:
-            print(f"✗ Unexpected email error for {to_email}: {e}")
 
-    def send_email_background(self, to_email, subject, body, html=False):
-        threading.Thread(
-            target=self._send_email,
-            args=(to_email, subject, body, html),
-            daemon=True
-        ).start()
+def get_brevo_email_service():
+    """Return the process-wide Brevo sender, so every caller shares one bounded pool."""
+    global _brevo_service
+    with _brevo_service_lock:
+        if _brevo_service is None:
+            _brevo_service = BrevoEmailService()
+        return _brevo_service
@@ -1,9 +1,11 @@
-from pymongo import MongoClient, ASCENDING
+from pymongo import MongoClient
 import os
 from dotenv import load_dotenv
+from src.Utils.IndexManager import apply_indexes
 
 load_dotenv()
 MONGO_URI = os.getenv("MONGO_URI")
+MONGO_APPLY_INDEXES = os.getenv("MONGO_APPLY_INDEXES", "true").lower() != "false"
 
 # Global cached client
 _mongo_client = None
@@ -26,12 +28,13 @@ def get_client():
         # Initialize DB
         _db = _mongo_client.get_default_database()
 
-        # Ensure index ONCE
-        try:
-            _db.candidates.create_index([("email", ASCENDING)], unique=True)
-            print("Unique index on 'email' ensured (once per worker).")
-        except Exception as e:
-            print("Failed to create index:", e)
+        # Ensure declared indexes ONCE (see src/Model/Indexes.py)
+        if MONGO_APPLY_INDEXES:
+            try:
+                ensured = apply_indexes(_db)
+                print(f"{len(ensured)} declared indexes ensured (once per worker).")
+            except Exception as e:
+                print("Failed to create indexes:", e)
 
     return _mongo_client
 
@@ -0,0 +1,137 @@
+"""
+Company / HR context for a drive.
+
+The emailing and scheduling agents all need the same details for a drive:
+company name, HR name and email, and the job role. The lookup is a chain of
+queries: the drive, then the company by ObjectId, raw id, or company_id,
+then the company's HR user. resolve_drive_context() runs that chain once and
+keeps the result in an in-process TTL cache, so a run needs at most one
+cached lookup.
+
+Writers that change this data call invalidate_drive_context() or
+invalidate_company_context(). The TTL limits how stale the context can get
+after writes made outside this process.
+
+Configuration (environment):
+- DRIVE_CONTEXT_TTL_SECONDS: how long a resolved context is reused (default 300, 0 disables)
+"""
+
+import os
+import threading
+import time
+from dataclasses import dataclass
+from typing import Optional
+
+from bson import ObjectId
+
+from src.Utils.Database import db
+
+DRIVE_CONTEXT_TTL_SECONDS = float(os.getenv("DRIVE_CONTEXT_TTL_SECONDS", "300"))
+
+DEFAULT_COMPANY_NAME = "HiRekruit"
+DEFAULT_HR_NAME = "HR Team"
+DEFAULT_HR_EMAIL = "hirekruit@gmail.com"
+DEFAULT_JOB_ROLE = "the position"
+
+
+@dataclass(frozen=True)
+class DriveContext:
+    drive_id: str
+    drive_found: bool = False
+    company_id: Optional[str] = None
+    company_name: str = DEFAULT_COMPANY_NAME
+    hr_name: str = DEFAULT_HR_NAME
+    hr_email: str = DEFAULT_HR_EMAIL
+    job_role: str = DEFAULT_JOB_ROLE
+
+    def template_values(self):
+        """Placeholder values shared by every email of the drive."""
+        return {
+            "company_name": self.company_name,
+            "hr_name": self.hr_name,
+            "hr_email": self.hr_email,
+            "job_role": self.job_role
+        }
+
+
+_cache = {}     # drive_id -> (expires_at, DriveContext)
+_cache_lock = threading.Lock()
+
+
+def _find_company(company_id):
+    try:
+        return db.companies.find_one({"_id": ObjectId(company_id)})
+    except Exception:
+        return (
+            db.companies.find_one({"_id": company_id}) or
+            db.companies.find_one({"company_id": company_id})
+        )
+
+
+def _load_drive_context(drive_id):
+    drive = db.drives.find_one({"_id": ObjectId(drive_id)}, {"company_id": 1, "role": 1})
+    if not drive:
+        return DriveContext(drive_id=drive_id)
+
+    context = {"drive_id": drive_id, "drive_found": True}
+    if drive.get("role"):
+        context["job_role"] = drive["role"]
+
+    company_id = drive.get("company_id")
+    if not company_id:
+        return DriveContext(**context)
+    context["company_id"] = str(company_id)
+
+    company_doc = _find_company(company_id)
+    if company_doc:
+        context["company_name"] = company_doc.get("name", DEFAULT_COMPANY_NAME)
+
+    hr_user = db.users.find_one({"company_id": str(company_id)}, {"name": 1, "email": 1})
+    if hr_user:
+        context["hr_name"] = hr_user.get("name", DEFAULT_HR_NAME)
+        context["hr_email"] = hr_user.get("email", DEFAULT_HR_EMAIL)
+    elif company_doc:
+        context["hr_name"] = company_doc.get("hr_name") or company_doc.get("contact_name") or DEFAULT_HR_NAME
+        context["hr_email"] = company_doc.get("hr_email") or company_doc.get("email") or DEFAULT_HR_EMAIL
+
+    return DriveContext(**context)
+
+
+def resolve_drive_context(drive_id):
+    """
+    Return the DriveContext for a drive, from the cache when fresh. Lookup errors
+    fall back to the defaults (not cached); check drive_found before relying on it.
+    """
+    drive_id = str(drive_id)
+    now = time.monotonic()
+    with _cache_lock:
+        cached = _cache.get(drive_id)
+        if cached and cached[0] > now:
+            return cached[1]
+
+    try:
+        context = _load_drive_context(drive_id)
+    except Exception as e:
+        print(f"⚠️ Warning: Could not resolve company/HR details for drive {drive_id}: {e}")
+        return DriveContext(drive_id=drive_id)
+
+    if context.drive_found and DRIVE_CONTEXT_TTL_SECONDS > 0:
+        with _cache_lock:
+            _cache[drive_id] = (now + DRIVE_CONTEXT_TTL_SECONDS, context)
+    return context
+
+
+def invalidate_drive_context(drive_id):
+    with _cache_lock:
+        _cache.pop(str(drive_id), None)
+
+
+def invalidate_company_context(company_id=None):
+    """Drop cached contexts of one company's drives, or every context when company_id is None."""
+    with _cache_lock:
+        if company_id is None:
+            _cache.clear()
+            return
+        company_id = str(company_id)
+        for drive_id in [d for d, (_, context) in _cache.items() if context.company_id == company_id]:
+            del _cache[drive_id]
@@ -0,0 +1,334 @@
+"""
+Materialized per-drive funnel counters (drive_stats collection).
+
+One document per drive, keyed by the drive id string:
+    {
+        "_id": drive_id,
+        "total_candidates": int,
+        "shortlisted": int,      # resume_shortlisted == "yes"
+        "emailed": int,          # email_sent == "yes"
+        "selected": int,         # selected in SELECTED_VALUES
+        "rounds": {"1": {"scheduled": int, "completed": int, "passed": int}, ...},
+        "updated_at": datetime
+    }
+
+Every code path that changes one of these flags on drive_candidates applies the
+difference with $inc (record_transition / inc_drive_stats), so dashboards read
+one small document instead of scanning the drive's candidates. Round keys are
+1-based positions in each candidate's rounds_status, as the drive controllers index rounds.
+
+Drives created before counters existed have no document; it is built from
+drive_candidates the first time it is read, and increments are never applied to
+a missing document (upsert=False), so a partial document cannot be created.
+
+If counters ever drift (manual DB edits, a crash between the two writes), rebuild
+them from drive_candidates:
+    python -m src.Utils.DriveStats reconcile [drive_id ...]
+
+Benchmark of the drive progress read (needs a local mongod at BENCH_MONGO_URI;
+seeds its own database and drops it afterwards). It compares the previous
+find-and-count over full drive_candidates documents with the cold-drive
+aggregation (compute_drive_stats) and the drive_stats read that
+get_drive_by_id / get_drive_progress now do, by latency and bytes transferred:
+    python -m src.Utils.DriveStats benchmark [num_candidates] [rounds] [turns_per_conversation]
+"""
+
+import os
+import time
+from collections import Counter
+from datetime import datetime
+
+SELECTED_VALUES = ["yes", "Yes", True, "true"]
+ROUND_FIELDS = ("scheduled", "completed", "passed")
+
+
+def _stats_collection():
+    from src.Utils.Database import db
+    return db.drive_stats
+
+
+def candidate_counters(doc):
+    """Flat {$inc path: 0/1} contribution of one drive_candidates document (None: not present)."""
+    if doc is None:
+        return {}
+    counters = {
+        "total_candidates": 1,
+        "shortlisted": int(doc.get("resume_shortlisted") == "yes"),
+        "emailed": int(doc.get("email_sent") == "yes"),
+        "selected": int(doc.get("selected") in SELECTED_VALUES),
+    }
+    for index, round_info in enumerate(doc.get("rounds_status") or []):
+        if not isinstance(round_info, dict):
+            continue
+        prefix = f"rounds.{index + 1}"
+        counters[f"{prefix}.scheduled"] = int(round_info.get("scheduled") == "yes")
+        counters[f"{prefix}.completed"] = int(round_info.get("completed") == "yes")
+        counters[f"{prefix}.passed"] = int(round_info.get("result") == "passed")
+    return counters
+
+
+def counter_delta(before, after):
+    """Non-zero differences between two candidate_counters() results."""
+    delta = Counter(after)
+    delta.subtract(before)
+    return {path: value for path, value in delta.items() if value}
+
+
+def init_drive_stats(drive_id):
+    """Create the zeroed stats document for a new drive."""
+    fields = {k: v for k, v in _empty_stats(str(drive_id)).items() if k != "_id"}
+    fields["updated_at"] = datetime.utcnow()
+    try:
+        _stats_collection().replace_one({"_id": str(drive_id)}, fields, upsert=True)
+    except Exception as e:
+        print(f"Failed to create drive_stats for {drive_id}: {e}")
+
+
+def inc_drive_stats(drive_id, deltas):
+    """Apply counter deltas to an existing stats document; no-op if the drive has none yet."""
+    deltas = {path: value for path, value in deltas.items() if value}
+    if not drive_id or not deltas:
+        return
+    try:
+        _stats_collection().update_one(
+            {"_id": str(drive_id)},
+            {"$inc": deltas, "$set": {"updated_at": datetime.utcnow()}}
+        )
+    except Exception as e:
+        print(f"Failed to update drive_stats for {drive_id}: {e}")
+
+
+def record_transition(drive_id, before, after):
+    """
+    Apply the counter change between two versions of one drive_candidates document.
+    Pass before=None for an insert and after=None for a delete.
+    """
+    inc_drive_stats(drive_id, counter_delta(candidate_counters(before), candidate_counters(after)))
+
+
+def funnel_pipeline(drive_ids=None):
+    """Aggregate funnel counters per drive; restricted to drive_ids when given."""
+    pipeline = []
+    if drive_ids is not None:
+        pipeline.append({"$match": {"drive_id": {"$in": list(drive_ids)}}})
+    pipeline += [
+        {"$project": {
+            "_id": 0,
+            "drive_id": 1,
+            "resume_shortlisted": 1,
+            "email_sent": 1,
+            "selected": 1,
+            "rounds_status.scheduled": 1,
+            "rounds_status.completed": 1,
+            "rounds_status.result": 1
+        }},
+        {"$facet": {
+            "totals": [
+                {"$group": {
+                    "_id": "$drive_id",
+                    "total_candidates": {"$sum": 1},
+                    "shortlisted": {"$sum": {"$cond": [{"$eq": ["$resume_shortlisted", "yes"]}, 1, 0]}},
+                    "emailed": {"$sum": {"$cond": [{"$eq": ["$email_sent", "yes"]}, 1, 0]}},
+                    "selected": {"$sum": {"$cond": [{"$in": ["$selected", SELECTED_VALUES]}, 1, 0]}}
+                }}
+            ],
+            "rounds": [
+                {"$unwind": {"path": "$rounds_status", "includeArrayIndex": "round_index"}},
+                {"$group": {
+                    "_id": {"drive_id": "$drive_id", "round_index": "$round_index"},
+                    "scheduled": {"$sum": {"$cond": [{"$eq": ["$rounds_status.scheduled", "yes"]}, 1, 0]}},
+                    "completed": {"$sum": {"$cond": [{"$eq": ["$rounds_status.completed", "yes"]}, 1, 0]}},
+                    "passed": {"$sum": {"$cond": [{"$eq": ["$rounds_status.result", "passed"]}, 1, 0]}}
+                }}
+            ]
+        }}
+    ]
+    return pipeline
+
+
+def _empty_stats(drive_id):
+    return {"_id": drive_id, "total_candidates": 0, "shortlisted": 0, "emailed": 0, "selected": 0, "rounds": {}}
+
+
+def compute_drive_stats(drive_ids=None, collection=None):
+    """Count funnel numbers from drive_candidates. Returns {drive_id: stats document}."""
+    if collection is None:
+        from src.Utils.Database import db
+        collection = db.drive_candidates
+
+    result = next(collection.aggregate(funnel_pipeline(drive_ids)), {"totals": [], "rounds": []})
+
+    stats = {drive_id: _empty_stats(drive_id) for drive_id in (drive_ids or [])}
+    for row in result["totals"]:
+        doc = stats.setdefault(row["_id"], _empty_stats(row["_id"]))
+        for field in ("total_candidates", "shortlisted", "emailed", "selected"):
+            doc[field] = row[field]
+    for row in result["rounds"]:
+        round_index = row["_id"].get("round_index")
+        if round_index is None:
+            continue
+        doc = stats.setdefault(row["_id"]["drive_id"], _empty_stats(row["_id"]["drive_id"]))
+        doc["rounds"][str(int(round_index) + 1)] = {field: row[field] for field in ROUND_FIELDS}
+    return stats
+
+
+def reconcile_drive_stats(drive_ids=None):
+    """
+    Rebuild counters from scratch for the given drives (all drives when None).
+    Returns {drive_id: stats document} as written.
+    """
+    stats = compute_drive_stats(drive_ids)
+    collection = _stats_collection()
+    now = datetime.utcnow()
+    for drive_id, doc in stats.items():
+        if drive_id is None:
+            continue
+        fields = {k: v for k, v in doc.items() if k != "_id"}
+        fields["updated_at"] = now
+        collection.replace_one({"_id": drive_id}, fields, upsert=True)
+    if drive_ids is None:
+        # Drives that no longer have any candidates
+        collection.delete_many({"_id": {"$nin": [drive_id for drive_id in stats if drive_id is not None]}})
+    return stats
+
+
+def get_drive_stats_many(drive_ids):
+    """
+    Return {drive_id: stats document} for several drives in one query.
+    Drives without a stats document yet are reconciled on first read.
+    """
+    drive_ids = [str(drive_id) for drive_id in drive_ids]
+    if not drive_ids:
+        return {}
+    stats = {doc["_id"]: doc for doc in _stats_collection().find({"_id": {"$in": drive_ids}})}
+    missing = [drive_id for drive_id in drive_ids if drive_id not in stats]
+    if missing:
+        stats.update(reconcile_drive_stats(missing))
+    return stats
+
+
+def get_drive_stats(drive_id):
+    return get_drive_stats_many([drive_id])[str(drive_id)]
+
+
+def round_stats(stats, round_number):
+    """{"scheduled", "completed", "passed"} for a 1-based round number, zeros if absent."""
+    counts = stats.get("rounds", {}).get(str(round_number), {})
+    return {field: counts.get(field, 0) for field in ROUND_FIELDS}
+
+
+def funnel_summary(stats):
+    """The JSON-friendly funnel returned by the drive endpoints."""
+    return {
+        "total_candidates": stats.get("total_candidates", 0),
+        "shortlisted": stats.get("shortlisted", 0),
+        "emailed": stats.get("emailed", 0),
+        "selected": stats.get("selected", 0),
+        "rounds": {
+            round_number: round_stats(stats, round_number)
+            for round_number in sorted(stats.get("rounds", {}), key=int)
+        }
+    }
+
+
+def _legacy_round_counts(collection, drive_id, round_numbers):
+    """The previous approach: fetch full documents and count in Python (benchmark baseline)."""
+    candidates = list(collection.find({"drive_id": drive_id}))
+    counts = {}
+    for round_num in round_numbers:
+        counts[round_num] = {
+            "scheduled": sum(1 for c in candidates if len(c.get("rounds_status", [])) >= round_num
+                             and c["rounds_status"][round_num - 1].get("scheduled") == "yes"),
+            "completed": sum(1 for c in candidates if len(c.get("rounds_status", [])) >= round_num
+                             and c["rounds_status"][round_num - 1].get("completed") == "yes"),
+            "passed": sum(1 for c in candidates if len(c.get("rounds_status", [])) >= round_num
+                          and c["rounds_status"][round_num - 1].get("result") == "passed"),
+        }
+    total = len([c for c in candidates if c.get("resume_shortlisted") == "yes"])
+    return {"total_shortlisted": total, "rounds": counts}, candidates
+
+
+def run_benchmark(num_candidates=2000, rounds=3, turns=40):
+    import random
+
+    import bson
+    from pymongo import MongoClient
+
+    client = MongoClient(os.getenv("BENCH_MONGO_URI", "mongodb://localhost:27017"))
+    database = client["hirekruit_drive_stats_bench"]
+    collection = database.drive_candidates
+    client.drop_database(database.name)
+    collection.create_index("drive_id")
+
+    drive_id = "bench-drive"
+    rng = random.Random(7)
+    docs = []
+    for i in range(num_candidates):
+        rounds_status = []
+        for r in range(rounds):
+            rounds_status.append({
+                "round_number": r + 1,
+                "scheduled": rng.choice(["yes", "no"]),
+                "completed": rng.choice(["yes", "no"]),
+                "result": rng.choice(["passed", "failed", "pending"]),
+                "conversation": [
+                    {"role": "assistant" if t % 2 else "user", "content": "Tell me about a project you led. " * 8}
+                    for t in range(turns)
+                ]
+            })
+        docs.append({
+            "candidate_id": str(i),
+            "drive_id": drive_id,
+            "resume_shortlisted": rng.choice(["yes", "no"]),
+            "email_sent": rng.choice(["yes", "no"]),
+            "rounds_status": rounds_status
+        })
+    collection.insert_many(docs)
+
+    round_numbers = list(range(1, rounds + 1))
+    try:
+        started = time.perf_counter()
+        legacy, legacy_docs = _legacy_round_counts(collection, drive_id, round_numbers)
+        legacy_time = time.perf_counter() - started
+        legacy_bytes = sum(len(bson.encode(doc)) for doc in legacy_docs)
+
+        started = time.perf_counter()
+        raw = list(collection.aggregate(funnel_pipeline([drive_id])))
+        aggregate_time = time.perf_counter() - started
+        aggregate_bytes = sum(len(bson.encode(doc)) for doc in raw)
+
+        stats = compute_drive_stats([drive_id], collection)[drive_id]
+        counts = {"total_shortlisted": stats["shortlisted"],
+                  "rounds": {n: round_stats(stats, n) for n in round_numbers}}
+        assert counts == legacy, "drive_stats and legacy counts differ"
+
+        # What the drive endpoints read once the counters exist
+        database.drive_stats.replace_one({"_id": drive_id}, stats, upsert=True)
+        started = time.perf_counter()
+        stored = list(database.drive_stats.find({"_id": {"$in": [drive_id]}}))
+        stats_time = time.perf_counter() - started
+        stats_bytes = sum(len(bson.encode(doc)) for doc in stored)
+
+        print(f"Seeded {num_candidates} candidates x {rounds} rounds x {turns} turns")
+        print(f"legacy find + Python: {legacy_time * 1000:8.1f} ms  {legacy_bytes / 1024:10.1f} KiB transferred")
+        print(f"aggregation (cold):   {aggregate_time * 1000:8.1f} ms  {aggregate_bytes / 1024:10.1f} KiB transferred")
+        print(f"drive_stats read:     {stats_time * 1000:8.1f} ms  {stats_bytes / 1024:10.1f} KiB transferred")
+    finally:
+        client.drop_database(database.name)
+
+
+if __name__ == "__main__":
+    import sys
+
+    if len(sys.argv) >= 2 and sys.argv[1] == "benchmark":
+        run_benchmark(*(int(arg) for arg in sys.argv[2:5]))
+        sys.exit(0)
+
+    if len(sys.argv) < 2 or sys.argv[1] != "reconcile":
+        print("usage: python -m src.Utils.DriveStats reconcile [drive_id ...] | benchmark [candidates] [rounds] [turns]")
+        sys.exit(1)
+
+    rebuilt = reconcile_drive_stats(sys.argv[2:] or None)
+    for drive_id, doc in rebuilt.items():
+        print(f"{drive_id}: {funnel_summary(doc)}")
+    print(f"Reconciled {len(rebuilt)} drive(s)")
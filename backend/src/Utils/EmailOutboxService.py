@@ -0,0 +1,306 @@
+"""
+Durable email outbox.
+
+Agents render messages and enqueue them into the email_outbox collection with
+one bulk upsert; each message is keyed by (drive_id, candidate_id, template),
+so re-running a step never queues a second copy of a message that was already
+sent. A dispatcher drains the outbox in batches: it claims a batch with a lease,
+sends it through the transport's bounded pool (send_batch), and only then marks
+the messages sent and flips the drive_candidates flags (email_sent,
+final_email_sent) in bulk. Failed sends are retried with exponential backoff.
+
+The dispatcher runs as the dispatch_email_outbox_task Celery task, in a
+background thread when no broker is reachable, or standalone:
+    python -m src.Utils.EmailOutboxService [--loop] [--transport brevo|smtp]
+
+The task receives the transport by name ("brevo" or "smtp", see
+get_outbox_transport) so a worker sends through the same provider as the
+agent that queued the messages. When a drain leaves messages waiting for a
+backoff or a lease, the next dispatch is scheduled for the earliest of them
+(a countdown task, or a sleeping background thread without a broker); one
+delayed dispatch per transport is scheduled at a time (email_outbox_schedule).
+
+Configuration (environment):
+- EMAIL_OUTBOX_BATCH_SIZE:         messages claimed per batch (default 200)
+- EMAIL_OUTBOX_MAX_ATTEMPTS:       sends before a message is marked failed (default 5)
+- EMAIL_OUTBOX_BACKOFF_SECONDS:    first retry delay, doubled per attempt (default 30)
+- EMAIL_OUTBOX_BACKOFF_MAX_SECONDS: retry delay cap (default 1800)
+- EMAIL_OUTBOX_LEASE_SECONDS:      claim lease; expired claims are re-dispatched (default 300)
+"""
+
+import os
+import random
+import threading
+import time
+import uuid
+from collections import defaultdict
+from concurrent.futures import wait
+from datetime import datetime, timedelta
+
+from bson import ObjectId
+from pymongo import UpdateOne
+from pymongo.errors import DuplicateKeyError
+
+from src.Model.EmailOutbox import OutboxStatus
+from src.Utils.Database import db
+from src.Utils.DriveStats import inc_drive_stats
+from src.Utils.EmailTransport import email_message
+
+EMAIL_OUTBOX_BATCH_SIZE = int(os.getenv("EMAIL_OUTBOX_BATCH_SIZE", "200"))
+EMAIL_OUTBOX_MAX_ATTEMPTS = int(os.getenv("EMAIL_OUTBOX_MAX_ATTEMPTS", "5"))
+EMAIL_OUTBOX_BACKOFF_SECONDS = float(os.getenv("EMAIL_OUTBOX_BACKOFF_SECONDS", "30"))
+EMAIL_OUTBOX_BACKOFF_MAX_SECONDS = float(os.getenv("EMAIL_OUTBOX_BACKOFF_MAX_SECONDS", "1800"))
+EMAIL_OUTBOX_LEASE_SECONDS = int(os.getenv("EMAIL_OUTBOX_LEASE_SECONDS", "300"))
+
+
+def enqueue_emails(messages):
+    """
+    Insert messages built with create_outbox_message(). Messages whose key already
+    exists are left untouched, except failed ones, which are queued again.
+    Returns the number of newly queued messages.
+    """
+    messages = list(messages)
+    if not messages:
+        return 0
+
+    result = db.email_outbox.bulk_write(
+        [UpdateOne({"_id": m["_id"]}, {"$setOnInsert": m}, upsert=True) for m in messages],
+        ordered=False
+    )
+    revived = db.email_outbox.update_many(
+        {"_id": {"$in": [m["_id"] for m in messages]}, "status": OutboxStatus.FAILED},
+        {"$set": {
+            "status": OutboxStatus.PENDING,
+            "attempts": 0,
+            "next_attempt_at": datetime.utcnow(),
+            "updated_at": datetime.utcnow()
+        }}
+    )
+    return result.upserted_count + revived.modified_count
+
+
+def _claim_batch(limit):
+    """Lease up to `limit` due messages to this dispatcher. Returns the claimed documents."""
+    now = datetime.utcnow()
+    due = {
+        "$or": [
+            {"status": OutboxStatus.PENDING, "next_attempt_at": {"$lte": now}},
+            # A dispatcher died mid-batch
+            {"status": OutboxStatus.SENDING, "lease_expires_at": {"$lte": now}}
+        ]
+    }
+    ids = [doc["_id"] for doc in db.email_outbox.find(due, {"_id": 1}).limit(limit)]
+    if not ids:
+        return []
+
+    claim_id = uuid.uuid4().hex
+    db.email_outbox.update_many(
+        {"_id": {"$in": ids}, **due},
+        {"$set": {
+            "status": OutboxStatus.SENDING,
+            "claim_id": claim_id,
+            "lease_expires_at": now + timedelta(seconds=EMAIL_OUTBOX_LEASE_SECONDS),
+            "updated_at": now
+        }}
+    )
+    return list(db.email_outbox.find({"claim_id": claim_id, "status": OutboxStatus.SENDING}))
+
+
+def _backoff_seconds(attempts):
+    delay = min(EMAIL_OUTBOX_BACKOFF_SECONDS * (2 ** (attempts - 1)), EMAIL_OUTBOX_BACKOFF_MAX_SECONDS)
+    return delay * random.uniform(0.8, 1.2)
+
+
+def _apply_on_sent(sent):
+    """Set the on_sent drive_candidates fields for delivered messages, one update per (drive, fields)."""
+    groups = defaultdict(list)
+    for message in sent:
+        if message.get("on_sent") and message.get("drive_candidate_id"):
+            key = (message["drive_id"], tuple(sorted(message["on_sent"].items())))
+            groups[key].append(ObjectId(message["drive_candidate_id"]))
+
+    for (drive_id, fields), ids in groups.items():
+        fields = dict(fields)
+        if fields.get("email_sent") == "yes":
+            # Flip the not-yet-emailed candidates first so modified_count is the exact counter delta
+            newly_emailed = db.drive_candidates.update_many(
+                {"_id": {"$in": ids}, "email_sent": {"$ne": "yes"}},
+                {"$set": fields}
+            ).modified_count
+            inc_drive_stats(drive_id, {"emailed": newly_emailed})
+        db.drive_candidates.update_many({"_id": {"$in": ids}}, {"$set": fields})
+
+
+def dispatch_batch(transport, batch_size=None):
+    """
+    Claim, send and settle one batch. Returns (sent, failed) counts;
+    (0, 0) means nothing was due.
+    """
+    batch = _claim_batch(batch_size or EMAIL_OUTBOX_BATCH_SIZE)
+    if not batch:
+        return 0, 0
+
+    futures = transport.send_batch(
+        email_message(m["to_email"], m["subject"], m.get("body"), m.get("html", False),
+                      template_body=m.get("template_body"), params=m.get("params"))
+        for m in batch
+    )
+    wait(futures)
+
+    now = datetime.utcnow()
+    sent, updates = [], []
+    for message, future in zip(batch, futures):
+        error = future.exception()
+        if error is None:
+            sent.append(message)
+            updates.append(UpdateOne(
+                {"_id": message["_id"], "claim_id": message["claim_id"]},
+                {"$set": {"status": OutboxStatus.SENT, "sent_at": now, "updated_at": now, "last_error": None}}
+            ))
+            continue
+
+        attempts = message.get("attempts", 0) + 1
+        gave_up = attempts >= EMAIL_OUTBOX_MAX_ATTEMPTS
+        updates.append(UpdateOne(
+            {"_id": message["_id"], "claim_id": message["claim_id"]},
+            {"$set": {
+                "status": OutboxStatus.FAILED if gave_up else OutboxStatus.PENDING,
+                "attempts": attempts,
+                "last_error": str(error),
+                "next_attempt_at": now + timedelta(seconds=_backoff_seconds(attempts)),
+                "updated_at": now
+            }}
+        ))
+
+    db.email_outbox.bulk_write(updates, ordered=False)
+    _apply_on_sent(sent)
+    return len(sent), len(batch) - len(sent)
+
+
+def dispatch_outbox(transport, batch_size=None):
+    """Drain every message that is currently due. Returns totals."""
+    total_sent = total_failed = 0
+    while True:
+        sent, failed = dispatch_batch(transport, batch_size)
+        if not sent and not failed:
+            break
+        total_sent += sent
+        total_failed += failed
+        print(f"Email outbox batch: {sent} sent, {failed} failed")
+    return {"sent": total_sent, "failed": total_failed}
+
+
+def run_dispatcher(transport, poll_seconds=5):
+    """Standalone dispatcher loop: drain, then poll for new or retryable messages."""
+    while True:
+        dispatch_outbox(transport)
+        time.sleep(poll_seconds)
+
+
+_smtp_transport = None
+_smtp_transport_lock = threading.Lock()
+
+
+def get_outbox_transport(name="brevo"):
+    """Process-wide transport for a transport name ("brevo" or "smtp")."""
+    global _smtp_transport
+    if name == "smtp":
+        with _smtp_transport_lock:
+            if _smtp_transport is None:
+                from src.Utils.EmailService import EmailService
+                _smtp_transport = EmailService(
+                    os.getenv("SMTP_SERVER"), int(os.getenv("SMTP_PORT", "587")),
+                    os.getenv("EMAIL_USER"), os.getenv("EMAIL_PASSWORD")
+                )
+            return _smtp_transport
+    if name != "brevo":
+        raise ValueError(f"Unknown email transport: {name}")
+    from src.Utils.BrevoEmailService import get_brevo_email_service
+    return get_brevo_email_service()
+
+
+def next_dispatch_delay():
+    """
+    Seconds until the earliest pending retry or claim lease expires
+    (0 if one is already due); None when nothing is waiting.
+    """
+    waiting = []
+    for status, field in ((OutboxStatus.PENDING, "next_attempt_at"), (OutboxStatus.SENDING, "lease_expires_at")):
+        doc = db.email_outbox.find_one({"status": status}, {field: 1}, sort=[(field, 1)])
+        if doc and doc.get(field):
+            waiting.append(doc[field])
+    if not waiting:
+        return None
+    return max(0.0, (min(waiting) - datetime.utcnow()).total_seconds())
+
+
+def reserve_delayed_dispatch(transport_name, delay):
+    """
+    Record a dispatch due in `delay` seconds for transport_name. Returns False when
+    one is already scheduled at or before that time (the caller then schedules nothing).
+    """
+    now = datetime.utcnow()
+    due_at = now + timedelta(seconds=delay)
+    try:
+        db.email_outbox_schedule.update_one(
+            # Replace a schedule that already ran (due_at passed) or is later than this one
+            {"_id": transport_name, "$or": [{"due_at": {"$lte": now}}, {"due_at": {"$gt": due_at}}]},
+            {"$set": {"due_at": due_at, "updated_at": now}},
+            upsert=True
+        )
+        return True
+    except DuplicateKeyError:
+        return False
+
+
+def _drain_in_background(transport):
+    """Broker-less dispatcher: drain, then sleep until the next retry is due, until nothing waits."""
+    from src.SocketIO.SocketIO_Instance import socketio
+
+    while True:
+        dispatch_outbox(transport)
+        delay = next_dispatch_delay()
+        if delay is None:
+            return
+        socketio.sleep(max(delay, 1))
+
+
+def kick_outbox_dispatch(transport=None):
+    """
+    Start draining now: queue the Celery task for the caller's transport, or
+    drain in a background thread (retries included) without a broker.
+    """
+    from src.SocketIO.SocketIO_Instance import socketio
+    from src.Tasks.tasks import dispatch_email_outbox_task
+
+    transport_name = getattr(transport, "transport_name", None) or "brevo"
+    try:
+        task_result = dispatch_email_outbox_task.delay(transport_name)
+        print(f"Email outbox dispatch task queued with ID: {task_result.id} ({transport_name})")
+    except Exception as e:
+        if transport is None:
+            transport = get_outbox_transport(transport_name)
+        print(f"Could not queue outbox dispatch ({e}); draining in background thread")
+        socketio.start_background_task(_drain_in_background, transport)
+
+
+def get_outbox_summary(drive_id):
+    """Message counts per status for a drive."""
+    counts = {status.value: 0 for status in OutboxStatus}
+    for row in db.email_outbox.aggregate([
+        {"$match": {"drive_id": drive_id}},
+        {"$group": {"_id": "$status", "count": {"$sum": 1}}}
+    ]):
+        counts[row["_id"]] = row["count"]
+    return counts
+
+
+if __name__ == "__main__":
+    import sys
+
+    args = sys.argv[1:]
+    transport = get_outbox_transport(args[args.index("--transport") + 1] if "--transport" in args else "brevo")
+    if "--loop" in args:
+        run_dispatcher(transport)
+    else:
+        print(dispatch_outbox(transport))
@@ -1,39 +1,100 @@
 import smtplib
+import threading
 from email.mime.text import MIMEText
 from email.mime.multipart import MIMEMultipart
 import os
 
+from src.Utils.EmailTransport import PooledEmailTransport
 
-class EmailService:
-    def __init__(self, smtp_server, smtp_port, username, password):
+# Servers commonly cap messages per session; reconnect before hitting the cap.
+SMTP_MAX_MESSAGES_PER_CONNECTION = int(os.getenv("SMTP_MAX_MESSAGES_PER_CONNECTION", "100"))
+SMTP_USE_TLS = os.getenv("SMTP_USE_TLS", "true").lower() != "false"
+
+
+class EmailService(PooledEmailTransport):
+    """
+    SMTP sender. Each pool worker keeps one authenticated connection open and
+    reuses it across messages, so STARTTLS + login happen once per worker
+    rather than once per email. use_tls=False and empty credentials allow
+    a plain local server (e.g. aiosmtpd) to stand in for the real one.
+    """
+
+    # Name the outbox dispatcher uses to rebuild this transport in a worker
+    transport_name = "smtp"
+
+    def __init__(self, smtp_server, smtp_port, username, password, use_tls=None, max_workers=None):
+        super().__init__(max_workers)
         self.smtp_server = smtp_server
         self.smtp_port = smtp_port
         self.username = username
         self.password = password
+        self.use_tls = SMTP_USE_TLS if use_tls is None else use_tls
+        self._local = threading.local()
+        self._connections = []
+        self._connections_lock = threading.Lock()
+
+    def _connect(self):
+        server = smtplib.SMTP(self.smtp_server, self.smtp_port, timeout=30)
+        if self.use_tls:
+            server.starttls()
+        if self.username and self.password:
+            server.login(self.username, self.password)
+        with self._connections_lock:
+            self._connections.append(server)
+        return server
+
+    def _drop_connection(self):
+        server = getattr(self._local, "server", None)
+        self._local.server = None
+        if server is None:
+            return
+        with self._connections_lock:
+            if server in self._connections:
+                self._connections.remove(server)
+        try:
+            server.quit()
+        except Exception:
+            server.close()
+
+    def _get_connection(self):
+        """This thread's connection, opened on first use and recycled after the per-session cap."""
+        if getattr(self._local, "server", None) is not None and self._local.sent >= SMTP_MAX_MESSAGES_PER_CONNECTION:
+            self._drop_connection()
+        if getattr(self._local, "server", None) is None:
+            self._local.server = self._connect()
+            self._local.sent = 0
+        return self._local.server
+
+    def _build_message(self, to_email, subject, body, html):
+        msg = MIMEMultipart("alternative")
+        msg["Subject"] = subject
+        msg["From"] = self.username
+        msg["To"] = to_email
+
+        # Attach body as HTML or plain text
+        if html:
+            msg.attach(MIMEText(body, "html"))
+        else:
+            msg.attach(MIMEText(body, "plain"))
+        return msg
+
+    def _deliver(self, to_email, subject, body, html=False):
+        msg = self._build_message(to_email, subject, body, html).as_string()
+        try:
+            self._get_connection().sendmail(self.username, to_email, msg)
+        except (smtplib.SMTPServerDisconnected, ConnectionError):
+            # Idle connection closed by the server: reconnect once and retry
+            self._drop_connection()
+            self._get_connection().sendmail(self.username, to_email, msg)
+        self._local.sent += 1
 
     def send_email(self, to_email: str, subject: str, body: str, html: bool = False):
-        """Send email with detailed error handling."""
+        """Send email on the calling thread (reusing its connection), with detailed error handling."""
         try:
             print(f"\n=== Sending Email ===")
             print(f"To: {to_email} | Subject: {subject}")
 
-            # Build message
-            msg = MIMEMultipart("alternative")
-            msg["Subject"] = subject
-            msg["From"] = self.username
-            msg["To"] = to_email
-
-            # Attach body as HTML or plain text
-            if html:
-                msg.attach(MIMEText(body, "html"))
-            else:
-                msg.attach(MIMEText(body, "plain"))
-
-            # SMTP connection
-            with smtplib.SMTP(self.smtp_server, self.smtp_port, timeout=30) as server:
-                server.starttls()
-                server.login(self.username, self.password)
-                server.sendmail(self.username, to_email, msg.as_string())
+            self._deliver(to_email, subject, body, html)
 
             print(f"✓ Email sent to {to_email}")
             return True
@@ -50,6 +111,17 @@ class EmailService:
             print(f"✗ Unexpected error: {e}")
             raise
 
+    def close(self):
+        """Stop the worker pool and close every open connection."""
+        super().close()
+        with self._connections_lock:
+            connections, self._connections = self._connections, []
+        for server in connections:
+            try:
+                server.quit()
+            except Exception:
+                server.close()
+
     # def send_otp_email(self, recipient_email: str, otp: str, purpose: str = "verification"):
     #     """Send OTP via email with beautiful HTML template"""
     #     try:
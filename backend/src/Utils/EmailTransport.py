@@ -0,0 +1,81 @@
+"""
+Shared delivery layer for the email services.
+
+Every service (SMTP, async SMTP, Brevo) sends through a bounded worker pool
+instead of one thread per message, and returns a concurrent.futures.Future
+per message that resolves to True on confirmed delivery or raises the
+delivery error. Callers that need to record a delivery (e.g. email_sent)
+attach a done-callback instead of assuming success.
+
+Configuration (environment):
+- EMAIL_MAX_WORKERS: concurrent deliveries per service instance (default 8)
+"""
+
+import os
+import threading
+from concurrent.futures import ThreadPoolExecutor
+
+from src.MailTemplate.TemplateEngine import fill_params
+
+EMAIL_MAX_WORKERS = int(os.getenv("EMAIL_MAX_WORKERS", "8"))
+
+
+def email_message(to_email, subject, body, html=False, template_body=None, params=None):
+    """
+    One outgoing message, as accepted by send_batch(). A personalised message
+    (EmailTemplate.render_batch(..., personalize=True)) also passes its shared
+    template_body and params; body may then be None and is filled in from them.
+    """
+    if body is None:
+        body = fill_params(template_body, params)
+    message = {"to_email": to_email, "subject": subject, "body": body, "html": html}
+    if template_body is not None:
+        message["template_body"] = template_body
+        message["params"] = params
+    return message
+
+
+class PooledEmailTransport:
+    """Base class: subclasses implement _deliver(), which sends one message or raises."""
+
+    def __init__(self, max_workers=None):
+        self.max_workers = max_workers or EMAIL_MAX_WORKERS
+        self._executor = None
+        self._executor_lock = threading.Lock()
+
+    def _get_executor(self):
+        with self._executor_lock:
+            if self._executor is None:
+                self._executor = ThreadPoolExecutor(
+                    max_workers=self.max_workers,
+                    thread_name_prefix=type(self).__name__
+                )
+            return self._executor
+
+    def _deliver(self, to_email, subject, body, html=False):
+        raise NotImplementedError
+
+    def _deliver_logged(self, to_email, subject, body, html):
+        try:
+            self._deliver(to_email, subject, body, html)
+            return True
+        except Exception as e:
+            print(f"✗ Email to {to_email} failed: {e}")
+            raise
+
+    def send_email_background(self, to_email, subject, body, html=False):
+        """Queue one message on the bounded pool. Returns a Future[bool]."""
+        return self._get_executor().submit(self._deliver_logged, to_email, subject, body, html)
+
+    def send_batch(self, messages):
+        """Queue several messages (see email_message()). Returns one Future per message, in order."""
+        return [
+            self.send_email_background(m["to_email"], m["subject"], m["body"], m.get("html", False))
+            for m in messages
+        ]
+
+    def close(self):
+        with self._executor_lock:
+            if self._executor is not None:
+                self._executor.shutdown(wait=True)
+                self._executor = None
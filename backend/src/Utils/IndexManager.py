@@ -0,0 +1,188 @@
+"""
+Apply the declared indexes (src/Model/Indexes.py) and check query coverage.
+
+apply: create every declared index that does not exist yet. Safe to run
+repeatedly; runs on Mongo client init (see Utils/Database.py, disable with
+MONGO_APPLY_INDEXES=false) and from the command line.
+
+check: statically collect the filters passed to db.<collection>.find / find_one /
+update_* / delete_* / count_documents calls under src/, replay each one with
+placeholder values through `explain` against a scratch database on a local
+mongod that has only the declared indexes, and report every query whose
+winning plan is a collection scan. Placeholders match the operand type an
+operator expects ($in gets a list, $elemMatch a document, ...); queries the
+server still rejects are reported as failed instead of aborting the check.
+Filters built in variables and empty filters (full listings) are skipped.
+
+    python -m src.Utils.IndexManager apply
+    python -m src.Utils.IndexManager check    # uses INDEX_CHECK_MONGO_URI (default localhost)
+"""
+
+import ast
+import os
+import pathlib
+
+from pymongo import IndexModel
+from pymongo.errors import OperationFailure
+
+from src.Model.Indexes import INDEXES
+
+INDEX_CHECK_MONGO_URI = os.getenv("INDEX_CHECK_MONGO_URI", "mongodb://localhost:27017")
+
+QUERY_METHODS = {
+    "find", "find_one", "find_one_and_update", "find_one_and_delete", "find_one_and_replace",
+    "update_one", "update_many", "replace_one", "delete_one", "delete_many", "count_documents"
+}
+
+# Collections held on instance attributes (e.g. InterviewFeedbackController)
+COLLECTION_ATTRIBUTES = {
+    "feedback_collection": "interview_feedback",
+    "candidates_collection": "drive_candidates",
+}
+
+SRC_ROOT = pathlib.Path(__file__).resolve().parents[1]
+
+
+def apply_indexes(database, indexes=None):
+    """Create missing declared indexes. Returns the names of the indexes ensured."""
+    ensured = []
+    for collection_name, specs in (indexes or INDEXES).items():
+        collection = database[collection_name]
+        for spec in specs:
+            options = {k: v for k, v in spec.items() if k != "keys"}
+            try:
+                ensured.append(f"{collection_name}.{collection.create_index(spec['keys'], **options)}")
+            except OperationFailure as e:
+                # e.g. an index with the same keys but different options already exists
+                print(f"Failed to create index {spec['keys']} on {collection_name}: {e}")
+    return ensured
+
+
+def _collection_name(node):
+    """Return the collection for db.<name>, db["<name>"] or self.<known attribute>, else None."""
+    if isinstance(node, ast.Attribute) and isinstance(node.value, ast.Name):
+        if node.value.id == "db":
+            return node.attr
+        if node.value.id == "self":
+            return COLLECTION_ATTRIBUTES.get(node.attr)
+    if (isinstance(node, ast.Subscript) and isinstance(node.value, ast.Name) and node.value.id == "db"
+            and isinstance(node.slice, ast.Constant)):
+        return node.slice.value
+    return None
+
+
+# Placeholders for runtime operands of operators that only accept a certain type
+OPERATOR_PLACEHOLDERS = {
+    "$in": ["placeholder"],
+    "$nin": ["placeholder"],
+    "$all": ["placeholder"],
+    "$elemMatch": {},
+    "$exists": True,
+    "$size": 0,
+    "$and": [{}],
+    "$or": [{}],
+    "$nor": [{}],
+}
+
+
+def _placeholder_filter(node, operator=None):
+    """Turn a filter dict literal into a concrete filter, replacing runtime values with placeholders."""
+    if isinstance(node, ast.Dict):
+        result = {}
+        for key, value in zip(node.keys, node.values):
+            if key is None:
+                continue  # **spread
+            if isinstance(key, ast.Constant):
+                name = key.value
+            else:
+                name = "dynamic_field"  # f-string keys such as f"{field}.scheduled"
+            result[name] = _placeholder_filter(value, name)
+        return result
+    if isinstance(node, (ast.List, ast.Tuple)):
+        return [_placeholder_filter(element) for element in node.elts]
+    if isinstance(node, ast.Constant):
+        return node.value
+    return OPERATOR_PLACEHOLDERS.get(operator, "placeholder")
+
+
+def collect_queries(root=SRC_ROOT):
+    """Yield (location, collection, filter) for every literal query filter under root."""
+    for path in sorted(root.rglob("*.py")):
+        tree = ast.parse(path.read_text(encoding="utf-8"))
+        for node in ast.walk(tree):
+            if not (isinstance(node, ast.Call) and isinstance(node.func, ast.Attribute)
+                    and node.func.attr in QUERY_METHODS and node.args):
+                continue
+            collection = _collection_name(node.func.value)
+            if collection is None or not isinstance(node.args[0], ast.Dict):
+                continue
+            query = _placeholder_filter(node.args[0])
+            if query:
+                yield f"{path.relative_to(root.parent)}:{node.lineno}", collection, query
+
+
+def _has_collscan(plan):
+    if isinstance(plan, dict):
+        if plan.get("stage") == "COLLSCAN":
+            return True
+        return any(_has_collscan(value) for value in plan.values())
+    if isinstance(plan, list):
+        return any(_has_collscan(value) for value in plan)
+    return False
+
+
+def check_index_coverage(mongo_uri=INDEX_CHECK_MONGO_URI, root=SRC_ROOT):
+    """
+    Explain every collected query on a scratch database.
+    Returns (uncovered, failed): queries planned with a COLLSCAN, and queries
+    the server rejected (e.g. a placeholder of the wrong type) with the error.
+    """
+    from pymongo import MongoClient
+
+    client = MongoClient(mongo_uri)
+    database = client["hirekruit_index_check"]
+    client.drop_database(database.name)
+    uncovered, failed = [], []
+    try:
+        apply_indexes(database)
+        queries = list(collect_queries(root))
+        for collection in {collection for _, collection, _ in queries}:
+            if collection not in database.list_collection_names():
+                database.create_collection(collection)
+
+        for location, collection, query in queries:
+            try:
+                explain = database.command("explain", {"find": collection, "filter": query},
+                                           verbosity="queryPlanner")
+            except OperationFailure as e:
+                failed.append((location, collection, query, str(e)))
+                continue
+            if _has_collscan(explain["queryPlanner"]["winningPlan"]):
+                uncovered.append((location, collection, query))
+
+        print(f"Checked {len(queries)} queries, {len(uncovered)} not covered by an index")
+        for location, collection, query in uncovered:
+            print(f"  COLLSCAN {location}  db.{collection} {query}")
+        if failed:
+            print(f"{len(failed)} queries could not be explained")
+            for location, collection, query, error in failed:
+                print(f"  FAILED   {location}  db.{collection} {query}: {error}")
+    finally:
+        client.drop_database(database.name)
+    return uncovered, failed
+
+
+if __name__ == "__main__":
+    import sys
+
+    command = sys.argv[1] if len(sys.argv) > 1 else ""
+    if command == "apply":
+        from src.Utils.Database import db
+        for name in apply_indexes(db):
+            print(f"ensured {name}")
+    elif command == "check":
+        uncovered, failed = check_index_coverage()
+        sys.exit(1 if uncovered or failed else 0)
+    else:
+        print("usage: python -m src.Utils.IndexManager apply|check")
+        sys.exit(1)
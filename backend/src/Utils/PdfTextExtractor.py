@@ -0,0 +1,239 @@
+"""
+Shared PDF text extraction service.
+
+Used by resume upload ingestion, ResumeIntakeAgent, QuestionIntakeAgent and
+the mock-interview resume upload, so every path parses PDFs the same way:
+- PyMuPDF parsing runs in a process pool (CPU-bound, keeps request/worker threads free).
+  If a worker dies (OOM kill, MuPDF crash) the broken pool is discarded and
+  rebuilt on the next document; the documents it was parsing are retried once
+  in-process. Where no pool can be started at all (e.g. daemonic Celery
+  workers cannot spawn children) extraction stays in-process.
+- pages are streamed one at a time and parsing stops at a page / character cap
+- results are deduplicated on the SHA-256 of the PDF bytes: identical files are
+  parsed once, including when the same file is submitted concurrently
+
+Configuration (environment):
+- PDF_EXTRACT_PROCESSES: process pool size (default: CPU count)
+- PDF_MAX_PAGES:         pages read per document (default 20)
+- PDF_MAX_CHARS:         characters kept per document (default 100000)
+- PDF_TEXT_CACHE_SIZE:   deduplicated results kept in memory (default 512)
+
+Benchmark:
+    python -m src.Utils.PdfTextExtractor [num_pdfs] [pages_per_pdf]
+"""
+
+import hashlib
+import os
+import threading
+import time
+from collections import OrderedDict
+from concurrent.futures import Future, ProcessPoolExecutor
+from concurrent.futures.process import BrokenProcessPool
+
+PDF_EXTRACT_PROCESSES = int(os.getenv("PDF_EXTRACT_PROCESSES", str(os.cpu_count() or 1)))
+PDF_MAX_PAGES = int(os.getenv("PDF_MAX_PAGES", "20"))
+PDF_MAX_CHARS = int(os.getenv("PDF_MAX_CHARS", "100000"))
+PDF_TEXT_CACHE_SIZE = int(os.getenv("PDF_TEXT_CACHE_SIZE", "512"))
+
+
+def iter_pdf_pages(pdf_bytes, max_pages=PDF_MAX_PAGES, max_chars=PDF_MAX_CHARS):
+    """Yield page texts one at a time, stopping at max_pages pages or max_chars characters."""
+    import fitz  # PyMuPDF
+
+    remaining = max_chars
+    with fitz.open(stream=pdf_bytes, filetype="pdf") as pdf:
+        for page_number, page in enumerate(pdf):
+            if page_number >= max_pages or remaining <= 0:
+                break
+            text = page.get_text()
+            if len(text) > remaining:
+                text = text[:remaining]
+            remaining -= len(text)
+            yield text
+
+
+def extract_pdf_text(pdf_bytes, max_pages=PDF_MAX_PAGES, max_chars=PDF_MAX_CHARS):
+    """Extract text in the current process. Module-level so the process pool can pickle it."""
+    return "".join(iter_pdf_pages(pdf_bytes, max_pages, max_chars)).strip()
+
+
+class PdfTextExtractor:
+    def __init__(self, processes=PDF_EXTRACT_PROCESSES, cache_size=PDF_TEXT_CACHE_SIZE):
+        self.processes = processes
+        self.cache_size = cache_size
+        self._pool = None
+        self._pool_failed = False
+        self._results = OrderedDict()   # (sha256, max_pages, max_chars) -> text
+        self._in_flight = {}            # same key -> Future shared by concurrent callers
+        self._lock = threading.Lock()
+        self._pool_lock = threading.Lock()
+
+    def _get_pool(self):
+        with self._pool_lock:
+            if self._pool is None and not self._pool_failed:
+                try:
+                    self._pool = ProcessPoolExecutor(max_workers=self.processes)
+                except Exception as e:
+                    print(f"PDF process pool unavailable, extracting in-process: {e}")
+                    self._pool_failed = True
+            return self._pool
+
+    def _discard_pool(self, pool, permanent=False):
+        """Drop a pool that can no longer run work; the next document builds a new one unless permanent."""
+        with self._pool_lock:
+            if permanent:
+                self._pool_failed = True
+            if self._pool is not pool:
+                return  # already replaced by another caller
+            self._pool = None
+        pool.shutdown(wait=False)
+
+    @staticmethod
+    def _extract_into(future, pdf_bytes, max_pages, max_chars):
+        try:
+            future.set_result(extract_pdf_text(pdf_bytes, max_pages, max_chars))
+        except Exception as e:
+            future.set_exception(e)
+
+    def _settle(self, pool_future, future, pool, pdf_bytes, max_pages, max_chars):
+        if pool_future.cancelled():
+            future.cancel()
+            return
+        error = pool_future.exception()
+        if isinstance(error, BrokenProcessPool):
+            # A worker died; retry this document once in-process, off the pool's management thread
+            print(f"PDF process pool broken ({error}); retrying document in-process, pool will be rebuilt")
+            self._discard_pool(pool)
+            threading.Thread(target=self._extract_into, args=(future, pdf_bytes, max_pages, max_chars),
+                             name="PdfExtractRetry", daemon=True).start()
+        elif error is not None:
+            future.set_exception(error)
+        else:
+            future.set_result(pool_future.result())
+
+    def _submit(self, pdf_bytes, max_pages, max_chars):
+        future = Future()
+        pool = self._get_pool()
+        if pool is not None:
+            try:
+                pool_future = pool.submit(extract_pdf_text, pdf_bytes, max_pages, max_chars)
+            except BrokenProcessPool as e:
+                print(f"PDF process pool broken ({e}); extracting in-process, pool will be rebuilt")
+                self._discard_pool(pool)
+            except Exception as e:
+                # e.g. daemonic worker processes may not spawn children: do not retry on every call
+                print(f"PDF process pool unavailable, extracting in-process from now on: {e}")
+                self._discard_pool(pool, permanent=True)
+            else:
+                pool_future.add_done_callback(
+                    lambda f: self._settle(f, future, pool, pdf_bytes, max_pages, max_chars)
+                )
+                return future
+
+        self._extract_into(future, pdf_bytes, max_pages, max_chars)
+        return future
+
+    def submit(self, pdf_bytes, max_pages=PDF_MAX_PAGES, max_chars=PDF_MAX_CHARS):
+        """Return a Future for the document text, reusing cached or in-flight work for identical bytes."""
+        key = (hashlib.sha256(pdf_bytes).hexdigest(), max_pages, max_chars)
+        with self._lock:
+            if key in self._results:
+                self._results.move_to_end(key)
+                future = Future()
+                future.set_result(self._results[key])
+                return future
+            future = self._in_flight.get(key)
+            if future is not None:
+                return future
+            future = self._submit(pdf_bytes, max_pages, max_chars)
+            self._in_flight[key] = future
+
+        future.add_done_callback(lambda f, key=key: self._store(key, f))
+        return future
+
+    def _store(self, key, future):
+        with self._lock:
+            self._in_flight.pop(key, None)
+            if future.cancelled() or future.exception() is not None:
+                return
+            self._results[key] = future.result()
+            self._results.move_to_end(key)
+            while len(self._results) > self.cache_size:
+                self._results.popitem(last=False)
+
+    def extract(self, pdf_bytes, max_pages=PDF_MAX_PAGES, max_chars=PDF_MAX_CHARS):
+        return self.submit(pdf_bytes, max_pages, max_chars).result()
+
+    def extract_many(self, pdf_bytes_list, max_pages=PDF_MAX_PAGES, max_chars=PDF_MAX_CHARS):
+        """Extract several documents in parallel; results are in input order."""
+        futures = [self.submit(pdf_bytes, max_pages, max_chars) for pdf_bytes in pdf_bytes_list]
+        return [future.result() for future in futures]
+
+
+_extractor = None
+_extractor_lock = threading.Lock()
+
+
+def get_pdf_extractor():
+    """Return the process-wide extractor."""
+    global _extractor
+    with _extractor_lock:
+        if _extractor is None:
+            _extractor = PdfTextExtractor()
+        return _extractor
+
+
+def extract_text_from_pdf_bytes(pdf_bytes, max_pages=PDF_MAX_PAGES, max_chars=PDF_MAX_CHARS):
+    """Helper: Extract PDF text from bytes through the shared extractor."""
+    return get_pdf_extractor().extract(pdf_bytes, max_pages, max_chars)
+
+
+def _synthetic_pdf(pages, seed):
+    import fitz  # PyMuPDF
+
+    doc = fitz.open()
+    for page_number in range(pages):
+        page = doc.new_page()
+        lines = [
+            f"Candidate {seed} - page {page_number + 1}",
+            "Experience: Python, Flask, MongoDB, React, Docker, AWS",
+        ] + [f"Project {i}: built a distributed service handling {seed * 100 + i} requests/s" for i in range(40)]
+        page.insert_text((50, 60), "\n".join(lines), fontsize=9)
+    pdf_bytes = doc.tobytes()
+    doc.close()
+    return pdf_bytes
+
+
+def run_benchmark(num_pdfs=200, pages_per_pdf=3):
+    """Report pages/second/core for serial vs pooled extraction over synthetic PDFs."""
+    corpus = [_synthetic_pdf(pages_per_pdf, seed) for seed in range(num_pdfs)]
+    total_pages = num_pdfs * pages_per_pdf
+    cores = PDF_EXTRACT_PROCESSES
+
+    started = time.perf_counter()
+    for pdf_bytes in corpus:
+        extract_pdf_text(pdf_bytes, max_pages=pages_per_pdf, max_chars=10 ** 9)
+    serial = time.perf_counter() - started
+
+    extractor = PdfTextExtractor(processes=cores, cache_size=0)
+    extractor.extract_many(corpus[:cores], max_pages=1)  # warm the pool
+    started = time.perf_counter()
+    extractor.extract_many(corpus, max_pages=pages_per_pdf, max_chars=10 ** 9)
+    pooled = time.perf_counter() - started
+
+    extractor.cache_size = num_pdfs
+    extractor.extract_many(corpus, max_pages=pages_per_pdf, max_chars=10 ** 9)
+    started = time.perf_counter()
+    extractor.extract_many(corpus, max_pages=pages_per_pdf, max_chars=10 ** 9)
+    deduped = time.perf_counter() - started
+
+    print(f"Corpus: {num_pdfs} PDFs x {pages_per_pdf} pages = {total_pages} pages, {cores} processes")
+    print(f"serial:  {serial:.3f}s  {total_pages / serial:,.0f} pages/s  ({total_pages / serial:,.0f} pages/s/core)")
+    print(f"pooled:  {pooled:.3f}s  {total_pages / pooled:,.0f} pages/s  ({total_pages / pooled / cores:,.0f} pages/s/core)")
+    print(f"deduped: {deduped:.3f}s  (all {num_pdfs} documents served from the SHA-256 cache)")
+
+
+if __name__ == "__main__":
+    import sys
+
+    run_benchmark(*(int(arg) for arg in sys.argv[1:3]))
@@ -0,0 +1,259 @@
+"""
+Asynchronous resume ingestion.
+
+The upload request only stages file bytes in GridFS and records a
+resume_ingestion_jobs document. A Celery worker (ingest_resumes_task) then
+processes the files in chunks: text extraction + Cloudinary upload run in
+parallel per chunk, followed by ResumeIntakeAgent parsing. Per-file state is
+persisted on the job document and progress is pushed on the `pipeline_update`
+Socket.IO channel.
+
+Configuration (environment):
+- RESUME_INGEST_CHUNK_SIZE: files per chunk (default 25)
+- RESUME_INGEST_WORKERS:    parallel extract/upload threads per chunk (default 8)
+"""
+
+import os
+from concurrent.futures import ThreadPoolExecutor
+from datetime import datetime
+
+import cloudinary.uploader
+import gridfs
+from bson import ObjectId
+from pymongo import ReturnDocument, UpdateOne
+
+from src.Config.cloudinary_config import cloudinary
+from src.Model.Drive import DriveStatus
+from src.Model.ResumeIngestionJob import (
+    IngestionFileStatus,
+    IngestionJobStatus,
+    create_ingestion_file,
+    create_ingestion_job,
+)
+from src.SocketIO.SocketIO_Instance import socketio
+from src.Utils.Database import db
+from src.Utils.PdfTextExtractor import extract_text_from_pdf_bytes
+
+RESUME_INGEST_CHUNK_SIZE = int(os.getenv("RESUME_INGEST_CHUNK_SIZE", "25"))
+RESUME_INGEST_WORKERS = int(os.getenv("RESUME_INGEST_WORKERS", "8"))
+
+staging_fs = gridfs.GridFS(db, collection="resume_staging")
+
+
+def stage_resume_upload(files, drive_id, skills, job_role):
+    """
+    Store uploaded files in GridFS and create the ingestion job.
+    files: iterable of (filename, bytes). Returns the job id as a string.
+    """
+    staged = []
+    for filename, file_bytes in files:
+        file_id = staging_fs.put(file_bytes, filename=filename, drive_id=drive_id)
+        staged.append(create_ingestion_file(file_id, filename, len(file_bytes)))
+
+    job = create_ingestion_job(drive_id, skills, job_role, staged)
+    result = db.resume_ingestion_jobs.insert_one(job)
+    return str(result.inserted_id)
+
+
+def _emit_progress(job, processed, failed, title, message, done=False):
+    socketio.emit("pipeline_update", {
+        "id": str(ObjectId()),
+        "type": "resume_ingestion_completed" if done else "resume_ingestion_progress",
+        "title": title,
+        "message": message,
+        "driveId": job["drive_id"],
+        "jobId": str(job["_id"]),
+        "processed": processed,
+        "failed": failed,
+        "total": job["total_files"],
+        "priority": "high" if done else "low",
+        "timestamp": datetime.utcnow().isoformat()
+    })
+
+
+def _file_update(job_id, index, fields):
+    fields = {f"files.{index}.{k}": v for k, v in fields.items()}
+    fields[f"files.{index}.updated_at"] = datetime.utcnow()
+    return UpdateOne({"_id": job_id}, {"$set": fields})
+
+
+def _extract_and_upload(staged_file):
+    """Read staged bytes, extract text and upload to Cloudinary. Runs on a worker thread."""
+    file_bytes = staging_fs.get(staged_file["file_id"]).read()
+
+    raw_text = extract_text_from_pdf_bytes(file_bytes)
+    if not raw_text:
+        print(f"WARNING: No text extracted from {staged_file['filename']}. File might be corrupted or scanned image.")
+
+    # Upload as 'image' with 'authenticated' type to match delivery
+    result = cloudinary.uploader.upload(
+        file_bytes,
+        resource_type="image",
+        type="authenticated",
+        folder="resumes",
+        use_filename=True,
+        unique_filename=True
+    )
+
+    if result.get("bytes") != len(file_bytes):
+        print(f"ERROR: Byte mismatch! Local: {len(file_bytes)}, Cloudinary: {result.get('bytes')}")
+
+    return {
+        "url": result["secure_url"],
+        "public_id": result["public_id"],
+        "version": result.get("version"),
+        "format": result.get("format"),
+        "resource_type": "image",
+        "delivery_type": "authenticated",
+        "text": raw_text
+    }
+
+
+def _process_chunk(job, chunk, intake_agent):
+    """
+    chunk: list of (index, staged_file). Returns (parsed, failed) counts.
+    All state transitions for the chunk are written with bulk updates.
+    """
+    job_id = job["_id"]
+    updates = []
+    uploaded = []
+    failed = 0
+
+    with ThreadPoolExecutor(max_workers=RESUME_INGEST_WORKERS) as executor:
+        futures = [(index, staged_file, executor.submit(_extract_and_upload, staged_file)) for index, staged_file in chunk]
+        for index, staged_file, future in futures:
+            try:
+                resume_data = future.result()
+                uploaded.append((index, resume_data))
+                updates.append(_file_update(job_id, index, {
+                    "status": IngestionFileStatus.UPLOADED,
+                    "resume_url": resume_data["url"]
+                }))
+            except Exception as e:
+                print(f"Error processing {staged_file['filename']}: {e}")
+                failed += 1
+                updates.append(_file_update(job_id, index, {"status": IngestionFileStatus.FAILED, "error": str(e)}))
+
+    if updates:
+        db.resume_ingestion_jobs.bulk_write(updates, ordered=True)
+        updates = []
+
+    parsed = 0
+    if uploaded:
+        results = intake_agent.process_resumes([data for _, data in uploaded], job["drive_id"])
+        for (index, _), result in zip(uploaded, results):
+            if result["status"] == "success":
+                parsed += 1
+                updates.append(_file_update(job_id, index, {
+                    "status": IngestionFileStatus.PARSED,
+                    "candidate_id": result["candidate"]["candidate_id"]
+                }))
+            else:
+                failed += 1
+                updates.append(_file_update(job_id, index, {
+                    "status": IngestionFileStatus.FAILED,
+                    "error": result["error"]
+                }))
+
+    updates.append(UpdateOne(
+        {"_id": job_id},
+        {
+            "$inc": {"processed_files": parsed + failed, "failed_files": failed},
+            "$set": {"updated_at": datetime.utcnow()}
+        }
+    ))
+    db.resume_ingestion_jobs.bulk_write(updates, ordered=True)
+
+    # Staged bytes are no longer needed once a file reached a terminal state
+    for _, staged_file in chunk:
+        try:
+            staging_fs.delete(staged_file["file_id"])
+        except Exception as e:
+            print(f"Failed to delete staged file {staged_file['file_id']}: {e}")
+
+    return parsed, failed
+
+
+def run_resume_ingestion(job_id):
+    """
+    Process every pending file of an ingestion job. Safe to re-run after a
+    crash or Celery retry: files already parsed or failed are skipped.
+    """
+    from src.Agents.ResumeIntakeAgent import ResumeIntakeAgent
+
+    job_object_id = ObjectId(job_id)
+    job = db.resume_ingestion_jobs.find_one_and_update(
+        {"_id": job_object_id},
+        {"$set": {"status": IngestionJobStatus.PROCESSING, "updated_at": datetime.utcnow()}},
+        return_document=ReturnDocument.AFTER
+    )
+    if not job:
+        raise ValueError(f"Resume ingestion job not found: {job_id}")
+
+    pending = [
+        (index, staged_file)
+        for index, staged_file in enumerate(job["files"])
+        if staged_file["status"] not in (IngestionFileStatus.PARSED, IngestionFileStatus.FAILED)
+    ]
+    processed = job.get("processed_files", 0)
+    failed = job.get("failed_files", 0)
+
+    print(f"Resume ingestion {job_id}: {len(pending)} of {job['total_files']} files pending")
+
+    try:
+        intake_agent = ResumeIntakeAgent()
+        for start in range(0, len(pending), RESUME_INGEST_CHUNK_SIZE):
+            chunk = pending[start:start + RESUME_INGEST_CHUNK_SIZE]
+            chunk_parsed, chunk_failed = _process_chunk(job, chunk, intake_agent)
+            processed += chunk_parsed + chunk_failed
+            failed += chunk_failed
+            _emit_progress(
+                job, processed, failed,
+                "Processing Resumes",
+                f"Processed {processed} of {job['total_files']} resumes."
+            )
+    except Exception as e:
+        db.resume_ingestion_jobs.update_one(
+            {"_id": job_object_id},
+            {"$set": {"status": IngestionJobStatus.FAILED, "error": str(e), "updated_at": datetime.utcnow()}}
+        )
+        raise
+
+    db.resume_ingestion_jobs.update_one(
+        {"_id": job_object_id},
+        {"$set": {
+            "status": IngestionJobStatus.COMPLETED,
+            "updated_at": datetime.utcnow(),
+            "completed_at": datetime.utcnow()
+        }}
+    )
+
+    # Update drive status
+    try:
+        db.drives.update_one(
+            {"_id": ObjectId(job["drive_id"])},
+            {"$set": {"status": DriveStatus.RESUME_UPLOADED, "updated_at": datetime.utcnow()}}
+        )
+    except Exception as e:
+        print(f"Error updating drive status in DB: {str(e)}")
+
+    _emit_progress(
+        job, processed, failed,
+        "Resumes Processed",
+        f"{processed - failed} of {job['total_files']} resumes processed successfully.",
+        done=True
+    )
+
+    return {"job_id": job_id, "processed": processed, "failed": failed, "total": job["total_files"]}
+
+
+def get_ingestion_job(job_id):
+    """Return the job with per-file state, serialized for JSON, or None."""
+    job = db.resume_ingestion_jobs.find_one({"_id": ObjectId(job_id)})
+    if not job:
+        return None
+
+    job["_id"] = str(job["_id"])
+    for staged_file in job.get("files", []):
+        staged_file["file_id"] = str(staged_file["file_id"])
+    return job
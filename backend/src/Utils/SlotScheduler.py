@@ -0,0 +1,220 @@
+"""
+Capacity-aware interview slot allocation.
+
+AI interviews used to be scheduled for 10:00 the next day for every candidate,
+so a drive opened all of its LiveKit rooms and MockInterviewAgent evaluations
+at once. Interviews are now placed on a grid of fixed-length slots inside a
+daily window. Each slot holds at most INTERVIEW_MAX_CONCURRENT_PER_COMPANY
+interviews of one company and INTERVIEW_MAX_CONCURRENT_GLOBAL overall,
+counting interviews already booked (scheduled, not yet completed) on other
+drives. Slots are filled earliest first, and the slot start is what gets
+persisted in rounds_status[].scheduled_date.
+
+Simulation (no writes; reports the peak concurrency an allocation creates):
+    python -m src.Utils.SlotScheduler simulate <count> [company_id]
+    python -m src.Utils.SlotScheduler benchmark [count]
+
+Configuration (environment):
+- INTERVIEW_SLOT_MINUTES:               slot length (default 30)
+- INTERVIEW_WINDOW_START:               first slot of the day, HH:MM (default 10:00)
+- INTERVIEW_WINDOW_END:                 no slot starts at or after this, HH:MM (default 18:00)
+- INTERVIEW_MAX_CONCURRENT_PER_COMPANY: interviews per slot for one company (default 25)
+- INTERVIEW_MAX_CONCURRENT_GLOBAL:      interviews per slot across companies (default 100)
+- INTERVIEW_MAX_DAYS:                   days ahead allocation may spill into (default 60)
+"""
+
+import os
+import re
+import time
+from collections import Counter
+from datetime import datetime, timedelta
+
+INTERVIEW_SLOT_MINUTES = int(os.getenv("INTERVIEW_SLOT_MINUTES", "30"))
+INTERVIEW_WINDOW_START = os.getenv("INTERVIEW_WINDOW_START", "10:00")
+INTERVIEW_WINDOW_END = os.getenv("INTERVIEW_WINDOW_END", "18:00")
+INTERVIEW_MAX_CONCURRENT_PER_COMPANY = int(os.getenv("INTERVIEW_MAX_CONCURRENT_PER_COMPANY", "25"))
+INTERVIEW_MAX_CONCURRENT_GLOBAL = int(os.getenv("INTERVIEW_MAX_CONCURRENT_GLOBAL", "100"))
+INTERVIEW_MAX_DAYS = int(os.getenv("INTERVIEW_MAX_DAYS", "60"))
+
+# Coding rounds store their deadline in scheduled_date; they do not occupy a room
+_CODING_ROUND = re.compile(r"^\s*(coding|assessment|coding assessment)\s*$", re.IGNORECASE)
+
+
+def _minutes(hhmm):
+    hours, minutes = hhmm.split(":")
+    return int(hours) * 60 + int(minutes)
+
+
+def _window():
+    start, end = _minutes(INTERVIEW_WINDOW_START), _minutes(INTERVIEW_WINDOW_END)
+    if end <= start:
+        raise ValueError("INTERVIEW_WINDOW_END must be after INTERVIEW_WINDOW_START")
+    return start, end
+
+
+def first_interview_day(now=None):
+    """Interviews start the day after scheduling, as before."""
+    return ((now or datetime.now()) + timedelta(days=1)).replace(hour=0, minute=0, second=0, microsecond=0)
+
+
+def interview_slots(start_day, max_days=None):
+    """Slot start times from start_day (a date at midnight), window by window."""
+    window_start, window_end = _window()
+    offsets = [timedelta(minutes=m) for m in range(window_start, window_end, INTERVIEW_SLOT_MINUTES)]
+    for day in range(max_days or INTERVIEW_MAX_DAYS):
+        midnight = start_day + timedelta(days=day)
+        for offset in offsets:
+            yield midnight + offset
+
+
+def slot_key(moment):
+    """The grid slot an arbitrary datetime falls into (start of that slot)."""
+    window_start, _ = _window()
+    midnight = moment.replace(hour=0, minute=0, second=0, microsecond=0)
+    since_start = int((moment - midnight).total_seconds() // 60) - window_start
+    return midnight + timedelta(minutes=window_start + since_start // INTERVIEW_SLOT_MINUTES * INTERVIEW_SLOT_MINUTES)
+
+
+def load_booked_slots(company_id=None, since=None, exclude_drive_id=None):
+    """
+    Interviews already booked from `since` on, per slot: (global Counter, company Counter).
+    Rounds of exclude_drive_id are skipped, so re-scheduling a drive does not count itself.
+    """
+    from bson import ObjectId
+    from src.Utils.Database import db
+
+    since = since or first_interview_day()
+    booked = {"scheduled": "yes", "completed": {"$ne": "yes"}, "scheduled_date": {"$gte": since}}
+    match = {"rounds_status": {"$elemMatch": booked}}
+    if exclude_drive_id:
+        match["drive_id"] = {"$ne": str(exclude_drive_id)}
+
+    rows = list(db.drive_candidates.aggregate([
+        {"$match": match},
+        {"$unwind": "$rounds_status"},
+        {"$match": {
+            **{f"rounds_status.{field}": value for field, value in booked.items()},
+            "rounds_status.round_type": {"$not": _CODING_ROUND}
+        }},
+        {"$group": {
+            "_id": {"drive_id": "$drive_id", "at": "$rounds_status.scheduled_date"},
+            "count": {"$sum": 1}
+        }}
+    ]))
+
+    drive_company = {}
+    if company_id is not None and rows:
+        drive_ids = {row["_id"]["drive_id"] for row in rows}
+        drive_company = {
+            str(d["_id"]): str(d.get("company_id"))
+            for d in db.drives.find(
+                {"_id": {"$in": [ObjectId(d) for d in drive_ids if ObjectId.is_valid(d)]}},
+                {"company_id": 1}
+            )
+        }
+
+    global_load, company_load = Counter(), Counter()
+    for row in rows:
+        key = slot_key(row["_id"]["at"])
+        global_load[key] += row["count"]
+        if company_id is not None and drive_company.get(row["_id"]["drive_id"]) == str(company_id):
+            company_load[key] += row["count"]
+    return global_load, company_load
+
+
+def allocate_slots(count, start_day=None, global_load=None, company_load=None,
+                   per_company=None, global_cap=None):
+    """
+    Assign `count` interviews to slots, earliest first, within both budgets.
+    Returns a list of `count` slot start datetimes (non-decreasing). Raises
+    ValueError if they do not fit within INTERVIEW_MAX_DAYS.
+    """
+    per_company = per_company or INTERVIEW_MAX_CONCURRENT_PER_COMPANY
+    global_cap = global_cap or INTERVIEW_MAX_CONCURRENT_GLOBAL
+    global_load = global_load or {}
+    company_load = company_load or {}
+
+    allocation = []
+    remaining = count
+    for slot in interview_slots(start_day or first_interview_day()):
+        if remaining <= 0:
+            break
+        free = min(per_company - company_load.get(slot, 0), global_cap - global_load.get(slot, 0))
+        if free <= 0:
+            continue
+        take = min(free, remaining)
+        allocation.extend([slot] * take)
+        remaining -= take
+
+    if remaining > 0:
+        raise ValueError(
+            f"Cannot fit {count} interviews within {INTERVIEW_MAX_DAYS} days "
+            f"({per_company} per company / {global_cap} global per slot)"
+        )
+    return allocation
+
+
+def peak_concurrency(allocation, global_load=None, company_load=None):
+    """Concurrency report for an allocation on top of the booked load."""
+    new = Counter(allocation)
+    global_load = global_load or {}
+    company_load = company_load or {}
+
+    def peak(load):
+        if not load:
+            return 0, None
+        slot = max(load, key=lambda s: (load[s], -s.timestamp()))
+        return load[slot], slot
+
+    peak_company, peak_company_at = peak({s: n + company_load.get(s, 0) for s, n in new.items()})
+    peak_global, peak_global_at = peak({s: n + global_load.get(s, 0) for s, n in new.items()})
+    return {
+        "interviews": len(allocation),
+        "slots_used": len(new),
+        "first_slot": min(new) if new else None,
+        "last_slot": max(new) if new else None,
+        "peak_company": peak_company,
+        "peak_company_at": peak_company_at,
+        "peak_global": peak_global,
+        "peak_global_at": peak_global_at,
+    }
+
+
+def schedule_slots(count, company_id=None, exclude_drive_id=None, start_day=None):
+    """Allocate slots for a drive's round, accounting for interviews already booked."""
+    start_day = start_day or first_interview_day()
+    global_load, company_load = load_booked_slots(company_id, start_day, exclude_drive_id)
+    return allocate_slots(count, start_day, global_load, company_load)
+
+
+def simulate_allocation(count, company_id=None, exclude_drive_id=None, start_day=None, booked=True):
+    """
+    Dry run of schedule_slots(): nothing is written. Reports the peak concurrency
+    the allocation would create, next to the single-slot peak of the old scheduler.
+    """
+    start_day = start_day or first_interview_day()
+    global_load, company_load = (
+        load_booked_slots(company_id, start_day, exclude_drive_id) if booked else (Counter(), Counter())
+    )
+    allocation = allocate_slots(count, start_day, global_load, company_load)
+    report = peak_concurrency(allocation, global_load, company_load)
+    report["single_slot_peak"] = count
+    return report
+
+
+if __name__ == "__main__":
+    import sys
+
+    command = sys.argv[1] if len(sys.argv) > 1 else None
+    if command == "simulate" and len(sys.argv) > 2:
+        company = sys.argv[3] if len(sys.argv) > 3 else None
+        print(simulate_allocation(int(sys.argv[2]), company))
+    elif command == "benchmark":
+        count = int(sys.argv[2]) if len(sys.argv) > 2 else 10000
+        started = time.perf_counter()
+        report = simulate_allocation(count, booked=False)
+        print(f"Allocated {count} interviews in {(time.perf_counter() - started) * 1000:.1f} ms")
+        print(report)
+    else:
+        print("usage: python -m src.Utils.SlotScheduler simulate <count> [company_id] | benchmark [count]")
+        sys.exit(1)
@@ -122,15 +122,14 @@ const Dashboard = () => {
       });
 
       if (response.ok) {
-        toast.success("Resumes processed successfully!");
+        toast.success("Resumes uploaded! Processing continues in the background.");
         navigate("/dashboard/drives");
       } else {
         toast.error("Failed to process resumes");
       }
 
       const result = await response.json();
-      // Team Note: Showing notification after resume processing completes
-      toast.success("Resume processed successfully");
+      // Team Note: Resumes are processed by a background job; progress arrives via pipeline_update
       console.log("Result:", result);
       navigate("/dashboard/drives");
     } catch (error) {
@@ -11,8 +11,73 @@ import { useParams } from "react-router-dom";
 import Loader from "../components/Loader";
 import { Clock, AlertCircle, Mail, Home, ArrowLeft } from "lucide-react";
 import { motion } from "framer-motion";
+import { io } from "socket.io-client";
 const BASE_URL = import.meta.env.VITE_BASE_URL;
 
+// "Run Code" is evaluated on a queue: test case results stream over the
+// code_run_update socket event; the run endpoint is polled in case the socket cannot connect.
+// Give up when a run shows no progress for this long (e.g. its worker died)
+const CODE_RUN_IDLE_TIMEOUT_MS = 90000;
+
+const waitForCodeRun = (runId, onProgress) =>
+  new Promise((resolve, reject) => {
+    const socket = io(BASE_URL, { transports: ["websocket", "polling"] });
+    let settled = false;
+    let completed = 0;
+    let poller = null;
+    let idleTimer = null;
+
+    const finish = (settle, value) => {
+      if (settled) return;
+      settled = true;
+      clearInterval(poller);
+      clearTimeout(idleTimer);
+      socket.disconnect();
+      settle(value);
+    };
+
+    const resetIdleTimer = () => {
+      clearTimeout(idleTimer);
+      idleTimer = setTimeout(
+        () => finish(reject, new Error("Evaluation is taking too long. Please try running your code again.")),
+        CODE_RUN_IDLE_TIMEOUT_MS
+      );
+    };
+    resetIdleTimer();
+
+    const handleRunState = (run) => {
+      if (run.status === "completed") finish(resolve, { success: true, ...run });
+      else if (run.status === "failed") finish(reject, new Error(run.error || "Evaluation failed"));
+      else if ((run.results || []).length > completed) {
+        completed = run.results.length;
+        resetIdleTimer();
+        onProgress(completed, run.total_test_cases);
+      }
+    };
+
+    socket.on("connect", () => socket.emit("join_code_run", { run_id: runId }));
+    socket.on("code_run_update", (event) => {
+      if (event.run_id !== runId) return;
+      if (event.type === "snapshot") handleRunState(event.run);
+      else if (event.type === "test_case_result") {
+        completed = event.completed;
+        resetIdleTimer();
+        onProgress(completed, event.total);
+      } else if (event.type === "started") resetIdleTimer();
+      else if (event.type === "completed") finish(resolve, event);
+      else if (event.type === "failed") finish(reject, new Error(event.error || "Evaluation failed"));
+    });
+
+    poller = setInterval(async () => {
+      try {
+        const res = await fetch(`${BASE_URL}/api/coding-assessment/submission/runs/${runId}`);
+        if (res.ok) handleRunState((await res.json()).run);
+      } catch (e) {
+        // keep waiting for the socket
+      }
+    }, 3000);
+  });
+
 export default function Assessment() {
   const { driveId: routeDriveId, candidateId: routeCandidateId } = useParams();
   const navigate = useNavigate();
@@ -295,7 +360,10 @@ export default function Assessment() {
         throw new Error(errorData.error || "Failed to submit question");
       }
 
-      const data = await response.json();
+      const queued = await response.json();
+      const data = await waitForCodeRun(queued.run_id, (done, total) =>
+        setOutput(`Running... ${done}/${total} test cases finished`)
+      );
 
       setProblemStatus((prev) => ({
         ...prev,